@@ -12,6 +12,8 @@ from loguru import logger
 from app.config import config
 from app.models.exception import HttpException
 from app.router import root_api_router
+from app.services.fonts import font_registry
+from app.services.whisper_worker import whisper_pool
 from app.utils import utils
 
 
@@ -75,8 +77,23 @@ app.mount("/", StaticFiles(directory=public_dir, html=True), name="")
 @app.on_event("shutdown")
 def shutdown_event():
     logger.info("shutdown event")
+    from app.controllers.v1.video import task_manager
+
+    task_manager.shutdown()
+    if whisper_pool.started:
+        whisper_pool.stop()
 
 
 @app.on_event("startup")
 def startup_event():
     logger.info("startup event")
+    # index the fonts once instead of probing font paths on every render
+    font_registry.init()
+    # index the local clip library before the first task searches it
+    if config.app.get("material_local_first", False):
+        from app.services.library import library
+
+        library.refresh_in_background()
+    # load the whisper model before the first task needs it
+    if config.app.get("subtitle_provider", "edge").strip().lower() == "whisper":
+        whisper_pool.start()
@@ -7,6 +7,15 @@ from loguru import logger
 
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 config_file = f"{root_dir}/config.toml"
+# mtime of config_file when it was last loaded
+_config_mtime = 0.0
+
+
+def _get_config_mtime() -> float:
+    try:
+        return os.path.getmtime(config_file)
+    except OSError:
+        return 0.0
 
 
 def load_config():
@@ -22,6 +31,8 @@ def load_config():
 
     logger.info(f"load config from file: {config_file}")
 
+    global _config_mtime
+    _config_mtime = _get_config_mtime()
     try:
         _config_ = toml.load(config_file)
     except Exception as e:
@@ -52,6 +63,15 @@ def reload():
     logger.info("Config reloaded")
 
 
+def reload_if_changed():
+    """
+    Reload the config only if config.toml was modified since it was last loaded.
+    Cheap enough to call before every request.
+    """
+    if _get_config_mtime() != _config_mtime:
+        reload()
+
+
 _cfg = load_config()
 app = _cfg.get("app", {})
 
@@ -1,13 +1,17 @@
 import threading
 from typing import Any, Callable, Dict
 
+from app.controllers.manager.process_pool import TaskProcessPool
+
 
 class TaskManager:
-    def __init__(self, max_concurrent_tasks: int):
+    def __init__(self, max_concurrent_tasks: int, executor: str = "thread", task_timeout: float = 0):
         self.max_concurrent_tasks = max_concurrent_tasks
         self.current_tasks = 0
         self.lock = threading.Lock()
         self.queue = self.create_queue()
+        # "process": tasks run in worker processes (the thread only waits for them), "thread": in the thread itself
+        self.pool = TaskProcessPool(max_concurrent_tasks, task_timeout) if executor == "process" else None
 
     def create_queue(self):
         raise NotImplementedError()
@@ -24,6 +28,8 @@ class TaskManager:
                 self.enqueue({"func": func, "args": args, "kwargs": kwargs})
 
     def execute_task(self, func: Callable, *args: Any, **kwargs: Any):
+        # counted here (under self.lock) so that add_task never starts more than max_concurrent_tasks
+        self.current_tasks += 1
         thread = threading.Thread(
             target=self.run_task, args=(func, *args), kwargs=kwargs
         )
@@ -31,12 +37,23 @@ class TaskManager:
 
     def run_task(self, func: Callable, *args: Any, **kwargs: Any):
         try:
-            with self.lock:
-                self.current_tasks += 1
-            func(*args, **kwargs)  # call the function here, passing *args and **kwargs.
+            if self.pool:
+                self.pool.run(func, *args, **kwargs)
+            else:
+                func(*args, **kwargs)  # call the function here, passing *args and **kwargs.
         finally:
             self.task_done()
 
+    def kill_task(self, task_id: str) -> bool:
+        """
+        Kill a running task, only possible with the process executor.
+        """
+        return self.pool.kill(task_id) if self.pool else False
+
+    def shutdown(self):
+        if self.pool:
+            self.pool.stop()
+
     def check_queue(self):
         with self.lock:
             if (
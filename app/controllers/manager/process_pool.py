@@ -0,0 +1,233 @@
+"""
+Task worker processes
+Tasks run in a fixed pool of worker processes instead of threads of the API
+process, so renders do not compete with the web server for the GIL, a hung
+task can be killed and a crash only takes its worker down.
+The workers send their state updates back, the API process writes them to
+the task state (sm.state), so every state backend works unchanged. Whisper
+jobs are sent back as well and run by the whisper workers of the API process.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from app.models import const
+from app.services import state as sm
+
+
+class _ForwardingState(sm.BaseState):
+    """
+    sm.state of a worker process: updates go to the API process.
+    """
+
+    def __init__(self, results):
+        self._results = results
+
+    def update_task(self, task_id: str, state: int = const.TASK_STATE_PROCESSING, progress: int = 0, **kwargs):
+        self._results.put(("state", task_id, {"state": state, "progress": progress, **kwargs}))
+
+    def get_task(self, task_id: str):
+        return None
+
+    def get_all_tasks(self, page: int, page_size: int):
+        return [], 0
+
+
+class _ForwardingWhisperPool:
+    """
+    whisper_pool of a worker process: a daemonic process cannot start the whisper
+    workers, the jobs are run by the pool of the API process.
+    """
+
+    started = True
+
+    def __init__(self, jobs, results):
+        self._jobs = jobs
+        self._results = results
+
+    def start(self):
+        pass
+
+    def transcribe(self, audio_file: str, timeout: float = 0) -> Optional[list]:
+        self._results.put(("whisper", audio_file, timeout))
+        # the worker runs a single task, the next item of its job queue is the answer
+        return self._jobs.get()
+
+    def stop(self):
+        pass
+
+
+def _worker_main(jobs, results):
+    from app.services import whisper_worker
+    from app.services.progress import progress_reporter
+
+    sm.state = _ForwardingState(results)
+    whisper_worker.whisper_pool = _ForwardingWhisperPool(jobs, results)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        func, args, kwargs = job
+        error = None
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            logger.exception(f"task failed: {func.__name__}")
+            error = str(e)
+        # coalesced updates still waiting in the reporter must not arrive after "done"
+        progress_reporter.flush()
+        results.put(("done", error))
+
+
+class _Worker:
+    def __init__(self):
+        context = multiprocessing.get_context("spawn")
+        self.jobs = context.Queue()
+        self.results = context.Queue()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(self.jobs, self.results),
+            name="task-worker",
+            daemon=True,
+        )
+        self.process.start()
+
+    def wait(self, deadline: float):
+        """
+        Next message from the worker, None if the deadline (0: none) passed or the worker died.
+        """
+        while not deadline or time.time() < deadline:
+            timeout = 1.0 if not deadline else min(1.0, max(0.01, deadline - time.time()))
+            try:
+                return self.results.get(timeout=timeout)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    # messages written just before the exit
+                    try:
+                        return self.results.get(timeout=0.1)
+                    except queue.Empty:
+                        return None
+        return None
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+
+class TaskProcessPool:
+    """
+    size worker processes, started on first use. run() blocks the calling
+    thread until the task finishes, fails, times out or is killed.
+    """
+
+    def __init__(self, size: int, task_timeout: float = 0):
+        self.size = size
+        self.task_timeout = task_timeout
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._started = 0
+        self._running = {}
+        self._killed = set()
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            if self._idle.empty() and self._started < self.size:
+                self._started += 1
+                return _Worker()
+        return self._idle.get()
+
+    def run(self, func: Callable, *args: Any, **kwargs: Any) -> bool:
+        """
+        True if the task completed, the task is marked as failed otherwise.
+        """
+        task_id = kwargs.get("task_id", "")
+        worker = self._acquire()
+        if not worker.process.is_alive():
+            worker = _Worker()
+        with self._lock:
+            self._running[task_id] = worker
+
+        start = time.time()
+        deadline = start + self.task_timeout if self.task_timeout > 0 else 0
+        error = None
+        killed = False
+        try:
+            worker.jobs.put((func, args, kwargs))
+            while True:
+                message = worker.wait(deadline)
+                if message is None:
+                    if worker.process.is_alive():
+                        error = f"task timed out after {self.task_timeout}s"
+                    elif task_id in self._killed:
+                        error = "task was killed"
+                    else:
+                        error = f"task worker exited with code {worker.process.exitcode}"
+                    worker.kill()
+                    worker = _Worker()
+                    break
+                if message[0] == "state":
+                    _, update_task_id, fields = message
+                    # updates still queued by a killed task would recreate it after its deletion,
+                    # updates of a previous task of the worker would overwrite its final state
+                    if update_task_id == task_id and update_task_id not in self._killed:
+                        sm.state.update_task(update_task_id, **fields)
+                    continue
+                if message[0] == "whisper":
+                    _, audio_file, timeout = message
+                    worker.jobs.put(self._transcribe(audio_file, timeout))
+                    continue
+                error = message[1]
+                break
+        finally:
+            with self._lock:
+                self._running.pop(task_id, None)
+                killed = task_id in self._killed
+                self._killed.discard(task_id)
+            self._idle.put(worker)
+
+        if error:
+            logger.error(f"task {task_id} failed after {time.time() - start:.1f}s: {error}")
+            # a task killed on purpose (deleted) is not brought back as a failed one
+            task = sm.state.get_task(task_id) if task_id and not killed else None
+            if task and task.get("state") != const.TASK_STATE_FAILED:
+                sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, progress=task.get("progress", 0), message=error)
+            return False
+        return True
+
+    @staticmethod
+    def _transcribe(audio_file: str, timeout: float) -> Optional[list]:
+        from app.services.whisper_worker import whisper_pool
+
+        try:
+            return whisper_pool.transcribe(audio_file, timeout)
+        except Exception as e:
+            logger.error(f"whisper job failed: {audio_file} => {str(e)}")
+            return None
+
+    def kill(self, task_id: str) -> bool:
+        """
+        Kill the worker running the task, it is replaced by a new one.
+        """
+        with self._lock:
+            worker: Optional[_Worker] = self._running.get(task_id)
+            if worker is None:
+                return False
+            self._killed.add(task_id)
+        logger.warning(f"killing task: {task_id}")
+        worker.process.kill()
+        return True
+
+    def stop(self):
+        with self._lock:
+            while self._started > 0 and not self._idle.empty():
+                worker = self._idle.get()
+                worker.jobs.put(None)
+                worker.process.join(timeout=5)
+                worker.kill()
+                self._started -= 1
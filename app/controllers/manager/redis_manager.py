@@ -14,9 +14,9 @@ FUNC_MAP = {
 
 
 class RedisTaskManager(TaskManager):
-    def __init__(self, max_concurrent_tasks: int, redis_url: str):
+    def __init__(self, max_concurrent_tasks: int, redis_url: str, executor: str = "thread", task_timeout: float = 0):
         self.redis_client = redis.Redis.from_url(redis_url)
-        super().__init__(max_concurrent_tasks)
+        super().__init__(max_concurrent_tasks, executor, task_timeout)
 
     def create_queue(self):
         return "task_queue"
@@ -4,7 +4,8 @@ import pathlib
 import shutil
 from typing import Union
 
-from fastapi import BackgroundTasks, Depends, Path, Request, UploadFile
+from fastapi import BackgroundTasks, Depends, Path, Request, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.params import File
 from fastapi.responses import FileResponse, StreamingResponse
 from loguru import logger
@@ -14,6 +15,7 @@ from app.controllers import base
 from app.controllers.manager.memory_manager import InMemoryTaskManager
 from app.controllers.manager.redis_manager import RedisTaskManager
 from app.controllers.v1.base import new_router
+from app.models import const
 from app.models.exception import HttpException
 from app.models.schema import (
     AudioRequest,
@@ -42,15 +44,24 @@ _redis_port = config.app.get("redis_port", 6379)
 _redis_db = config.app.get("redis_db", 0)
 _redis_password = config.app.get("redis_password", None)
 _max_concurrent_tasks = config.app.get("max_concurrent_tasks", 5)
+_task_executor = config.app.get("task_executor", "process")
+_task_timeout = float(config.app.get("task_timeout", 0))
 
 redis_url = f"redis://:{_redis_password}@{_redis_host}:{_redis_port}/{_redis_db}"
 # 根据配置选择合适的任务管理器
 if _enable_redis:
     task_manager = RedisTaskManager(
-        max_concurrent_tasks=_max_concurrent_tasks, redis_url=redis_url
+        max_concurrent_tasks=_max_concurrent_tasks,
+        redis_url=redis_url,
+        executor=_task_executor,
+        task_timeout=_task_timeout,
     )
 else:
-    task_manager = InMemoryTaskManager(max_concurrent_tasks=_max_concurrent_tasks)
+    task_manager = InMemoryTaskManager(
+        max_concurrent_tasks=_max_concurrent_tasks,
+        executor=_task_executor,
+        task_timeout=_task_timeout,
+    )
 
 
 @router.post("/videos", response_model=TaskResponse, summary="Generate a short video")
@@ -121,43 +132,119 @@ def get_task(
     task_id: str = Path(..., description="Task ID"),
     query: TaskQueryRequest = Depends(),
 ):
-    endpoint = config.app.get("endpoint", "")
-    if not endpoint:
-        endpoint = str(request.base_url)
-    endpoint = endpoint.rstrip("/")
+    endpoint = _endpoint(request.base_url)
 
     request_id = base.get_task_id(request)
     task = sm.state.get_task(task_id)
     if task:
-        task_dir = utils.task_dir()
-
-        def file_to_uri(file):
-            if not file.startswith(endpoint):
-                _uri_path = v.replace(task_dir, "tasks").replace("\\", "/")
-                _uri_path = f"{endpoint}/{_uri_path}"
-            else:
-                _uri_path = file
-            return _uri_path
-
-        if "videos" in task:
-            videos = task["videos"]
-            urls = []
-            for v in videos:
-                urls.append(file_to_uri(v))
-            task["videos"] = urls
-        if "combined_videos" in task:
-            combined_videos = task["combined_videos"]
-            urls = []
-            for v in combined_videos:
-                urls.append(file_to_uri(v))
-            task["combined_videos"] = urls
-        return utils.get_response(200, task)
+        return utils.get_response(200, _task_file_uris(task, endpoint))
 
     raise HttpException(
         task_id=task_id, status_code=404, message=f"{request_id}: task not found"
     )
 
 
+def _endpoint(base_url) -> str:
+    endpoint = config.app.get("endpoint", "")
+    if not endpoint:
+        endpoint = str(base_url)
+    return endpoint.rstrip("/")
+
+
+def _task_file_uris(task: dict, endpoint: str) -> dict:
+    """
+    Replace the local paths of the videos with download urls.
+    """
+    task_dir = utils.task_dir()
+
+    def file_to_uri(file):
+        if not file.startswith(endpoint):
+            _uri_path = file.replace(task_dir, "tasks").replace("\\", "/")
+            _uri_path = f"{endpoint}/{_uri_path}"
+        else:
+            _uri_path = file
+        return _uri_path
+
+    for key in ["videos", "combined_videos"]:
+        if isinstance(task.get(key), list):
+            task[key] = [file_to_uri(v) for v in task[key]]
+    return task
+
+
+# seconds without any update after which a keep-alive is sent
+_KEEP_ALIVE = 15
+
+
+async def _task_updates(task_id: str, endpoint: str):
+    """
+    Subscribe to a task: the current task, then the fields of every update
+    (None when there was no update for _KEEP_ALIVE seconds) until it finishes.
+    Returns None if the task does not exist.
+    """
+    subscription = await sm.state.subscribe(task_id)
+    # subscribed before reading the task, so no update is missed in between
+    task = await run_in_threadpool(sm.state.get_task, task_id)
+    if not task:
+        await subscription.close()
+        return None
+
+    async def updates():
+        try:
+            yield _task_file_uris(task, endpoint)
+            state = task.get("state")
+            while state == const.TASK_STATE_PROCESSING:
+                fields = await subscription.get(_KEEP_ALIVE)
+                if fields is not None:
+                    state = fields.get("state", state)
+                    fields = _task_file_uris(fields, endpoint)
+                yield fields
+        finally:
+            await subscription.close()
+
+    return updates()
+
+
+@router.get("/tasks/{task_id}/events", summary="Stream task progress (Server-Sent Events)")
+async def stream_task_events(request: Request, task_id: str = Path(..., description="Task ID")):
+    request_id = base.get_task_id(request)
+    updates = await _task_updates(task_id, _endpoint(request.base_url))
+    if updates is None:
+        raise HttpException(
+            task_id=task_id, status_code=404, message=f"{request_id}: task not found"
+        )
+
+    async def event_stream():
+        async for fields in updates:
+            if await request.is_disconnected():
+                break
+            if fields is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {sm.dumps(fields)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/tasks/{task_id}/ws")
+async def task_events_websocket(websocket: WebSocket, task_id: str):
+    await websocket.accept()
+    updates = await _task_updates(task_id, _endpoint(websocket.base_url))
+    if updates is None:
+        await websocket.close(code=1008, reason="task not found")
+        return
+    try:
+        async for fields in updates:
+            if fields is not None:
+                await websocket.send_text(sm.dumps(fields))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
 @router.delete(
     "/tasks/{task_id}",
     response_model=TaskDeletionResponse,
@@ -167,6 +254,8 @@ def delete_video(request: Request, task_id: str = Path(..., description="Task ID
     request_id = base.get_task_id(request)
     task = sm.state.get_task(task_id)
     if task:
+        # stop the render before its files are removed
+        task_manager.kill_task(task_id)
         tasks_dir = utils.task_dir()
         current_task_dir = os.path.join(tasks_dir, task_id)
         if os.path.exists(current_task_dir):
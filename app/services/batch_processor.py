@@ -25,6 +25,9 @@ class BatchVideoProcessor:
         self.current_video_title = ""
         self.results = []
         self.errors = []
+        # 배치 요청으로 미리 생성한 대본/키워드 {title: {"script": ..., "terms": [...]}}
+        self.prepared_scripts = {}
+        self.prepared_language = ""
         
     def get_status(self) -> Dict:
         """현재 처리 상태 반환"""
@@ -94,6 +97,21 @@ class BatchVideoProcessor:
                 except Exception as e:
                     logger.warning(f"YouTube authentication failed: {e}")
             
+            # 쇼츠 대본과 키워드를 제목별로 따로 요청하지 않고 몇 번의 배치 요청으로 생성
+            self.prepared_scripts = {}
+            self.prepared_language = video_params.get('language', 'ko-KR')
+            if video_params.get('video_type', 'shorts') == 'shorts':
+                try:
+                    self.prepared_scripts = await asyncio.to_thread(
+                        llm.generate_scripts_batch,
+                        video_titles,
+                        language=self.prepared_language,
+                        paragraph_number=1,
+                        terms_amount=10,
+                    )
+                except Exception as e:
+                    logger.warning(f"Batch script generation failed, generating one by one: {e}")
+            
             for i, title in enumerate(video_titles):
                 self.current_video_index = i + 1
                 self.current_video_title = title
@@ -214,10 +232,12 @@ class BatchVideoProcessor:
     async def _process_shorts_video(self, title: str, video_params: Dict, youtube_service=None) -> Dict:
         """쇼츠 영상 생성"""
         
-        # 대본 생성
-        script = llm.generate_script(
+        # 대본 생성 (같은 언어로 배치 생성된 대본이 있으면 사용)
+        language = video_params.get('language', 'ko-KR')
+        prepared = self.prepared_scripts.get(title, {}) if language == self.prepared_language else {}
+        script = prepared.get('script') or llm.generate_script(
             video_subject=title,
-            language=video_params.get('language', 'ko-KR'),
+            language=language,
             paragraph_number=1
         )
         
@@ -241,7 +261,7 @@ class BatchVideoProcessor:
                 # 제목과 설명 생성
                 video_title = title
                 description = f"AI가 생성한 쇼츠 영상입니다.\n\n주제: {title}"
-                tags = llm.generate_terms(title, script, 10)
+                tags = prepared.get('terms') or llm.generate_terms(title, script, 10)
                 
                 video_id = upload_video(
                     youtube=youtube_service,
@@ -0,0 +1,141 @@
+"""
+Font registry
+Indexes the fonts in resource/fonts and the known system CJK fonts once per
+process, resolves them by file name or by family/style, and hands out loaded
+fonts from the per-size cache of text_layout.
+"""
+
+import os
+import threading
+from typing import List, Optional
+
+from loguru import logger
+from PIL import ImageFont
+
+from app.services.utils import text_layout
+from app.utils import utils
+
+FONT_EXTENSIONS = (".ttf", ".ttc", ".otf")
+
+# system fonts with Korean glyphs, in order of preference
+SYSTEM_CJK_FONTS = [
+    "C:/Windows/Fonts/malgun.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/noto/NotoSansCJKsc-Regular.otf",
+]
+# bundled font of the title overlay and the timer videos
+TITLE_FONT = "NanumGothic-Bold.ttf"
+DEFAULT_FONT = "STHeitiMedium.ttc"
+
+
+class FontRegistry:
+    def __init__(self, font_dir: str = "", system_fonts: List[str] = None):
+        self._font_dir = font_dir
+        self._system_fonts = SYSTEM_CJK_FONTS if system_fonts is None else system_fonts
+        self._lock = threading.Lock()
+        self._entries: Optional[List[dict]] = None
+
+    def _describe(self, file_path: str, source: str) -> dict:
+        family, style = "", ""
+        try:
+            family, style = ImageFont.truetype(file_path, 10).getname()
+        except Exception as e:
+            logger.warning(f"failed to read font {file_path}: {e}")
+        return {
+            "path": file_path,
+            "file_name": os.path.basename(file_path),
+            "family": family or "",
+            "style": style or "",
+            "source": source,
+        }
+
+    def _scan(self) -> List[dict]:
+        entries = []
+        font_dir = self._font_dir or utils.font_dir()
+        for root, _, files in os.walk(font_dir):
+            for file in sorted(files):
+                if file.lower().endswith(FONT_EXTENSIONS):
+                    entries.append(self._describe(os.path.join(root, file), "resource"))
+        for file_path in self._system_fonts:
+            if os.path.isfile(file_path):
+                entries.append(self._describe(file_path, "system"))
+        return entries
+
+    def init(self) -> "FontRegistry":
+        """
+        Index the fonts, only the first call scans the disk.
+        """
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._scan()
+                    logger.info(f"font registry: {len(self._entries)} fonts indexed")
+        return self
+
+    def reload(self):
+        with self._lock:
+            self._entries = self._scan()
+
+    @property
+    def entries(self) -> List[dict]:
+        return self.init()._entries
+
+    def file_names(self) -> List[str]:
+        """
+        The fonts in resource/fonts, sorted, as offered in the WebUI.
+        """
+        return sorted(e["file_name"] for e in self.entries if e["source"] == "resource")
+
+    def path(self, file_name: str) -> str:
+        """
+        Path of a font in resource/fonts by file name, "" if it does not exist.
+        """
+        for e in self.entries:
+            if e["source"] == "resource" and e["file_name"] == file_name:
+                return e["path"]
+        return ""
+
+    def find(self, family: str, style: str = "") -> str:
+        """
+        Path of a font by family name (case insensitive), an exact style match is preferred.
+        """
+        family, style = family.lower(), style.lower()
+        candidates = [e for e in self.entries if e["family"].lower() == family]
+        for e in candidates:
+            if not style or e["style"].lower() == style:
+                return e["path"]
+        return candidates[0]["path"] if candidates else ""
+
+    def system_cjk_font(self) -> str:
+        """
+        The preferred system font with Korean glyphs, "" if none is installed.
+        """
+        paths = {e["path"] for e in self.entries if e["source"] == "system"}
+        for file_path in self._system_fonts:
+            if file_path in paths:
+                return file_path
+        return ""
+
+    def subtitle_font(self, font_name: str = "") -> str:
+        """
+        Subtitles use a system CJK font when there is one (to avoid squares for Korean text),
+        otherwise the chosen font of resource/fonts.
+        """
+        file_path = self.system_cjk_font()
+        if file_path:
+            return file_path
+        return self.path(font_name or DEFAULT_FONT) or os.path.join(self._font_dir or utils.font_dir(), font_name or DEFAULT_FONT)
+
+    def title_font(self) -> str:
+        """
+        The bundled title font, falling back to a system font.
+        """
+        return self.path(TITLE_FONT) or self.system_cjk_font()
+
+    def get_font(self, file_path: str, font_size: int) -> ImageFont.FreeTypeFont:
+        return text_layout.get_font(file_path, font_size)
+
+
+font_registry = FontRegistry()
@@ -0,0 +1,362 @@
+"""
+Local stock-footage library
+Indexes every clip in storage/cache_videos and storage/local_videos so that
+video_source="library" can be served without any network request.
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Dict, List
+
+import numpy as np
+from loguru import logger
+from moviepy.video.io.VideoFileClip import VideoFileClip
+
+from app.config import config
+from app.models import const
+from app.models.schema import MaterialInfo, VideoAspect
+from app.services import material
+from app.services.utils import embedding
+from app.services.utils import fingerprint as fp
+from app.utils import utils
+
+INDEX_VERSION = 1
+# Minimum cosine similarity between a search term and a clip tag.
+# With the hashed n-gram embedding, unrelated words that only share a suffix
+# ("station"/"nation", "motion"/"promotion") score up to ~0.6, while spelling
+# variants of a tag ("wave"/"waves", "chessboard"/"chess board") score above 0.7.
+# Set material_match_threshold to tune it for a semantic embedding model.
+MATCH_THRESHOLD = 0.65
+
+
+def _tokenize(text: str) -> List[str]:
+    return [t for t in re.split(r"[^\w]+", text.lower()) if len(t) > 1]
+
+
+def library_dirs() -> List[str]:
+    dirs = [
+        utils.storage_dir("cache_videos"),
+        utils.storage_dir("local_videos"),
+    ]
+    material_directory = config.app.get("material_directory", "").strip()
+    if material_directory and material_directory != "task" and os.path.isdir(material_directory):
+        dirs.append(material_directory)
+
+    result = []
+    for d in dirs:
+        d = os.path.realpath(d)
+        if d not in result:
+            result.append(d)
+    return result
+
+
+class MaterialLibrary:
+    def __init__(self, index_file: str = "", dirs: List[str] = None):
+        self.index_file = index_file or os.path.join(utils.storage_dir(), "library_index.json")
+        self.vectors_file = f"{os.path.splitext(self.index_file)[0]}.npz"
+        self._dirs = dirs
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._tags: Dict[str, set] = {}
+        # one row per (clip, tag), rows of a clip are replaced when its tags change
+        self._vectors = None
+        self._vector_paths: List[str] = []
+        self._vector_tags: List[str] = []
+        self._vector_model = ""
+        self._loaded = False
+
+    def dirs(self) -> List[str]:
+        return self._dirs if self._dirs is not None else library_dirs()
+
+    def _load(self):
+        self._loaded = True
+        if not os.path.isfile(self.index_file):
+            return
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._entries = data.get("entries", {})
+        except Exception as e:
+            logger.warning(f"invalid library index: {self.index_file} => {str(e)}")
+            self._entries = {}
+
+        if not os.path.isfile(self.vectors_file):
+            return
+        try:
+            with np.load(self.vectors_file) as data:
+                self._vectors = data["vectors"]
+                self._vector_paths = data["paths"].tolist()
+                self._vector_tags = data["tags"].tolist()
+                self._vector_model = str(data["model"])
+        except Exception as e:
+            logger.warning(f"invalid library vectors: {self.vectors_file} => {str(e)}")
+            self._vectors = None
+
+    def _save(self):
+        temp_file = f"{self.index_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "entries": self._entries}, f, ensure_ascii=False)
+        os.replace(temp_file, self.index_file)
+
+        if self._vectors is None:
+            return
+        temp_file = f"{self.vectors_file}.tmp.npz"
+        np.savez(
+            temp_file,
+            vectors=self._vectors,
+            paths=np.array(self._vector_paths, dtype=str),
+            tags=np.array(self._vector_tags, dtype=str),
+            model=np.array(self._vector_model),
+        )
+        os.replace(temp_file, self.vectors_file)
+
+    def _rebuild_tags(self):
+        tags = {}
+        for path, entry in self._entries.items():
+            for tag in entry.get("tags", []):
+                for token in _tokenize(tag):
+                    tags.setdefault(token, set()).add(path)
+        self._tags = tags
+
+    def _sync_vectors(self) -> bool:
+        # embed only the tags that are not in the index yet (incremental add)
+        model = embedding.model_name()
+        if self._vectors is None or self._vector_model != model:
+            self._vectors = None
+            self._vector_paths, self._vector_tags = [], []
+            self._vector_model = model
+
+        wanted = {(path, tag) for path, entry in self._entries.items() for tag in entry.get("tags", [])}
+        existing = set(zip(self._vector_paths, self._vector_tags))
+        keep = [i for i, row in enumerate(zip(self._vector_paths, self._vector_tags)) if row in wanted]
+        missing = sorted(wanted - existing)
+        if len(keep) == len(self._vector_paths) and not missing:
+            return False
+
+        vectors = self._vectors[keep] if self._vectors is not None else None
+        paths = [self._vector_paths[i] for i in keep]
+        tags = [self._vector_tags[i] for i in keep]
+        if missing:
+            new_vectors = embedding.embed([tag for _, tag in missing])
+            vectors = new_vectors if vectors is None or not len(vectors) else np.vstack([vectors, new_vectors])
+            paths += [path for path, _ in missing]
+            tags += [tag for _, tag in missing]
+
+        self._vectors, self._vector_paths, self._vector_tags = vectors, paths, tags
+        return True
+
+    def _build_entry(self, path: str, stat) -> dict:
+        meta = material.load_material_meta(path)
+        tags = list(meta.get("search_terms", []))
+        if not meta:
+            # user provided files: use the file name as tags, e.g. "city_night-traffic.mp4"
+            name = os.path.splitext(os.path.basename(path))[0]
+            tags.append(" ".join(_tokenize(name)))
+
+        clip = VideoFileClip(path, audio=False)
+        try:
+            duration = clip.duration
+            width, height = clip.size
+        finally:
+            clip.close()
+
+        fingerprint = meta.get("fingerprint") or fp.compute_video_fingerprint(path)
+        return {
+            "path": path,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "duration": duration,
+            "width": width,
+            "height": height,
+            "tags": tags,
+            "fingerprint": fingerprint,
+            "provider": meta.get("provider", "local"),
+        }
+
+    def refresh(self) -> int:
+        """
+        Synchronize the index with the library directories.
+        Only new or modified files are probed, so this is cheap when nothing changed.
+        Returns the number of indexed clips.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            seen = set()
+            changed = False
+            for d in self.dirs():
+                if not os.path.isdir(d):
+                    continue
+                for entry in os.scandir(d):
+                    if not entry.is_file():
+                        continue
+                    if utils.parse_extension(entry.name) not in const.FILE_TYPE_VIDEOS:
+                        continue
+                    path = entry.path
+                    seen.add(path)
+                    stat = entry.stat()
+                    old = self._entries.get(path)
+                    meta_file = f"{os.path.splitext(path)[0]}.json"
+                    meta_mtime = os.path.getmtime(meta_file) if os.path.isfile(meta_file) else 0
+                    if (
+                        old
+                        and old.get("mtime") == stat.st_mtime
+                        and old.get("size") == stat.st_size
+                        and old.get("meta_mtime", 0) == meta_mtime
+                    ):
+                        continue
+                    try:
+                        new_entry = self._build_entry(path, stat)
+                        new_entry["meta_mtime"] = meta_mtime
+                        self._entries[path] = new_entry
+                        changed = True
+                    except Exception as e:
+                        logger.warning(f"failed to index video: {path} => {str(e)}")
+
+            for path in list(self._entries.keys()):
+                if path not in seen:
+                    del self._entries[path]
+                    changed = True
+
+            if changed or not self._tags:
+                self._rebuild_tags()
+            try:
+                changed = self._sync_vectors() or changed
+            except Exception as e:
+                logger.warning(f"failed to embed library tags: {str(e)}")
+            if changed:
+                try:
+                    self._save()
+                except Exception as e:
+                    logger.warning(f"failed to save library index: {str(e)}")
+                logger.info(f"library index updated: {len(self._entries)} clips")
+            return len(self._entries)
+
+    def refresh_in_background(self) -> threading.Thread:
+        """
+        Run refresh() in a daemon thread, so that probing a large library does not
+        delay the first task. select_materials() waits for it through the lock.
+        """
+        thread = threading.Thread(target=self.refresh, name="library-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    def search(
+        self,
+        search_term: str,
+        minimum_duration: int = 0,
+        video_aspect: VideoAspect = VideoAspect.portrait,
+    ) -> List[MaterialInfo]:
+        """
+        Keyword/tag lookup, best matches first.
+        Clips are scored by the share of the search term's words found in their tags
+        and by the embedding similarity between the search term and their tags.
+        The built-in hashed embedding only compares spellings, so "ocean wave" finds
+        a clip downloaded for "ocean waves"; synonyms ("sea" for "ocean") are only
+        matched with a semantic model (material_embedding_model).
+        Clips with the requested orientation rank above others.
+        """
+        tokens = _tokenize(search_term)
+        if not tokens:
+            return []
+
+        video_width, video_height = VideoAspect(video_aspect).to_resolution()
+        target_portrait = video_height > video_width
+
+        with self._lock:
+            scores = {}
+            for token in tokens:
+                for path in self._tags.get(token, ()):
+                    scores[path] = scores.get(path, 0) + 1 / len(tokens)
+
+            if self._vectors is not None and len(self._vectors):
+                try:
+                    query = embedding.embed([search_term])[0]
+                    similarities = self._vectors @ query
+                    threshold = float(config.app.get("material_match_threshold", MATCH_THRESHOLD))
+                    for i in np.flatnonzero(similarities >= threshold):
+                        path = self._vector_paths[i]
+                        scores[path] = max(scores.get(path, 0), float(similarities[i]))
+                except Exception as e:
+                    logger.warning(f"failed to embed search term: {search_term} => {str(e)}")
+
+            ranked = []
+            for path, score in scores.items():
+                entry = self._entries.get(path)
+                if not entry or entry["duration"] < minimum_duration:
+                    continue
+                same_orientation = (entry["height"] > entry["width"]) == target_portrait
+                ranked.append((score, same_orientation, entry))
+
+        ranked.sort(key=lambda r: (r[0], r[1]), reverse=True)
+        items = []
+        for _, _, entry in ranked:
+            item = MaterialInfo()
+            item.provider = "library"
+            item.url = entry["path"]
+            item.duration = int(entry["duration"])
+            items.append(item)
+        return items
+
+    def get_fingerprint(self, path: str) -> str:
+        with self._lock:
+            entry = self._entries.get(path)
+            return entry.get("fingerprint", "") if entry else ""
+
+    def select_videos(
+        self,
+        search_terms: List[str],
+        video_aspect: VideoAspect = VideoAspect.portrait,
+        audio_duration: float = 0.0,
+        max_clip_duration: int = 5,
+    ) -> List[str]:
+        """
+        Pick clips from the library for the given search terms until the audio is covered,
+        skipping near-duplicate footage.
+        """
+        video_paths, _, _ = self.select_materials(
+            search_terms, video_aspect, audio_duration, max_clip_duration
+        )
+        return video_paths
+
+    def select_materials(
+        self,
+        search_terms: List[str],
+        video_aspect: VideoAspect = VideoAspect.portrait,
+        audio_duration: float = 0.0,
+        max_clip_duration: int = 5,
+    ):
+        """
+        Same as select_videos, returns (video_paths, fingerprints, total_duration).
+        """
+        self.refresh()
+
+        video_paths = []
+        fingerprints = []
+        total_duration = 0.0
+        for search_term in search_terms:
+            items = self.search(search_term, max_clip_duration, video_aspect)
+            logger.info(f"library: found {len(items)} videos for '{search_term}'")
+            for item in items:
+                if item.url in video_paths:
+                    continue
+                fingerprint = self.get_fingerprint(item.url)
+                if fp.is_near_duplicate(fingerprint, fingerprints):
+                    continue
+                video_paths.append(item.url)
+                fingerprints.append(fingerprint)
+                total_duration += min(max_clip_duration, item.duration)
+            if total_duration > audio_duration:
+                break
+
+        logger.info(
+            f"library: selected {len(video_paths)} videos, duration: {total_duration}s, required: {audio_duration}s"
+        )
+        return video_paths, fingerprints, total_duration
+
+
+library = MaterialLibrary()
@@ -1,83 +1,392 @@
+import concurrent.futures
+import hashlib
 import json
 import logging
+import os
 import re
+import threading
+import time
 from collections import Counter
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 from loguru import logger
 from openai import AzureOpenAI, OpenAI
 
 from app.config import config
+from app.utils import utils
 
 _max_retries = 3
 
-def _generate_response(prompt: str) -> str:
-    config.reload()
-    
-    content = ""
+# Default lifetime of a cached LLM response, in seconds (7 days)
+_cache_ttl = 7 * 24 * 3600
+
+
+def _cache_key(llm_provider: str, model_name: str, prompt: str) -> str:
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return utils.md5(f"{llm_provider}|{model_name}|{prompt_hash}")
+
+
+def _cache_file(key: str) -> str:
+    return os.path.join(utils.storage_dir("llm_cache", create=True), f"{key}.json")
+
+
+def _load_cached_response(key: str, ttl: int) -> str:
+    cache_file = _cache_file(key)
+    if not os.path.isfile(cache_file):
+        return ""
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if time.time() - data.get("created", 0) > ttl:
+            os.remove(cache_file)
+            return ""
+        return data.get("response", "")
+    except Exception as e:
+        logger.warning(f"invalid llm cache file: {cache_file} => {str(e)}")
+        return ""
+
+
+def _save_cached_response(key: str, response: str):
+    cache_file = _cache_file(key)
+    temp_file = f"{cache_file}.{utils.get_uuid(True)}.tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "response": response}, f, ensure_ascii=False)
+        os.replace(temp_file, cache_file)
+    except Exception as e:
+        logger.warning(f"failed to save llm cache file: {cache_file} => {str(e)}")
+
+
+_last_prune = 0.0
+# the cache directory is scanned at most once per interval (seconds)
+_prune_interval = 3600
+
+
+def prune_llm_cache(max_age: float = None, max_size_mb: float = None) -> int:
+    """
+    Delete the cached responses older than max_age seconds (llm_cache_ttl), then the
+    oldest ones until storage/llm_cache is below max_size_mb (0 disables a limit).
+    Expired entries are otherwise only deleted when the same prompt is asked again.
+    Returns the number of deleted files.
+    """
+    if max_age is None:
+        max_age = float(config.app.get("llm_cache_ttl", _cache_ttl))
+    if max_size_mb is None:
+        max_size_mb = float(config.app.get("llm_cache_max_size_mb", 100))
+    cache_dir = utils.storage_dir("llm_cache")
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    files = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(".json"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    # oldest first
+    files.sort()
+
+    now = time.time()
+    total_size = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, file_path in files:
+        expired = max_age > 0 and now - mtime > max_age
+        too_large = max_size_mb > 0 and total_size > max_size_mb * 1024 * 1024
+        if not expired and not too_large:
+            break
+        try:
+            os.remove(file_path)
+            total_size -= size
+            removed += 1
+        except OSError as e:
+            logger.warning(f"failed to delete llm cache file: {file_path} => {str(e)}")
+    if removed:
+        logger.info(f"llm cache pruned: {removed} files deleted")
+    return removed
+
+
+def _prune_llm_cache_periodically():
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < _prune_interval:
+        return
+    _last_prune = now
+    try:
+        prune_llm_cache()
+    except Exception as e:
+        logger.warning(f"failed to prune llm cache: {str(e)}")
+
+
+# Long-lived clients keyed by (provider, api key, base url), each keeps its own
+# HTTP connection pool so consecutive calls reuse connections and TLS sessions
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(llm_provider: str, api_key: str, base_url: str = None, api_version: str = None):
+    key = (llm_provider, api_key, base_url, api_version)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            if llm_provider == "azure":
+                client = AzureOpenAI(
+                    api_key=api_key, api_version=api_version, azure_endpoint=base_url
+                )
+            else:
+                client = OpenAI(api_key=api_key, base_url=base_url)
+            _clients[key] = client
+            logger.debug(f"created llm client: {llm_provider}, base_url: {base_url}")
+        return client
+
+
+def _get_gemini_model(api_key: str, model_name: str):
+    key = ("gemini", api_key, model_name)
+    model = _clients.get(key)
+    if model is not None:
+        return model
+    import google.generativeai as genai
+    from google.generativeai import client as genai_client
+
+    with _clients_lock:
+        model = _clients.get(key)
+        if model is None:
+            # genai.configure is process-wide, bind the model to the client of
+            # its own key right away so other keys configured later do not leak in
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+            model._client = genai_client.get_default_generative_client()
+            _clients[key] = model
+        return model
+
+
+def _generate_response(prompt: str, use_cache: bool = True, cache_ttl: Optional[int] = None) -> str:
+    """
+    Generate a response with the configured llm provider.
+    Responses are cached on disk by (provider, model, prompt), pass use_cache=False
+    for creative prompts that should produce a different answer on every call.
+    """
+    config.reload_if_changed()
+
+    llm_provider = config.app.get("llm_provider", "gemini")
+    use_cache = use_cache and config.app.get("llm_cache_enabled", True)
+    if not use_cache:
+        return _request_response(prompt)
+
+    model_name = config.app.get(f"{llm_provider}_model_name", "")
+    key = _cache_key(llm_provider, model_name, prompt)
+    ttl = cache_ttl if cache_ttl is not None else config.app.get("llm_cache_ttl", _cache_ttl)
+    response = _load_cached_response(key, ttl)
+    if response:
+        logger.info(f"llm cache hit: {key}")
+        return response
+
+    response, answered_by = _answer(prompt)
+    # an answer of the hedge or fallback provider is not cached as the configured provider's
+    if response and answered_by == llm_provider:
+        _save_cached_response(key, response)
+        _prune_llm_cache_periodically()
+    return response
+
+
+_quota_errors = ["429", "Quota exceeded", "Resource has been exhausted", "RESOURCE_EXHAUSTED"]
+
+
+def _is_quota_error(e: Exception) -> bool:
+    return any(err in str(e) for err in _quota_errors)
+
+
+def _get_retry_delay(e: Exception) -> Optional[float]:
+    # "Please retry in 23.4s" or "retry_delay { seconds: 23 }"
+    match = re.search(r"retry in (\d+(?:\.\d+)?)s|retry_delay\s*\{\s*seconds:\s*(\d+)", str(e))
+    if not match:
+        return None
+    return float(match.group(1) or match.group(2))
+
+
+class KeyScheduler:
+    """
+    Schedules API keys and models across calls.
+    Keys are used round-robin, a key that hits its quota is skipped until its
+    cool-down ends (doubling on every consecutive quota error), and a model that
+    does not exist is skipped for an hour, so later calls do not rediscover them.
+    """
+
+    def __init__(self, cooldown: float = 60, max_cooldown: float = 3600):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._next = 0
+        self._cooldown_until = {}
+        self._quota_errors = {}
+        self._model_unavailable_until = {}
+
+    def schedule(self, keys: list) -> list:
+        """
+        Returns the (key_num, api_key) pairs that are not cooling down, in the order to try them.
+        """
+        now = time.time()
+        with self._lock:
+            healthy = [k for k in keys if self._cooldown_until.get(k[1], 0) <= now]
+            if not healthy:
+                return []
+            start = self._next % len(healthy)
+            self._next += 1
+            return healthy[start:] + healthy[:start]
+
+    def report_success(self, api_key: str):
+        with self._lock:
+            self._quota_errors.pop(api_key, None)
+            self._cooldown_until.pop(api_key, None)
+
+    def report_quota_exceeded(self, api_key: str, retry_delay: Optional[float] = None):
+        with self._lock:
+            errors = self._quota_errors.get(api_key, 0) + 1
+            self._quota_errors[api_key] = errors
+            cooldown = retry_delay or min(self.cooldown * 2 ** (errors - 1), self.max_cooldown)
+            self._cooldown_until[api_key] = time.time() + cooldown
+        return cooldown
+
+    def model_available(self, model_name: str) -> bool:
+        with self._lock:
+            return self._model_unavailable_until.get(model_name, 0) <= time.time()
+
+    def report_model_unavailable(self, model_name: str):
+        with self._lock:
+            self._model_unavailable_until[model_name] = time.time() + 3600
+
+
+_gemini_scheduler = KeyScheduler()
+
+
+def _request_gemini(prompt: str) -> str:
+    # Collect all available Gemini API keys (up to 5 keys)
+    gemini_keys = []
+    for i in range(1, 6):  # gemini_api_key, gemini_api_key_2, ..., gemini_api_key_5
+        if i == 1:
+            key = config.app.get("gemini_api_key")
+        else:
+            key = config.app.get(f"gemini_api_key_{i}")
+        if key:
+            gemini_keys.append((i, key))
+
+    if not gemini_keys:
+        logger.error("No Gemini API keys configured")
+        raise Exception("No Gemini API keys available")
+
+    _gemini_scheduler.cooldown = config.app.get("gemini_key_cooldown", 60)
+    scheduled_keys = _gemini_scheduler.schedule(gemini_keys)
+    logger.info(f"Found {len(gemini_keys)} Gemini API keys, {len(scheduled_keys)} available for rotation")
+
+    model_name = config.app.get("gemini_model_name", "gemini-2.5-flash")
+    models_to_try = [
+        model_name.strip(),
+        "gemini-2.5-flash",
+        "gemini-flash-latest",
+        "gemini-2.0-flash",
+        "gemini-2.0-flash-exp",
+    ]
+    models_to_try = list(dict.fromkeys(models_to_try))
+
+    last_error = None
+    for key_num, api_key in scheduled_keys:
+        for m in models_to_try:
+            if not _gemini_scheduler.model_available(m):
+                continue
+            try:
+                logger.info(f"Using Gemini model: {m} with API key #{key_num}")
+                model = _get_gemini_model(api_key, m)
+                response = model.generate_content(prompt)
+                if response and getattr(response, "text", None):
+                    logger.success(f"✅ Success with API key #{key_num} and model {m}")
+                    _gemini_scheduler.report_success(api_key)
+                    return response.text
+            except Exception as e_try:
+                last_error = e_try
+                logger.warning(f"Gemini model {m} failed with key #{key_num}: {e_try}")
+                if _is_quota_error(e_try):
+                    cooldown = _gemini_scheduler.report_quota_exceeded(api_key, _get_retry_delay(e_try))
+                    logger.warning(f"🚫 API key #{key_num} quota exceeded, cooling down for {cooldown:.0f}s")
+                    break
+                if "404" in str(e_try) or "not found" in str(e_try).lower():
+                    _gemini_scheduler.report_model_unavailable(m)
+
+    if last_error:
+        raise last_error
+    raise Exception("All Gemini API keys are cooling down")
+
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _hedged_request(primary, secondary, delay: float) -> Tuple[str, bool]:
+    """
+    Run primary, and if it has not finished after `delay` seconds also run secondary.
+    Returns the first non-empty response and whether secondary gave it.
+    """
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=8, thread_name_prefix="llm-hedge"
+            )
+
+    futures = [_hedge_executor.submit(primary)]
+    done, _ = concurrent.futures.wait(futures, timeout=delay)
+    if not done:
+        logger.info(f"llm response is slower than {delay}s, sending a hedged request")
+        futures.append(_hedge_executor.submit(secondary))
+
+    last_error = None
+    for future in concurrent.futures.as_completed(futures):
+        try:
+            response = future.result()
+            if response:
+                return response, future is not futures[0]
+        except Exception as e:
+            last_error = e
+    if last_error:
+        raise last_error
+    return "", False
+
+
+def _request_response(prompt: str) -> str:
+    return _answer(prompt)[0]
+
+
+def _answer(prompt: str) -> Tuple[str, str]:
+    """
+    (response, provider that answered it)
+    """
     llm_provider = config.app.get("llm_provider", "gemini")
     logger.info(f"llm provider: {llm_provider}")
-    
+
     # Multi-API key rotation for better quota management
     if llm_provider == "gemini":
-        # Collect all available Gemini API keys (up to 5 keys)
-        gemini_keys = []
-        for i in range(1, 6):  # gemini_api_key, gemini_api_key_2, ..., gemini_api_key_5
-            if i == 1:
-                key = config.app.get("gemini_api_key")
-            else:
-                key = config.app.get(f"gemini_api_key_{i}")
-            if key:
-                gemini_keys.append((i, key))
-        
-        if not gemini_keys:
-            logger.error("No Gemini API keys configured")
-            raise Exception("No Gemini API keys available")
-        
-        logger.info(f"Found {len(gemini_keys)} Gemini API keys for rotation")
-        
-        # Try each key until one works
-        for key_num, api_key in gemini_keys:
-            try:
-                logger.info(f"Trying Gemini API key #{key_num} ({len(gemini_keys)} total)")
-                import google.generativeai as genai
-                genai.configure(api_key=api_key)
-                
-                model_name = config.app.get("gemini_model_name", "gemini-2.5-flash")
-                target_model = model_name.strip()
-                models_to_try = [
-                    target_model,
-                    "gemini-2.5-flash",
-                    "gemini-flash-latest",
-                    "gemini-2.0-flash",
-                    "gemini-2.0-flash-exp",
-                ]
-                
-                for m in models_to_try:
-                    try:
-                        logger.info(f"Using Gemini model: {m} with API key #{key_num}")
-                        model = genai.GenerativeModel(m)
-                        response = model.generate_content(prompt)
-                        if response and getattr(response, "text", None):
-                            logger.success(f"✅ Success with API key #{key_num} and model {m}")
-                            return response.text
-                    except Exception as e_try:
-                        logger.warning(f"Gemini model {m} failed with key #{key_num}: {e_try}")
-                        if "429" in str(e_try) or "Quota exceeded" in str(e_try) or "Resource has been exhausted" in str(e_try) or "RESOURCE_EXHAUSTED" in str(e_try):
-                            logger.warning(f"🚫 API key #{key_num} quota exceeded, trying next key...")
-                            break
-                        continue
-                        
-            except Exception as e:
-                logger.warning(f"❌ Gemini API key #{key_num} failed: {e}")
-                if "429" in str(e) or "Quota exceeded" in str(e) or "Resource has been exhausted" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
-                    logger.warning(f"🚫 API key #{key_num} quota exceeded")
-                continue
-        
+        hedge_provider = config.app.get("llm_hedge_provider", "").strip()
+        hedge_delay = float(config.app.get("llm_hedge_delay", 0))
+        try:
+            if hedge_provider and hedge_provider != "gemini" and hedge_delay > 0:
+                response, hedged = _hedged_request(
+                    lambda: _request_gemini(prompt),
+                    lambda: _request_provider(hedge_provider, prompt),
+                    hedge_delay,
+                )
+                return response, hedge_provider if hedged else llm_provider
+            return _request_gemini(prompt), llm_provider
+        except Exception as e:
+            logger.warning(f"Gemini request failed: {e}")
+
         # If all Gemini keys fail, fall back to DeepSeek
         logger.error("❌ All Gemini API keys failed or quota exceeded, falling back to DeepSeek")
-        llm_provider = "deepseek"
-    
+        return _request_provider("deepseek", prompt), "deepseek"
+
+    return _request_provider(llm_provider, prompt), llm_provider
+
+
+def _request_provider(llm_provider: str, prompt: str) -> str:
     # Remove the redirect to gemini for g4f
     if llm_provider in ["pollinations", "free"]:
         llm_provider = "gemini"
@@ -89,7 +398,7 @@ def _generate_response(prompt: str) -> str:
         model_name = config.app.get(f"{llm_provider}_model_name")
         
         if llm_provider == "openai":
-            client = OpenAI(api_key=api_key, base_url=base_url)
+            client = _get_client(llm_provider, api_key, base_url)
             response = client.chat.completions.create(
                 model=model_name or "gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}]
@@ -97,7 +406,7 @@ def _generate_response(prompt: str) -> str:
             return response.choices[0].message.content
             
         elif llm_provider == "moonshot":
-            client = OpenAI(api_key=api_key, base_url="https://api.moonshot.cn/v1")
+            client = _get_client(llm_provider, api_key, "https://api.moonshot.cn/v1")
             response = client.chat.completions.create(
                 model=model_name or "moonshot-v1-8k",
                 messages=[{"role": "user", "content": prompt}]
@@ -105,11 +414,7 @@ def _generate_response(prompt: str) -> str:
             return response.choices[0].message.content
             
         elif llm_provider == "azure":
-            client = AzureOpenAI(
-                api_key=api_key,
-                api_version="2024-02-15-preview",
-                azure_endpoint=base_url
-            )
+            client = _get_client(llm_provider, api_key, base_url, "2024-02-15-preview")
             response = client.chat.completions.create(
                 model=model_name,
                 messages=[{"role": "user", "content": prompt}]
@@ -119,8 +424,7 @@ def _generate_response(prompt: str) -> str:
         elif llm_provider == "gemini":
             try:
                 import google.generativeai as genai
-                genai.configure(api_key=api_key)
-                
+
                 target_model = (model_name or "gemini-2.5-flash").strip()
                 models_to_try = [
                     target_model,
@@ -134,7 +438,7 @@ def _generate_response(prompt: str) -> str:
                 for m in models_to_try:
                     try:
                         logger.info(f"Using Gemini model: {m}")
-                        model = genai.GenerativeModel(m)
+                        model = _get_gemini_model(api_key, m)
                         response = model.generate_content(prompt)
                         if response and getattr(response, "text", None):
                             return response.text
@@ -148,6 +452,8 @@ def _generate_response(prompt: str) -> str:
                 
                 try:
                     logger.info("Listing available Gemini models to auto-correct...")
+                    with _clients_lock:
+                        genai.configure(api_key=api_key)
                     available = []
                     for m in genai.list_models():
                         if 'generateContent' in m.supported_generation_methods:
@@ -168,7 +474,7 @@ def _generate_response(prompt: str) -> str:
              if not base_url and llm_provider == "ollama":
                  base_url = "http://localhost:11434/v1"
              
-             client = OpenAI(api_key=api_key or "dummy", base_url=base_url)
+             client = _get_client(llm_provider, api_key or "dummy", base_url)
              response = client.chat.completions.create(
                 model=model_name or "gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}]
@@ -219,7 +525,83 @@ def _generate_response(prompt: str) -> str:
         
     return ""
 
-def generate_script(video_subject: str, language: str = "auto", paragraph_number: int = 1) -> str:
+_openai_compatible_providers = [
+    "openai", "moonshot", "azure", "deepseek", "qwen", "ollama", "oneapi", "cloudflare", "ernie", "modelscope"
+]
+
+
+def _stream_response(prompt: str) -> Iterator[str]:
+    """
+    Stream the response of the configured llm provider as text chunks.
+    Providers without streaming support (and any error before the first chunk)
+    fall back to a single chunk with the full response.
+    """
+    config.reload_if_changed()
+    llm_provider = config.app.get("llm_provider", "gemini")
+    api_key = None
+    streamed = False
+    try:
+        if llm_provider == "gemini":
+            gemini_keys = [(1, config.app.get("gemini_api_key"))] + [
+                (i, config.app.get(f"gemini_api_key_{i}")) for i in range(2, 6)
+            ]
+            scheduled_keys = _gemini_scheduler.schedule([k for k in gemini_keys if k[1]])
+            if scheduled_keys:
+                key_num, api_key = scheduled_keys[0]
+                model_name = config.app.get("gemini_model_name", "gemini-2.5-flash").strip()
+                logger.info(f"streaming Gemini model: {model_name} with API key #{key_num}")
+                model = _get_gemini_model(api_key, model_name)
+                for chunk in model.generate_content(prompt, stream=True):
+                    text = getattr(chunk, "text", "")
+                    if text:
+                        streamed = True
+                        yield text
+                _gemini_scheduler.report_success(api_key)
+                if streamed:
+                    return
+
+        elif llm_provider in _openai_compatible_providers:
+            api_key = config.app.get(f"{llm_provider}_api_key")
+            base_url = config.app.get(f"{llm_provider}_base_url")
+            model_name = config.app.get(f"{llm_provider}_model_name")
+            api_version = None
+            if llm_provider == "moonshot":
+                base_url = "https://api.moonshot.cn/v1"
+            elif llm_provider == "azure":
+                api_version = "2024-02-15-preview"
+            elif llm_provider == "ollama" and not base_url:
+                base_url = "http://localhost:11434/v1"
+            client = _get_client(llm_provider, api_key or "dummy", base_url, api_version)
+            logger.info(f"streaming llm provider: {llm_provider}, model: {model_name}")
+            stream = client.chat.completions.create(
+                model=model_name or "gpt-3.5-turbo",
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            )
+            for event in stream:
+                delta = event.choices[0].delta.content if event.choices else None
+                if delta:
+                    streamed = True
+                    yield delta
+            if streamed:
+                return
+    except Exception as e:
+        if streamed:
+            raise
+        if llm_provider == "gemini" and api_key and _is_quota_error(e):
+            _gemini_scheduler.report_quota_exceeded(api_key, _get_retry_delay(e))
+        logger.warning(f"failed to stream llm response, falling back to a single request: {e}")
+
+    response = _request_response(prompt)
+    if response:
+        yield response
+
+
+def _script_requirements(language: str = "auto", paragraph_number: int = 1) -> dict:
+    """
+    Requirements of a script, shared by the single (generate_script) and the
+    batch (generate_scripts_batch) prompts so both produce the same kind of script.
+    """
     # 언어별 프롬프트 설정
     if language == "ko-KR" or language == "auto":
         # paragraph_number에 따른 대본 길이 동적 설정
@@ -232,13 +614,8 @@ def generate_script(video_subject: str, language: str = "auto", paragraph_number
         else:
             length_description = "총 길이는 30-60초 분량 (약 150-200자)"
             detail_instruction = "각 문단은 2-3문장으로 작성"
-        
-        prompt = f"""
-        주제 '{video_subject}'에 대한 유튜브 쇼츠용 대본을 작성해주세요.
 
-        ⚠️ 중요: 반드시 아래 길이 요구사항을 준수해주세요!
-
-        요구사항:
+        requirements = f"""
         1. {paragraph_number}개의 문단으로 구성
         2. {detail_instruction}
         3. {length_description}
@@ -250,16 +627,9 @@ def generate_script(video_subject: str, language: str = "auto", paragraph_number
         9. 마크다운 형식(**, ##, - 등) 사용 금지
         10. 장면 설명([장면 1] 등) 사용 금지
         11. 순수한 텍스트만 작성
-        12. ⚠️ 너무 짧게 작성하지 말고 충분한 길이로 작성할 것
-
-        스타일: 직접적이고 임팩트 있게, 인사말 없이 바로 핵심 내용으로 시작
-
-        주제: {video_subject}
-
-        ⚠️ 다시 한번 강조: {length_description}에 맞게 충분히 길게 작성해주세요!
-
-        대본을 작성해주세요:
-        """
+        12. ⚠️ 너무 짧게 작성하지 말고 충분한 길이로 작성할 것"""
+        style = "스타일: 직접적이고 임팩트 있게, 인사말 없이 바로 핵심 내용으로 시작"
+        language_instruction = "Write every script in Korean"
     else:
         # paragraph_number에 따른 영어 대본 길이 동적 설정
         if paragraph_number >= 3:
@@ -271,13 +641,8 @@ def generate_script(video_subject: str, language: str = "auto", paragraph_number
         else:
             length_description = "Total length: 30-60 seconds (about 120-180 words)"
             detail_instruction = "Each paragraph: 2-3 sentences"
-        
-        prompt = f"""
-        Write a YouTube Shorts script about '{video_subject}'.
-
-        ⚠️ IMPORTANT: Please strictly follow the length requirements below!
 
-        Requirements:
+        requirements = f"""
         1. {paragraph_number} paragraphs
         2. {detail_instruction}
         3. {length_description}
@@ -289,17 +654,57 @@ def generate_script(video_subject: str, language: str = "auto", paragraph_number
         9. NO markdown formatting (**, ##, - etc.)
         10. NO scene descriptions ([Scene 1] etc.)
         11. Plain text only
-        12. ⚠️ Do NOT write too short - write with sufficient length
+        12. ⚠️ Do NOT write too short - write with sufficient length"""
+        style = "Style: Direct and impactful, start immediately with core content"
+        language_instruction = "Write every script in English"
+    return {
+        "requirements": requirements,
+        "style": style,
+        "length_description": length_description,
+        "language_instruction": language_instruction,
+    }
+
+
+def _build_script_prompt(video_subject: str, language: str = "auto", paragraph_number: int = 1) -> str:
+    r = _script_requirements(language, paragraph_number)
+    if language == "ko-KR" or language == "auto":
+        prompt = f"""
+        주제 '{video_subject}'에 대한 유튜브 쇼츠용 대본을 작성해주세요.
 
-        Style: Direct and impactful, start immediately with core content
+        ⚠️ 중요: 반드시 아래 길이 요구사항을 준수해주세요!
+
+        요구사항:{r["requirements"]}
+
+        {r["style"]}
+
+        주제: {video_subject}
+
+        ⚠️ 다시 한번 강조: {r["length_description"]}에 맞게 충분히 길게 작성해주세요!
+
+        대본을 작성해주세요:
+        """
+    else:
+        prompt = f"""
+        Write a YouTube Shorts script about '{video_subject}'.
+
+        ⚠️ IMPORTANT: Please strictly follow the length requirements below!
+
+        Requirements:{r["requirements"]}
+
+        {r["style"]}
 
         Subject: {video_subject}
 
-        ⚠️ REMINDER: Please write according to {length_description} with sufficient length!
+        ⚠️ REMINDER: Please write according to {r["length_description"]} with sufficient length!
 
         Write the script:
         """
-    
+    return prompt
+
+
+def generate_script(video_subject: str, language: str = "auto", paragraph_number: int = 1) -> str:
+    prompt = _build_script_prompt(video_subject, language, paragraph_number)
+
     # Check if subject is empty
     if not video_subject:
         return ""
@@ -307,7 +712,7 @@ def generate_script(video_subject: str, language: str = "auto", paragraph_number
     final_script = ""
     for i in range(_max_retries):
         try:
-            response = _generate_response(prompt)
+            response = _generate_response(prompt, use_cache=False)
             if response:
                 script = response.strip()
                 
@@ -327,6 +732,96 @@ def generate_script(video_subject: str, language: str = "auto", paragraph_number
         
     return final_script
 
+_sentence_end = re.compile(r"(?<=[.!?。！？…])\s+|\n+")
+
+
+def generate_script_stream(
+    video_subject: str, language: str = "auto", paragraph_number: int = 1
+) -> Iterator[str]:
+    """
+    Stream the script sentence by sentence while the llm is still writing it,
+    so speech synthesis can start on the first sentence.
+    Greeting paragraphs and markdown are removed like in generate_script.
+    A sentence that ends a line carries the line breaks that follow it ("...\n\n"),
+    "".join() of the sentences (see join_script_sentences) gives back the paragraphs.
+    """
+    if not video_subject:
+        return
+    prompt = _build_script_prompt(video_subject, language, paragraph_number)
+
+    buffer = ""
+    line_start = True
+    skip_line = False
+
+    def complete_sentences(final: bool = False):
+        nonlocal buffer, line_start, skip_line
+        while True:
+            match = _sentence_end.search(buffer)
+            if not match:
+                if not final:
+                    return
+                sentence, separator, buffer = buffer, "", ""
+            else:
+                sentence, separator = buffer[: match.start()], match.group(0)
+                buffer = buffer[match.end() :]
+
+            sentence = _clean_markdown_formatting(sentence.strip())
+            if sentence:
+                if line_start:
+                    skip_line = _is_greeting_line(sentence, language)
+                    line_start = False
+                if not skip_line:
+                    yield sentence + "\n" * separator.count("\n")
+            if "\n" in separator:
+                line_start, skip_line = True, False
+            if not buffer:
+                return
+
+    for chunk in _stream_response(prompt):
+        buffer += chunk
+        yield from complete_sentences()
+    yield from complete_sentences(final=True)
+
+
+def join_script_sentences(sentences: List[str]) -> str:
+    """
+    The script of the sentences of generate_script_stream, with its line breaks.
+    """
+    script = "".join(sentence if sentence.endswith("\n") else f"{sentence} " for sentence in sentences)
+    return "\n".join(line.strip() for line in script.strip().split("\n"))
+
+
+def _filter_terms(response: str) -> List[str]:
+    """
+    Split an LLM keyword response into terms and keep only short, concrete,
+    searchable English terms.
+    """
+    cleaned = response.replace("\n", ",").replace("- ", "").replace("* ", "").replace('"', '').replace("'", "").strip()
+    terms = [t.strip() for t in cleaned.split(",") if t.strip()]
+
+    # Enhanced validation for script-content matching
+    valid_terms = []
+    for term in terms:
+        term = term.strip().lower()
+        # More strict validation for content matching
+        if (len(term.split()) <= 2 and  # Max 2 words for better search results
+            term.isascii() and 
+            len(term) > 2 and
+            # Exclude generic/meta terms
+            not any(generic in term for generic in [
+                "ai generated", "viral", "content", "shorts", "video", "youtube",
+                "script", "keyword", "analysis", "example", "concept"
+            ]) and
+            # Exclude common stop words
+            not any(stop_word in term for stop_word in [
+                "the", "and", "or", "but", "with", "for", "this", "that", "these", "those"
+            ]) and
+            # Ensure it's a concrete, searchable term
+            not term.startswith(("how to", "what is", "why", "when"))):
+            valid_terms.append(term)
+    return valid_terms
+
+
 def generate_terms(video_subject: str, video_script: str, amount: int = 5) -> List[str]:
     logger.info(f"Starting enhanced script-content matching keyword generation for subject: {video_subject}")
     
@@ -382,30 +877,7 @@ def generate_terms(video_subject: str, video_script: str, amount: int = 5) -> Li
                     if cleaned.startswith(":"):
                         cleaned = cleaned[1:].strip()
             
-            # Clean formatting and extract terms
-            cleaned = cleaned.replace("\n", ",").replace("- ", "").replace("* ", "").replace('"', '').replace("'", "").strip()
-            terms = [t.strip() for t in cleaned.split(",") if t.strip()]
-            
-            # Enhanced validation for script-content matching
-            valid_terms = []
-            for term in terms:
-                term = term.strip().lower()
-                # More strict validation for content matching
-                if (len(term.split()) <= 2 and  # Max 2 words for better search results
-                    term.isascii() and 
-                    len(term) > 2 and
-                    # Exclude generic/meta terms
-                    not any(generic in term for generic in [
-                        "ai generated", "viral", "content", "shorts", "video", "youtube",
-                        "script", "keyword", "analysis", "example", "concept"
-                    ]) and
-                    # Exclude common stop words
-                    not any(stop_word in term for stop_word in [
-                        "the", "and", "or", "but", "with", "for", "this", "that", "these", "those"
-                    ]) and
-                    # Ensure it's a concrete, searchable term
-                    not term.startswith(("how to", "what is", "why", "when"))):
-                    valid_terms.append(term)
+            valid_terms = _filter_terms(cleaned)
             
             logger.info(f"Script-matched valid terms: {valid_terms}")
             
@@ -423,6 +895,92 @@ def generate_terms(video_subject: str, video_script: str, amount: int = 5) -> Li
     return _generate_enhanced_script_keywords(video_subject, video_script, amount)
 
 
+def _parse_json_response(response: str):
+    # models often wrap JSON in ```json fences or add a sentence around it
+    cleaned = re.sub(r"```(?:json)?", "", response).strip()
+    match = re.search(r"\[.*\]", cleaned, re.DOTALL)
+    if match:
+        cleaned = match.group(0)
+    return json.loads(cleaned)
+
+
+def generate_scripts_batch(
+    video_subjects: List[str],
+    language: str = "ko-KR",
+    paragraph_number: int = 1,
+    terms_amount: int = 5,
+    batch_size: int = 10,
+) -> dict:
+    """
+    Generate scripts and search terms for many subjects with a few structured JSON requests.
+    Returns {subject: {"script": str, "terms": List[str]}} for every subject,
+    items that are missing or invalid in the batch response are generated with single calls.
+    """
+    results = {}
+    subjects = [s for s in dict.fromkeys(video_subjects) if s and s.strip()]
+    # the same requirements as a single generate_script call
+    r = _script_requirements(language, paragraph_number)
+
+    for i in range(0, len(subjects), batch_size):
+        chunk = subjects[i : i + batch_size]
+        prompt = f"""
+        Write a YouTube Shorts script and stock footage search keywords for EACH of the subjects below.
+        {r["language_instruction"]}, separate the paragraphs of a script with "\\n\\n".
+
+        Requirements for each script:{r["requirements"]}
+
+        {r["style"]}
+
+        Requirements for each keyword list:
+        1. {terms_amount} specific English keywords (1-2 words each) that find stock footage matching the script
+        2. Concrete, filmable things only
+
+        Subjects:
+        {json.dumps(chunk, ensure_ascii=False)}
+
+        Return ONLY a JSON array with one object per subject, in the same order, no explanations:
+        [{{"subject": "...", "script": "...", "terms": ["...", "..."]}}]
+        """
+
+        logger.info(f"generating scripts for {len(chunk)} subjects in one request")
+        try:
+            response = _generate_response(prompt, use_cache=False)
+            items = _parse_json_response(response)
+            if not isinstance(items, list):
+                raise ValueError("response is not a JSON array")
+        except Exception as e:
+            logger.warning(f"failed to generate scripts in batch, falling back to single calls: {e}")
+            items = []
+
+        for item in items:
+            if not isinstance(item, dict) or item.get("subject") not in chunk:
+                continue
+            script = str(item.get("script", "")).strip()
+            script = _clean_markdown_formatting(_remove_greetings(script, language))
+            if len(script) < 50:
+                continue
+            terms = item.get("terms", [])
+            if isinstance(terms, list):
+                terms = ", ".join(str(t) for t in terms)
+            terms = _filter_terms(str(terms))[:terms_amount]
+            if len(terms) < 3:
+                terms = generate_terms(item["subject"], script, terms_amount)
+            results[item["subject"]] = {"script": script, "terms": terms}
+
+    for subject in subjects:
+        if subject in results:
+            continue
+        logger.info(f"generating script with a single call: {subject}")
+        script = generate_script(subject, language, paragraph_number)
+        results[subject] = {
+            "script": script,
+            "terms": generate_terms(subject, script, terms_amount),
+        }
+
+    logger.success(f"generated scripts for {len(results)} subjects")
+    return results
+
+
 def _generate_enhanced_script_keywords(video_subject: str, video_script: str, amount: int = 5) -> List[str]:
     """Enhanced fallback that analyzes script content more deeply"""
     logger.info(f"Performing enhanced script content analysis for: '{video_subject}'")
@@ -687,7 +1245,7 @@ def generate_english_script(video_subject: str, paragraph_number: int = 4) -> st
     """
     
     try:
-        response = _generate_response(prompt)
+        response = _generate_response(prompt, use_cache=False)
         if response and len(response.strip()) > 50:
             # Clean up the response
             script = response.strip()
@@ -1067,6 +1625,45 @@ def _get_korean_subject_keywords(video_subject: str) -> List[str]:
     return keywords[:8] if keywords else ["정보", "팁", "노하우", "일상"]
 
 
+def _is_greeting_line(line: str, language: str = "auto") -> bool:
+    """인사말로 시작하는 문장인지 확인"""
+    # 한국어 인사말 패턴
+    korean_greetings = [
+        "안녕하세요", "안녕", "여러분", "시청자 여러분", "구독자 여러분",
+        "오늘은", "오늘 영상에서는", "이번 영상에서는", "반갑습니다",
+        "환영합니다", "다시 만나뵙습니다", "채널에 오신 것을 환영합니다",
+        "오늘도", "다시 한번"
+    ]
+
+    # 영어 인사말 패턴
+    english_greetings = [
+        "hello", "hi everyone", "hi there", "welcome", "welcome back",
+        "good morning", "good afternoon", "good evening", "hey guys",
+        "what's up", "greetings", "welcome to", "hey there", "hi folks",
+        "today we", "in today's video", "today i", "today's topic"
+    ]
+
+    # 인사말로 시작하는 문장 제거
+    should_skip = False
+    line_lower = line.lower()
+
+    if language == "ko-KR" or language == "auto":
+        for greeting in korean_greetings:
+            if line.startswith(greeting) or greeting in line[:30]:
+                should_skip = True
+                break
+
+    if language == "en-US" or not should_skip:
+        for greeting in english_greetings:
+            if (line_lower.startswith(greeting + " ") or 
+                line_lower.startswith(greeting + ",") or
+                line_lower.startswith(greeting + ".") or
+                line_lower == greeting):
+                should_skip = True
+                break
+    return should_skip
+
+
 def _remove_greetings(script: str, language: str = "auto") -> str:
     """대본에서 인사말 제거"""
     if not script:
@@ -1080,40 +1677,7 @@ def _remove_greetings(script: str, language: str = "auto") -> str:
         if not line:
             continue
             
-        # 한국어 인사말 패턴
-        korean_greetings = [
-            "안녕하세요", "안녕", "여러분", "시청자 여러분", "구독자 여러분",
-            "오늘은", "오늘 영상에서는", "이번 영상에서는", "반갑습니다",
-            "환영합니다", "다시 만나뵙습니다", "채널에 오신 것을 환영합니다",
-            "오늘도", "다시 한번"
-        ]
-        
-        # 영어 인사말 패턴
-        english_greetings = [
-            "hello", "hi everyone", "hi there", "welcome", "welcome back",
-            "good morning", "good afternoon", "good evening", "hey guys",
-            "what's up", "greetings", "welcome to", "hey there", "hi folks",
-            "today we", "in today's video", "today i", "today's topic"
-        ]
-        
-        # 인사말로 시작하는 문장 제거
-        should_skip = False
-        line_lower = line.lower()
-        
-        if language == "ko-KR" or language == "auto":
-            for greeting in korean_greetings:
-                if line.startswith(greeting) or greeting in line[:30]:
-                    should_skip = True
-                    break
-        
-        if language == "en-US" or not should_skip:
-            for greeting in english_greetings:
-                if (line_lower.startswith(greeting + " ") or 
-                    line_lower.startswith(greeting + ",") or
-                    line_lower.startswith(greeting + ".") or
-                    line_lower == greeting):
-                    should_skip = True
-                    break
+        should_skip = _is_greeting_line(line, language)
         
         # 인사말이 아닌 문장만 추가
         if not should_skip:
@@ -1391,7 +1955,7 @@ def generate_longform_script(video_subject: str, language: str = "ko-KR", durati
         """
     
     try:
-        response = _generate_response(prompt)
+        response = _generate_response(prompt, use_cache=False)
         if response:
             script = response.strip()
             
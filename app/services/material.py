@@ -1,3 +1,4 @@
+import json
 import os
 import random
 import concurrent.futures
@@ -10,6 +11,7 @@ from moviepy.video.io.VideoFileClip import VideoFileClip
 
 from app.config import config
 from app.models.schema import MaterialInfo, VideoAspect, VideoConcatMode
+from app.services.utils import fingerprint as fp
 from app.utils import utils
 
 requested_count = 0
@@ -442,6 +444,66 @@ def save_video(video_url: str, save_dir: str = "") -> str:
     return ""
 
 
+def _material_meta_file(video_path: str) -> str:
+    return f"{os.path.splitext(video_path)[0]}.json"
+
+
+def load_material_meta(video_path: str) -> dict:
+    meta_file = _material_meta_file(video_path)
+    if not os.path.isfile(meta_file):
+        return {}
+    try:
+        with open(meta_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"invalid material metadata: {meta_file} => {str(e)}")
+        return {}
+
+
+def save_material_meta(video_path: str, meta: dict):
+    meta_file = _material_meta_file(video_path)
+    temp_file = f"{meta_file}.{utils.get_uuid(True)}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+    os.replace(temp_file, meta_file)
+
+
+def index_material(
+    video_path: str, item: MaterialInfo = None, search_term: str = ""
+) -> dict:
+    """
+    Store the metadata of a cached clip next to the file (vid-xxx.json):
+    provider, url, duration, the search terms that found it and its
+    perceptual fingerprint. The fingerprint is only computed once per file.
+    """
+    meta = load_material_meta(video_path)
+    changed = False
+    if item:
+        for key in ("provider", "url", "duration"):
+            value = getattr(item, key)
+            if value and meta.get(key) != value:
+                meta[key] = value
+                changed = True
+
+    search_terms = meta.get("search_terms", [])
+    if search_term and search_term not in search_terms:
+        meta["search_terms"] = search_terms + [search_term]
+        changed = True
+
+    if not meta.get("fingerprint"):
+        fingerprint = fp.compute_video_fingerprint(video_path)
+        if fingerprint:
+            meta["fingerprint"] = fingerprint
+            changed = True
+
+    if changed:
+        try:
+            save_material_meta(video_path, meta)
+        except Exception as e:
+            logger.warning(f"failed to save material metadata: {video_path} => {str(e)}")
+    return meta
+
+
 def download_videos(
     task_id: str,
     search_terms: List[str],
@@ -453,13 +515,38 @@ def download_videos(
 ) -> List[str]:
     valid_video_items = []
     valid_video_urls = []
+    item_search_terms = {}
     found_duration = 0.0
     search_videos = search_videos_pexels
     if source == "pixabay":
         search_videos = search_videos_pixabay
 
+    total_duration = 0.0
+    video_paths = []
+    selected_fingerprints = []
+
+    # Rank the clips we already have before any remote search,
+    # only the terms the library cannot serve are searched online
+    remote_terms = search_terms
+    if config.app.get("material_local_first", False):
+        from app.services import library
+
+        lib = library.library
+        video_paths, selected_fingerprints, total_duration = lib.select_materials(
+            search_terms=search_terms,
+            video_aspect=video_aspect,
+            audio_duration=audio_duration,
+            max_clip_duration=max_clip_duration,
+        )
+        if total_duration > audio_duration:
+            logger.success(f"found enough videos in the local library: {len(video_paths)}")
+            return video_paths
+        remote_terms = [
+            term for term in search_terms if not lib.search(term, max_clip_duration, video_aspect)
+        ] or search_terms
+
     # Enhanced keyword search with variations and fallbacks
-    for search_term in search_terms:
+    for search_term in remote_terms:
         logger.info(f"🔍 Searching for videos with keyword: '{search_term}'")
         
         # Try multiple search variations for better content matching
@@ -532,6 +619,7 @@ def download_videos(
             if item.url not in valid_video_urls:
                 valid_video_items.append(item)
                 valid_video_urls.append(item.url)
+                item_search_terms[item.url] = search_term
                 found_duration += item.duration
                 added_count += 1
         
@@ -540,7 +628,6 @@ def download_videos(
     logger.info(
         f"📊 Search complete - Total videos: {len(valid_video_items)}, Required duration: {audio_duration}s, Found duration: {found_duration}s"
     )
-    video_paths = []
 
     material_directory = config.app.get("material_directory", "").strip()
     if material_directory == "task":
@@ -551,8 +638,9 @@ def download_videos(
     if video_contact_mode.value == VideoConcatMode.random.value:
         random.shuffle(valid_video_items)
 
-    total_duration = 0.0
-    video_paths = []
+    # Pexels/Pixabay often return the same footage under different ids and
+    # renditions, skip clips whose perceptual fingerprint was already selected
+    dedupe = config.app.get("material_dedupe", True)
 
     # Helper function for parallel download
     def download_task(item):
@@ -560,10 +648,27 @@ def download_videos(
             logger.info(f"downloading video: {item.url}")
             path = save_video(video_url=item.url, save_dir=material_directory)
             if path:
-                return item, path
+                meta = {}
+                if dedupe:
+                    meta = index_material(path, item, item_search_terms.get(item.url, ""))
+                return item, path, meta.get("fingerprint", "")
         except Exception as e:
             logger.error(f"failed to download video: {utils.to_json(item)} => {str(e)}")
-        return item, None
+        return item, None, ""
+
+    def accept(item, path, fingerprint) -> bool:
+        nonlocal total_duration
+        if not path or path in video_paths:
+            return False
+        if dedupe and fp.is_near_duplicate(fingerprint, selected_fingerprints):
+            logger.info(f"skipping near-duplicate video: {path}")
+            return False
+        logger.info(f"video saved: {path}")
+        video_paths.append(path)
+        selected_fingerprints.append(fingerprint)
+        seconds = min(max_clip_duration, item.duration)
+        total_duration += seconds
+        return True
 
     # Parallel download for the first batch
     # Estimate needed count: audio_duration / 3s (conservative min duration) + buffer
@@ -579,50 +684,29 @@ def download_videos(
             # Preserve order for sequential mode
             futures = [executor.submit(download_task, item) for item in candidates]
             for future in futures:
-                item, path = future.result()
-                if path:
-                    logger.info(f"video saved: {path}")
-                    video_paths.append(path)
-                    seconds = min(max_clip_duration, item.duration)
-                    total_duration += seconds
-                    if total_duration > audio_duration:
-                        break
+                item, path, fingerprint = future.result()
+                if accept(item, path, fingerprint) and total_duration > audio_duration:
+                    break
         else:
             # Random mode: order within candidates doesn't strictly matter as they are already shuffled
             # process as completed for speed
             future_to_item = {executor.submit(download_task, item): item for item in candidates}
             for future in concurrent.futures.as_completed(future_to_item):
-                item, path = future.result()
-                if path:
-                    logger.info(f"video saved: {path}")
-                    video_paths.append(path)
-                    seconds = min(max_clip_duration, item.duration)
-                    total_duration += seconds
-                    if total_duration > audio_duration:
-                        break
+                item, path, fingerprint = future.result()
+                if accept(item, path, fingerprint) and total_duration > audio_duration:
+                    break
 
     # If still not enough duration, fallback to sequential for the rest
     if total_duration <= audio_duration and len(candidates) < len(valid_video_items):
         logger.info(f"still need more duration ({total_duration}/{audio_duration}), downloading more sequentially...")
         remaining_items = valid_video_items[len(candidates):]
         for item in remaining_items:
-            try:
-                logger.info(f"downloading video: {item.url}")
-                saved_video_path = save_video(
-                    video_url=item.url, save_dir=material_directory
+            item, path, fingerprint = download_task(item)
+            if accept(item, path, fingerprint) and total_duration > audio_duration:
+                logger.info(
+                    f"total duration of downloaded videos: {total_duration} seconds, skip downloading more"
                 )
-                if saved_video_path:
-                    logger.info(f"video saved: {saved_video_path}")
-                    video_paths.append(saved_video_path)
-                    seconds = min(max_clip_duration, item.duration)
-                    total_duration += seconds
-                    if total_duration > audio_duration:
-                        logger.info(
-                            f"total duration of downloaded videos: {total_duration} seconds, skip downloading more"
-                        )
-                        break
-            except Exception as e:
-                logger.error(f"failed to download video: {utils.to_json(item)} => {str(e)}")
+                break
 
     logger.success(f"downloaded {len(video_paths)} videos")
     return video_paths
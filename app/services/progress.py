@@ -0,0 +1,100 @@
+"""
+Task progress reporter
+Collects the progress updates of the running tasks and writes them to the
+task state (sm.state) at most progress_max_rate times per second per task.
+Updates in between are merged, a change of state is written at once.
+"""
+
+import threading
+import time
+
+from loguru import logger
+
+from app.config import config
+from app.models import const
+from app.services import state as sm
+
+
+class ProgressReporter:
+    def __init__(self, max_rate: float = None):
+        self._max_rate = max_rate
+        self._lock = threading.Condition()
+        # serializes the writes, so an older update never lands after a newer one
+        self._write_lock = threading.Lock()
+        self._pending = {}
+        self._last_write = {}
+        self._states = {}
+        self._thread = None
+
+    @property
+    def max_rate(self) -> float:
+        if self._max_rate is not None:
+            return self._max_rate
+        return float(config.app.get("progress_max_rate", 2))
+
+    def update_task(
+        self,
+        task_id: str,
+        state: int = const.TASK_STATE_PROCESSING,
+        progress: int = 0,
+        **kwargs,
+    ):
+        """
+        Same arguments as sm.state.update_task.
+        """
+        max_rate = self.max_rate
+        with self._lock:
+            self._pending.setdefault(task_id, {}).update(state=state, progress=progress, **kwargs)
+            due = max_rate <= 0 or time.time() - self._last_write.get(task_id, 0) >= 1 / max_rate
+            write_now = due or self._states.get(task_id) != state
+            if not write_now:
+                self._start()
+                self._lock.notify()
+        if write_now:
+            self.flush(task_id)
+
+    def flush(self, task_id: str = None):
+        """
+        Write the pending updates of a task (all tasks if task_id is None).
+        """
+        with self._write_lock:
+            with self._lock:
+                task_ids = [task_id] if task_id else list(self._pending)
+                updates = [(t, self._pending.pop(t)) for t in task_ids if t in self._pending]
+                now = time.time()
+                for t, fields in updates:
+                    if fields["state"] == const.TASK_STATE_PROCESSING:
+                        self._states[t] = fields["state"]
+                        self._last_write[t] = now
+                    else:
+                        self._states.pop(t, None)
+                        self._last_write.pop(t, None)
+            for t, fields in updates:
+                try:
+                    sm.state.update_task(t, **fields)
+                except Exception as e:
+                    logger.error(f"failed to update task state: {t}, {e}")
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="progress-reporter", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._lock.wait()
+                interval = 1 / self.max_rate if self.max_rate > 0 else 0
+                next_write = min(self._last_write.get(t, 0) for t in self._pending) + interval
+                delay = next_write - time.time()
+                if delay > 0:
+                    self._lock.wait(delay)
+                    continue
+                now = time.time()
+                due = [t for t in self._pending if now - self._last_write.get(t, 0) >= interval]
+            for task_id in due:
+                self.flush(task_id)
+
+
+progress_reporter = ProgressReporter()
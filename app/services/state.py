@@ -1,8 +1,115 @@
 import ast
+import asyncio
+import json
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
 
+from loguru import logger
+
 from app.config import config
 from app.models import const
+from app.utils import utils
+
+
+def _json_default(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "value"):
+        return value.value
+    return str(value)
+
+
+def dumps(value) -> str:
+    """
+    Task fields as JSON, models and enums included.
+    """
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+
+class TaskEvents:
+    """
+    In-process publish/subscribe of task updates, one channel per task id.
+    Listeners are called in the thread that wrote the update.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = {}
+
+    def add_listener(self, task_id: str, callback):
+        with self._lock:
+            self._listeners.setdefault(task_id, set()).add(callback)
+
+    def remove_listener(self, task_id: str, callback):
+        with self._lock:
+            listeners = self._listeners.get(task_id)
+            if listeners is not None:
+                listeners.discard(callback)
+                if not listeners:
+                    del self._listeners[task_id]
+
+    def publish(self, task_id: str, fields: dict):
+        with self._lock:
+            listeners = list(self._listeners.get(task_id, ()))
+        for callback in listeners:
+            try:
+                callback(fields)
+            except Exception as e:
+                logger.warning(f"task listener failed: {task_id}, {e}")
+
+    def wait(self, task_id: str, timeout: float) -> bool:
+        """
+        Block until the task is updated or the timeout expires, True if it was updated.
+        """
+        event = threading.Event()
+
+        def callback(_):
+            event.set()
+
+        self.add_listener(task_id, callback)
+        try:
+            return event.wait(timeout)
+        finally:
+            self.remove_listener(task_id, callback)
+
+
+task_events = TaskEvents()
+
+
+class LocalSubscription:
+    """
+    Updates of a task published in this process, for asyncio consumers.
+    Must be created inside the event loop.
+    """
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        def callback(fields):
+            try:
+                loop.call_soon_threadsafe(self._queue.put_nowait, fields)
+            except RuntimeError:
+                # the loop is closed
+                pass
+
+        self._callback = callback
+        task_events.add_listener(task_id, callback)
+
+    async def get(self, timeout: float):
+        """
+        The fields of the next update, None if there was none within timeout.
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        task_events.remove_listener(self.task_id, self._callback)
 
 
 # Base class for state management
@@ -19,6 +126,13 @@ class BaseState(ABC):
     def get_all_tasks(self, page: int, page_size: int):
         pass
 
+    async def subscribe(self, task_id: str):
+        """
+        Subscription to the updates of a task (get(timeout) / close()), each update
+        carries the fields that were written, not the whole task.
+        """
+        return LocalSubscription(task_id)
+
 
 # Memory state management
 class MemoryState(BaseState):
@@ -43,12 +157,16 @@ class MemoryState(BaseState):
         if progress > 100:
             progress = 100
 
+        # merge, the fields of earlier updates (script, videos...) are kept
+        task = self._tasks.get(task_id, {})
         self._tasks[task_id] = {
+            **task,
             "task_id": task_id,
             "state": state,
             "progress": progress,
             **kwargs,
         }
+        task_events.publish(task_id, {"task_id": task_id, "state": state, "progress": progress, **kwargs})
 
     def get_task(self, task_id: str):
         return self._tasks.get(task_id, None)
@@ -60,31 +178,66 @@ class MemoryState(BaseState):
 
 # Redis state management
 class RedisState(BaseState):
+    """
+    Each task is a hash of JSON encoded fields under its task id, so an update
+    is a single multi-field HSET. The sorted set INDEX_KEY holds every task id
+    scored by creation time, for paging without scanning the keyspace.
+    """
+
+    INDEX_KEY = "tasks:index"
+    # set once the tasks written before the index existed have been indexed
+    INDEX_BUILT_KEY = "tasks:index:built"
+
     def __init__(self, host="localhost", port=6379, db=0, password=None):
         import redis
 
-        self._redis = redis.StrictRedis(host=host, port=port, db=db, password=password)
+        self._connection = {"host": host, "port": port, "db": db, "password": password}
+        # connects on the first command, the state is created when the module is imported
+        self._redis = redis.StrictRedis(**self._connection)
+        self._index_lock = threading.Lock()
+        self._indexed = False
+
+    @staticmethod
+    def channel(task_id: str) -> str:
+        return f"tasks:events:{task_id}"
+
+    def _build_index(self):
+        """
+        Index the tasks written before the index existed (one SCAN per Redis database,
+        run by the first listing or write of the process).
+        """
+        if self._indexed:
+            return
+        with self._index_lock:
+            if self._indexed:
+                return
+            if not self._redis.exists(self.INDEX_BUILT_KEY):
+                now = time.time()
+                pipe = self._redis.pipeline(transaction=False)
+                for key in self._redis.scan_iter(count=1000):
+                    if key != self.INDEX_KEY.encode("utf-8") and self._redis.type(key) == b"hash":
+                        if self._redis.hexists(key, "task_id"):
+                            pipe.zadd(self.INDEX_KEY, {key: now}, nx=True)
+                pipe.set(self.INDEX_BUILT_KEY, 1)
+                pipe.execute()
+            self._indexed = True
 
     def get_all_tasks(self, page: int, page_size: int):
+        self._build_index()
         start = (page - 1) * page_size
-        end = start + page_size
+        end = start + page_size - 1
+        total = self._redis.zcard(self.INDEX_KEY)
+        task_ids = self._redis.zrange(self.INDEX_KEY, start, end)
+        if not task_ids:
+            return [], total
+
+        pipe = self._redis.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.hgetall(task_id)
         tasks = []
-        cursor = 0
-        total = 0
-        while True:
-            cursor, keys = self._redis.scan(cursor, count=page_size)
-            total += len(keys)
-            if total > start:
-                for key in keys[max(0, start - total):end - total]:
-                    task_data = self._redis.hgetall(key)
-                    task = {
-                        k.decode("utf-8"): self._convert_to_original_type(v) for k, v in task_data.items()
-                    }
-                    tasks.append(task)
-                    if len(tasks) >= page_size:
-                        break
-            if cursor == 0 or len(tasks) >= page_size:
-                break
+        for task_data in pipe.execute():
+            if task_data:
+                tasks.append(self._decode(task_data))
         return tasks, total
 
     def update_task(
@@ -105,54 +258,243 @@ class RedisState(BaseState):
             **kwargs,
         }
 
-        for field, value in fields.items():
-            self._redis.hset(task_id, field, str(value))
+        self._build_index()
+        now = time.time()
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hset(task_id, mapping={k: dumps(v) for k, v in fields.items()})
+        pipe.hsetnx(task_id, "created_at", dumps(now))
+        pipe.zadd(self.INDEX_KEY, {task_id: now}, nx=True)
+        # subscribers in other processes (API workers) listen on the task channel
+        pipe.publish(self.channel(task_id), dumps(fields))
+        pipe.execute()
+        task_events.publish(task_id, fields)
+
+    async def subscribe(self, task_id: str):
+        return await RedisSubscription.create(self._connection, self.channel(task_id))
 
     def get_task(self, task_id: str):
         task_data = self._redis.hgetall(task_id)
         if not task_data:
             return None
-
-        task = {
-            key.decode("utf-8"): self._convert_to_original_type(value)
-            for key, value in task_data.items()
-        }
-        return task
+        return self._decode(task_data)
 
     def delete_task(self, task_id: str):
-        self._redis.delete(task_id)
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.delete(task_id)
+        pipe.zrem(self.INDEX_KEY, task_id)
+        pipe.execute()
+
+    @classmethod
+    def _decode(cls, task_data: dict) -> dict:
+        return {k.decode("utf-8"): cls._convert_to_original_type(v) for k, v in task_data.items()}
 
     @staticmethod
     def _convert_to_original_type(value):
         """
         Convert the value from byte string to its original data type.
-        You can extend this method to handle other data types as needed.
+        Values are JSON, tasks written by older versions hold str(value).
         """
         value_str = value.decode("utf-8")
 
+        try:
+            return json.loads(value_str)
+        except ValueError:
+            pass
+
         try:
             # try to convert byte string array to list
             return ast.literal_eval(value_str)
         except (ValueError, SyntaxError):
             pass
 
-        if value_str.isdigit():
-            return int(value_str)
-        # Add more conversions here if needed
         return value_str
 
 
+class RedisSubscription:
+    """
+    Updates of a task published on its Redis channel by any process.
+    """
+
+    def __init__(self, client, pubsub):
+        self._client = client
+        self._pubsub = pubsub
+
+    @classmethod
+    async def create(cls, connection: dict, channel: str) -> "RedisSubscription":
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis(**connection)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        return cls(client, pubsub)
+
+    async def get(self, timeout: float):
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if not message:
+            return None
+        return json.loads(message["data"])
+
+    async def close(self):
+        await self._pubsub.aclose()
+        await self._client.aclose()
+
+
+# SQLite state management
+class SQLiteState(BaseState):
+    """
+    Tasks in a single SQLite file (WAL mode), for single node deployments.
+    Progress updates are buffered and written together every flush_interval
+    seconds, a state change is written at once. Finished tasks that have not
+    been updated for retention_days are pruned.
+    """
+
+    def __init__(self, db_file: str = "", flush_interval: float = 1.0, retention_days: float = 30):
+        import sqlite3
+
+        self.db_file = db_file or os.path.join(utils.storage_dir(), "state.db")
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self._lock = threading.RLock()
+        self._pending = {}
+        # last state of the running tasks, a change of state is not buffered
+        self._states = {}
+        self._last_flush = time.time()
+        self._last_prune = 0.0
+
+        self._db = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "task_id TEXT PRIMARY KEY, state INTEGER, progress INTEGER, "
+            "created_at REAL, updated_at REAL, data TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (state)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at)")
+        self.prune()
+
+    def update_task(
+        self,
+        task_id: str,
+        state: int = const.TASK_STATE_PROCESSING,
+        progress: int = 0,
+        **kwargs,
+    ):
+        progress = int(progress)
+        if progress > 100:
+            progress = 100
+
+        fields = {
+            "task_id": task_id,
+            "state": state,
+            "progress": progress,
+            **kwargs,
+        }
+        task_events.publish(task_id, fields)
+        with self._lock:
+            state_changed = self._states.get(task_id) != state
+            if state == const.TASK_STATE_PROCESSING:
+                self._states[task_id] = state
+            else:
+                self._states.pop(task_id, None)
+            self._pending.setdefault(task_id, {}).update(fields)
+            if state_changed or time.time() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """
+        Write the buffered updates in one transaction.
+        """
+        with self._lock:
+            self._last_flush = time.time()
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            now = time.time()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for task_id, fields in pending.items():
+                    row = self._db.execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+                    data = json.loads(row[0]) if row else {}
+                    data.update(json.loads(dumps(fields)))
+                    self._db.execute(
+                        "INSERT INTO tasks (task_id, state, progress, created_at, updated_at, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(task_id) DO UPDATE SET state = excluded.state, "
+                        "progress = excluded.progress, updated_at = excluded.updated_at, data = excluded.data",
+                        (task_id, data["state"], data["progress"], now, now, dumps(data)),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            if now - self._last_prune > 3600:
+                self.prune()
+
+    def prune(self):
+        """
+        Delete the finished tasks older than retention_days (0 keeps everything).
+        """
+        with self._lock:
+            self._last_prune = time.time()
+            if self.retention_days <= 0:
+                return
+            cutoff = time.time() - self.retention_days * 86400
+            cursor = self._db.execute(
+                "DELETE FROM tasks WHERE updated_at < ? AND state != ?",
+                (cutoff, const.TASK_STATE_PROCESSING),
+            )
+            if cursor.rowcount:
+                logger.info(f"pruned {cursor.rowcount} tasks older than {self.retention_days} days")
+
+    def get_task(self, task_id: str):
+        with self._lock:
+            self.flush()
+            row = self._db.execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_all_tasks(self, page: int, page_size: int):
+        with self._lock:
+            self.flush()
+            total = self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            rows = self._db.execute(
+                "SELECT data FROM tasks ORDER BY created_at, rowid LIMIT ? OFFSET ?",
+                (page_size, (page - 1) * page_size),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows], total
+
+    def delete_task(self, task_id: str):
+        with self._lock:
+            self._pending.pop(task_id, None)
+            self._states.pop(task_id, None)
+            self._db.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._db.close()
+
+
 # Global state
+_state_backend = config.app.get("state_backend", "").strip().lower()
 _enable_redis = config.app.get("enable_redis", False)
 _redis_host = config.app.get("redis_host", "localhost")
 _redis_port = config.app.get("redis_port", 6379)
 _redis_db = config.app.get("redis_db", 0)
 _redis_password = config.app.get("redis_password", None)
 
-state = (
-    RedisState(
+if not _state_backend:
+    _state_backend = "redis" if _enable_redis else "memory"
+
+if _state_backend == "redis":
+    state = RedisState(
         host=_redis_host, port=_redis_port, db=_redis_db, password=_redis_password
     )
-    if _enable_redis
-    else MemoryState()
-)
+elif _state_backend == "sqlite":
+    state = SQLiteState(
+        db_file=config.app.get("state_db_file", ""),
+        flush_interval=float(config.app.get("state_flush_interval", 1.0)),
+        retention_days=float(config.app.get("state_retention_days", 30)),
+    )
+else:
+    state = MemoryState()
@@ -1,15 +1,17 @@
 import json
+import math
 import os.path
-import re
 from timeit import default_timer as timer
 
 try:
     from faster_whisper import WhisperModel
 except ImportError:
     WhisperModel = None
+import numpy as np
 from loguru import logger
 
 from app.config import config
+from app.services.utils.subtitle_track import SubtitleTrack
 from app.utils import utils
 
 model_size = config.whisper.get("model_size", "large-v3")
@@ -18,47 +20,44 @@ compute_type = config.whisper.get("compute_type", "int8")
 model = None
 
 
-def create(audio_file, subtitle_file: str = ""):
-    global model
-    # Reload config params
-    config.reload()
-    global model_size, device, compute_type
-    model_size = config.whisper.get("model_size", "large-v3")
-    device = config.whisper.get("device", "cpu")
-    compute_type = config.whisper.get("compute_type", "int8")
-    
+def load_model(model_size: str, device: str, compute_type: str, cpu_threads: int = 0):
     if WhisperModel is None:
         logger.warning("faster_whisper not available, skipping whisper subtitle generation")
-        return ""
-    if not model:
-        model_path = f"{utils.root_dir()}/models/whisper-{model_size}"
-        model_bin_file = f"{model_path}/model.bin"
-        if not os.path.isdir(model_path) or not os.path.isfile(model_bin_file):
-            model_path = model_size
-
-        logger.info(
-            f"loading model: {model_path}, device: {device}, compute_type: {compute_type}"
+        return None
+
+    model_path = f"{utils.root_dir()}/models/whisper-{model_size}"
+    model_bin_file = f"{model_path}/model.bin"
+    if not os.path.isdir(model_path) or not os.path.isfile(model_bin_file):
+        model_path = model_size
+
+    logger.info(
+        f"loading model: {model_path}, device: {device}, compute_type: {compute_type}"
+    )
+    try:
+        return WhisperModel(
+            model_size_or_path=model_path,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
         )
-        try:
-            model = WhisperModel(
-                model_size_or_path=model_path, device=device, compute_type=compute_type
-            )
-        except Exception as e:
-            logger.error(
-                f"failed to load model: {e} \n\n"
-                f"********************************************\n"
-                f"this may be caused by network issue. \n"
-                f"please download the model manually and put it in the 'models' folder. \n"
-                f"see [README.md FAQ](https://github.com/harry0703/MoneyPrinterTurbo) for more details.\n"
-                f"********************************************\n\n"
-            )
-            return None
+    except Exception as e:
+        logger.error(
+            f"failed to load model: {e} \n\n"
+            f"********************************************\n"
+            f"this may be caused by network issue. \n"
+            f"please download the model manually and put it in the 'models' folder. \n"
+            f"see [README.md FAQ](https://github.com/harry0703/MoneyPrinterTurbo) for more details.\n"
+            f"********************************************\n\n"
+        )
+        return None
 
-    logger.info(f"start, output file: {subtitle_file}")
-    if not subtitle_file:
-        subtitle_file = f"{audio_file}.srt"
 
-    segments, info = model.transcribe(
+def transcribe(whisper_model, audio_file: str) -> list:
+    """
+    Transcribe the audio file, returns the recognized sentences as
+    [{"msg": text, "start_time": seconds, "end_time": seconds}, ...]
+    """
+    segments, info = whisper_model.transcribe(
         audio_file,
         beam_size=5,
         word_timestamps=True,
@@ -130,162 +129,296 @@ def create(audio_file, subtitle_file: str = ""):
 
     diff = end - start
     logger.info(f"complete, elapsed: {diff:.2f} s")
+    return subtitles
 
-    idx = 1
-    lines = []
-    for subtitle in subtitles:
-        text = subtitle.get("msg")
-        if text:
-            lines.append(
-                utils.text_to_srt(
-                    idx, text, subtitle.get("start_time"), subtitle.get("end_time")
-                )
+
+def create(audio_file, subtitle_file: str = ""):
+    """
+    Create a subtitle file from the audio with whisper.
+    The transcription runs in the resident worker processes (whisper.workers),
+    or in this process when workers = 0.
+    Returns the subtitle file, or an empty string if whisper is not available.
+    """
+    global model, model_size, device, compute_type
+    config.reload_if_changed()
+
+    logger.info(f"start, output file: {subtitle_file}")
+    if not subtitle_file:
+        subtitle_file = f"{audio_file}.srt"
+
+    if int(config.whisper.get("workers", 1)) > 0:
+        from app.services.whisper_worker import whisper_pool
+
+        subtitles = whisper_pool.transcribe(audio_file)
+    else:
+        settings = (
+            config.whisper.get("model_size", "large-v3"),
+            config.whisper.get("device", "cpu"),
+            config.whisper.get("compute_type", "int8"),
+        )
+        if not model or settings != (model_size, device, compute_type):
+            model_size, device, compute_type = settings
+            model = load_model(
+                model_size, device, compute_type, int(config.whisper.get("cpu_threads", 4))
             )
-            idx += 1
+        subtitles = transcribe(model, audio_file) if model else None
 
-    sub = "\n".join(lines) + "\n"
-    with open(subtitle_file, "w", encoding="utf-8") as f:
-        f.write(sub)
+    if subtitles is None:
+        return ""
+
+    track = SubtitleTrack.from_cues(
+        (subtitle.get("start_time"), subtitle.get("end_time"), subtitle.get("msg"))
+        for subtitle in subtitles
+        if subtitle.get("msg")
+    )
+    track.save(subtitle_file)
     logger.info(f"subtitle file created: {subtitle_file}")
+    return subtitle_file
 
 
 def file_to_subtitles(filename):
-    if not filename or not os.path.isfile(filename):
-        return []
-
-    times_texts = []
-    current_times = None
-    current_text = ""
-    index = 0
-    with open(filename, "r", encoding="utf-8") as f:
-        for line in f:
-            times = re.findall("([0-9]*:[0-9]*:[0-9]*,[0-9]*)", line)
-            if times:
-                current_times = line
-            elif line.strip() == "" and current_times:
-                index += 1
-                times_texts.append((index, current_times.strip(), current_text.strip()))
-                current_times, current_text = None, ""
-            elif current_times:
-                current_text += line
-    return times_texts
-
-
-def levenshtein_distance(s1, s2):
+    """
+    [(index, "00:00:00,000 --> 00:00:02,360", text), ...]
+    """
+    return SubtitleTrack.load(filename).items()
+
+
+# Most recognized segments merged into one script line
+MAX_MERGED_SEGMENTS = 4
+# Below this similarity a script line and the recognized text are not the same sentence
+MIN_SIMILARITY = 0.5
+# How far (in segments) the alignment may drift from the diagonal of script lines vs segments
+ALIGNMENT_BAND = 12
+# Alignments scoring this much below the best one of the same script line are abandoned
+ALIGNMENT_MARGIN = 0.5
+# Cost of a recognized segment that does not belong to any script line
+SKIP_PENALTY = 0.1
+
+
+def levenshtein_distance(s1, s2, max_distance: int = -1):
+    """
+    Edit distance between two strings, computed with the bit-parallel algorithm
+    of Myers / Hyyrö: one column of the DP matrix per character of s2, packed into
+    a Python int, so the cost is O(len(s2)) big-int operations instead of O(n·m).
+    With max_distance >= 0, max_distance + 1 is returned as soon as the distance
+    is known to exceed it.
+    """
     if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
+        return levenshtein_distance(s2, s1, max_distance)
 
     if len(s2) == 0:
         return len(s1)
 
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-
-    return previous_row[-1]
-
-
-def similarity(a, b):
-    distance = levenshtein_distance(a.lower(), b.lower())
+    if 0 <= max_distance < len(s1) - len(s2):
+        return max_distance + 1
+
+    peq = {}
+    for i, c in enumerate(s1):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << len(s1)) - 1
+    last = 1 << (len(s1) - 1)
+    pv, mv, distance = mask, 0, len(s1)
+    for c in s2:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+
+    if 0 <= max_distance < distance:
+        return max_distance + 1
+    return distance
+
+
+def similarity(a, b, min_similarity: float = 0.0):
+    """
+    1 - normalized edit distance. Values below min_similarity are not computed
+    exactly (the banded distance stops early) and returned as 0.
+    """
     max_length = max(len(a), len(b))
-    return 1 - (distance / max_length)
+    if max_length == 0:
+        return 1.0
+    max_distance = int(max_length * (1 - min_similarity)) if min_similarity > 0 else -1
+    distance = levenshtein_distance(a.lower(), b.lower(), max_distance)
+    score = 1 - (distance / max_length)
+    return score if score >= min_similarity else 0.0
+
+
+def align(script_lines, segments):
+    """
+    Global alignment of script lines with recognized segments.
+    Every script line is matched with a run of consecutive segments (at most
+    MAX_MERGED_SEGMENTS, or twice the segments per line when the segments are
+    shorter than the lines), or with none; segments may be left unused. The total similarity of
+    the matched pairs is maximized by dynamic programming. Only a band around the
+    diagonal is visited and paths falling behind the best one of their row by more
+    than ALIGNMENT_MARGIN are dropped, so the cost is linear in the number of lines.
+    Returns a (first segment, segment count) tuple or None for every script line.
+    """
+    n, m = len(script_lines), len(segments)
+    if n == 0:
+        return []
+    ratio = m / n
+    # short segments (single words) or a script without punctuation need more segments per line
+    max_merged = max(MAX_MERGED_SEGMENTS, math.ceil(2 * ratio))
+    band = max(ALIGNMENT_BAND, max_merged)
+    script_texts = [line.strip().lower() for line in script_lines]
+    segment_texts = [segment.strip().lower() for segment in segments]
+
+    # character histograms, the characters that do not pair up between two texts
+    # are a lower bound of their edit distance and are cheap to compare
+    vocabulary = {c: idx for idx, c in enumerate(sorted(set("".join(script_texts + segment_texts)) | {" "}))}
+
+    def histogram(texts):
+        counts = np.zeros((len(texts), len(vocabulary)), dtype=np.int32)
+        for row, text in enumerate(texts):
+            for c in text:
+                counts[row, vocabulary[c]] += 1
+        return counts
+
+    script_counts = histogram(script_texts)
+    segment_cumulative = np.vstack(
+        [np.zeros((1, len(vocabulary)), dtype=np.int32), np.cumsum(histogram(segment_texts), axis=0)]
+    )
+    space = vocabulary[" "]
+    scores = {}
+
+    def score(i, j, k, needed=0.0):
+        """
+        Similarity of script line i with segments j..j+k-1, 0 if below MIN_SIMILARITY.
+        The exact distance is skipped (0 is returned) when even the histogram bound
+        cannot exceed `needed`.
+        """
+        key = (i, j, k)
+        if key in scores:
+            return scores[key]
+        combined = " ".join(segment_texts[j : j + k])
+        max_length = max(len(combined), len(script_texts[i]), 1)
+        if combined == script_texts[i]:
+            scores[key] = 1.0
+            return 1.0
+        diff = segment_cumulative[j + k] - segment_cumulative[j] - script_counts[i]
+        diff[space] += k - 1
+        bound = 1 - max(diff[diff > 0].sum(), -diff[diff < 0].sum()) / max_length
+        if bound < MIN_SIMILARITY:
+            scores[key] = 0.0
+            return 0.0
+        if bound <= needed:
+            return 0.0
+        scores[key] = similarity(script_texts[i], combined, MIN_SIMILARITY)
+        return scores[key]
+
+    rows = [{} for _ in range(n + 1)]
+    row_best = [-np.inf] * (n + 1)
+    rows[0][0] = row_best[0] = 0.0
+    back = {}
+
+    def relax(i, j, value, source, move):
+        if abs(j - i * ratio) <= band and value > rows[i].get(j, -np.inf):
+            rows[i][j] = value
+            row_best[i] = max(row_best[i], value)
+            back[(i, j)] = (source, move)
+
+    for i in range(n + 1):
+        row = rows[i]
+        j = min(row, default=m + 1)
+        while j <= m and j <= max(row):
+            value = row.get(j)
+            if value is None or value < row_best[i] - ALIGNMENT_MARGIN:
+                j += 1
+                continue
+            if i < n:
+                for k in range(1, min(max_merged, m - j) + 1):
+                    # what the similarity has to beat for this path to survive
+                    needed = max(rows[i + 1].get(j + k, -np.inf), row_best[i + 1] - ALIGNMENT_MARGIN) - value
+                    s = score(i, j, k, needed)
+                    if s > 0:
+                        relax(i + 1, j + k, value + s, (i, j), k)
+                    elif len(" ".join(segment_texts[j : j + k])) > len(script_texts[i]):
+                        # merging more segments only makes the text longer
+                        break
+                # script line without a recognized segment
+                relax(i + 1, j, value, (i, j), 0)
+            if j < m:
+                # recognized segment without a script line
+                relax(i, j + 1, value - SKIP_PENALTY, (i, j), -1)
+            j += 1
+
+    matches = [None] * n
+    if not rows[n]:
+        # no path covers all the script lines, leave them all to be spread over the segments
+        return matches
+    # the segments after the end of the path are left unused
+    end = max(rows[n], key=lambda j: rows[n][j] - SKIP_PENALTY * (m - j))
+    state = (n, end)
+    while state != (0, 0):
+        source, move = back[state]
+        if move > 0:
+            matches[source[0]] = (source[1], move)
+        state = source
+    return matches
 
 
 def correct(subtitle_file, video_script):
-    subtitle_items = file_to_subtitles(subtitle_file)
-    script_lines = utils.split_string_by_punctuations(video_script)
-
-    corrected = False
-    new_subtitle_items = []
-    script_index = 0
-    subtitle_index = 0
-
-    while script_index < len(script_lines) and subtitle_index < len(subtitle_items):
-        script_line = script_lines[script_index].strip()
-        subtitle_line = subtitle_items[subtitle_index][2].strip()
-
-        if script_line == subtitle_line:
-            new_subtitle_items.append(subtitle_items[subtitle_index])
-            script_index += 1
-            subtitle_index += 1
-        else:
-            combined_subtitle = subtitle_line
-            start_time = subtitle_items[subtitle_index][1].split(" --> ")[0]
-            end_time = subtitle_items[subtitle_index][1].split(" --> ")[1]
-            next_subtitle_index = subtitle_index + 1
-
-            while next_subtitle_index < len(subtitle_items):
-                next_subtitle = subtitle_items[next_subtitle_index][2].strip()
-                if similarity(
-                    script_line, combined_subtitle + " " + next_subtitle
-                ) > similarity(script_line, combined_subtitle):
-                    combined_subtitle += " " + next_subtitle
-                    end_time = subtitle_items[next_subtitle_index][1].split(" --> ")[1]
-                    next_subtitle_index += 1
-                else:
-                    break
-
-            if similarity(script_line, combined_subtitle) > 0.8:
+    track = SubtitleTrack.load(subtitle_file)
+    script_lines = [line for line in utils.split_string_by_punctuations(video_script) if line.strip()]
+    if not script_lines:
+        return
+
+    matches = align(script_lines, track.texts)
+
+    starts, ends = [], []
+    i = 0
+    while i < len(script_lines):
+        if matches[i]:
+            j, k = matches[i]
+            combined_subtitle = " ".join(text.strip() for text in track.texts[j : j + k])
+            if combined_subtitle != script_lines[i].strip():
                 logger.warning(
-                    f"Merged/Corrected - Script: {script_line}, Subtitle: {combined_subtitle}"
+                    f"Merged/Corrected - Script: {script_lines[i]}, Subtitle: {combined_subtitle}"
                 )
-                new_subtitle_items.append(
-                    (
-                        len(new_subtitle_items) + 1,
-                        f"{start_time} --> {end_time}",
-                        script_line,
-                    )
-                )
-                corrected = True
-            else:
-                logger.warning(
-                    f"Mismatch - Script: {script_line}, Subtitle: {combined_subtitle}"
-                )
-                new_subtitle_items.append(
-                    (
-                        len(new_subtitle_items) + 1,
-                        f"{start_time} --> {end_time}",
-                        script_line,
-                    )
-                )
-                corrected = True
-
-            script_index += 1
-            subtitle_index = next_subtitle_index
-
-    # Process the remaining lines of the script.
-    while script_index < len(script_lines):
-        logger.warning(f"Extra script line: {script_lines[script_index]}")
-        if subtitle_index < len(subtitle_items):
-            new_subtitle_items.append(
-                (
-                    len(new_subtitle_items) + 1,
-                    subtitle_items[subtitle_index][1],
-                    script_lines[script_index],
-                )
-            )
-            subtitle_index += 1
-        else:
-            new_subtitle_items.append(
-                (
-                    len(new_subtitle_items) + 1,
-                    "00:00:00,000 --> 00:00:00,000",
-                    script_lines[script_index],
-                )
-            )
-        script_index += 1
-        corrected = True
+            starts.append(int(track.starts[j]))
+            ends.append(int(track.ends[j + k - 1]))
+            i += 1
+            continue
 
-    if corrected:
-        with open(subtitle_file, "w", encoding="utf-8") as fd:
-            for i, item in enumerate(new_subtitle_items):
-                fd.write(f"{i + 1}\n{item[1]}\n{item[2]}\n\n")
+        # a run of script lines that were not recognized: spread them over the unused
+        # segments between the neighbouring matches, or over the gap between them
+        run_end = i
+        while run_end < len(script_lines) and not matches[run_end]:
+            run_end += 1
+        previous = matches[i - 1] if i > 0 else None
+        following = matches[run_end] if run_end < len(script_lines) else None
+        first_unused = previous[0] + previous[1] if previous else 0
+        last_unused = following[0] if following else len(track)
+        if first_unused < last_unused:
+            span_start = int(track.starts[first_unused])
+            span_end = int(track.ends[last_unused - 1])
+        else:
+            span_start = int(track.ends[first_unused - 1]) if first_unused > 0 else 0
+            span_end = int(track.starts[last_unused]) if following else span_start
+
+        run = script_lines[i:run_end]
+        total_chars = sum(len(line) for line in run)
+        offset = 0
+        for line in run:
+            logger.warning(f"Mismatch - Script: {line}")
+            starts.append(span_start + (span_end - span_start) * offset // total_chars)
+            offset += len(line)
+            ends.append(span_start + (span_end - span_start) * offset // total_chars)
+        i = run_end
+
+    corrected_track = SubtitleTrack(starts, ends, script_lines)
+    if corrected_track.to_srt() != track.to_srt():
+        corrected_track.save(subtitle_file)
         logger.info("Subtitle corrected")
     else:
         logger.success("Subtitle is correct")
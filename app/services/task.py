@@ -8,8 +8,9 @@ from loguru import logger
 from app.config import config
 from app.models import const
 from app.models.schema import VideoConcatMode, VideoParams
+from app.services import library as lib
 from app.services import llm, material, subtitle, video, voice
-from app.services import state as sm
+from app.services.progress import progress_reporter
 from app.utils import utils
 
 
@@ -35,7 +36,7 @@ def generate_script(task_id, params):
             logger.debug(f"video script: \n{video_script}")
 
     if not video_script:
-        sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED)
         logger.error("failed to generate video script.")
         return None
 
@@ -60,7 +61,7 @@ def generate_terms(task_id, params, video_script):
         logger.debug(f"video terms: {utils.to_json(video_terms)}")
 
     if not video_terms:
-        sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED)
         logger.error("failed to generate video terms.")
         return None
 
@@ -107,7 +108,7 @@ def generate_audio(task_id, params, video_script):
             voice_file=audio_file,
         )
         if sub_maker is None:
-            sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
+            progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED)
             logger.error(
                 """failed to generate audio:
 1. check if the language of the voice matches the language of the video script.
@@ -117,7 +118,7 @@ def generate_audio(task_id, params, video_script):
             return None, None, None
         audio_duration = math.ceil(voice.get_audio_duration(sub_maker))
         if audio_duration == 0:
-            sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
+            progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED)
             logger.error("failed to get audio duration.")
             return None, None, None
         return audio_file, audio_duration, sub_maker
@@ -125,11 +126,69 @@ def generate_audio(task_id, params, video_script):
         logger.info(f"using custom audio file: {custom_audio_file}")
         audio_duration = voice.get_audio_duration(custom_audio_file)
         if audio_duration == 0:
-            sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
+            progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED)
             logger.error("failed to get audio duration from custom audio file.")
             return None, None, None
         return custom_audio_file, audio_duration, None
 
+def can_stream_script_audio(params, stop_at: str = "video") -> bool:
+    """
+    Whether the script can be streamed straight into TTS: the script is written by
+    the llm, the audio is synthesized by edge-tts and the audio is actually needed.
+    """
+    if not config.app.get("tts_streaming", False):
+        return False
+    if stop_at in ["script", "terms"]:
+        return False
+    if params.custom_audio_file and os.path.exists(params.custom_audio_file):
+        return False
+    use_auto = config.ui.get("auto_script_enabled", True)
+    if not use_auto and params.video_script.strip():
+        return False
+    return voice.is_edge_voice(voice.parse_voice_name(params.voice_name))
+
+
+def generate_script_and_audio(task_id, params):
+    """
+    Stream the script from the llm into TTS sentence by sentence,
+    synthesis starts with the first sentence instead of after the whole script.
+    Returns (video_script, (audio_file, audio_duration, sub_maker)), the audio part
+    is None if the synthesis failed. Raises if the llm fails or answers with an error,
+    the caller then falls back to generate_script (with its retries).
+    """
+    logger.info("\n\n## generating video script and audio (streaming)")
+    sentences = []
+
+    def script_sentences():
+        for sentence in llm.generate_script_stream(
+            video_subject=params.video_subject,
+            language=params.video_language,
+            paragraph_number=params.paragraph_number,
+        ):
+            # the check start() applies to the whole script, before the sentence is spoken
+            if "Error: " in sentence:
+                raise ValueError(f"llm returned an error: {sentence.strip()}")
+            sentences.append(sentence)
+            yield sentence
+
+    audio_file = path.join(utils.task_dir(task_id), "audio.mp3")
+    sub_maker = voice.tts_stream(
+        sentences=script_sentences(),
+        voice_name=params.voice_name,
+        voice_rate=params.voice_rate,
+        voice_file=audio_file,
+    )
+    video_script = llm.join_script_sentences(sentences)
+    logger.debug(f"video script: \n{video_script}")
+    if sub_maker is None:
+        return video_script, None
+
+    audio_duration = math.ceil(voice.get_audio_duration(sub_maker))
+    if audio_duration == 0:
+        return video_script, None
+    return video_script, (audio_file, audio_duration, sub_maker)
+
+
 def generate_subtitle(task_id, params, video_script, sub_maker, audio_file):
     '''
     Generate subtitle for the video script.
@@ -159,12 +218,17 @@ def generate_subtitle(task_id, params, video_script, sub_maker, audio_file):
                 logger.warning("subtitle file not found or empty, fallback to whisper")
 
     if subtitle_provider == "whisper" or subtitle_fallback:
-        # Whisper fallback disabled for stability
-        logger.warning("Whisper subtitle generation skipped to prevent system hang.")
-        return ""
-        # subtitle.create(audio_file=audio_file, subtitle_file=subtitle_path)
-        # logger.info("\n\n## correcting subtitle")
-        # subtitle.correct(subtitle_file=subtitle_path, video_script=video_script)
+        # whisper runs in its own worker processes, a hang or crash only costs this subtitle
+        try:
+            subtitle_file = subtitle.create(audio_file=audio_file, subtitle_file=subtitle_path)
+        except Exception as e:
+            logger.error(f"whisper subtitle generation failed: {str(e)}")
+            subtitle_file = ""
+        if not subtitle_file:
+            logger.warning("whisper subtitle generation failed, skipping subtitle")
+            return ""
+        logger.info("\n\n## correcting subtitle")
+        subtitle.correct(subtitle_file=subtitle_path, video_script=video_script)
 
     subtitle_lines = subtitle.file_to_subtitles(subtitle_path)
     if not subtitle_lines:
@@ -176,8 +240,10 @@ def generate_subtitle(task_id, params, video_script, sub_maker, audio_file):
     return subtitle_path
 
 
-def get_video_materials(task_id, params, video_terms, audio_duration, script=None):
-    if params.video_source == "local":
+def get_video_materials(task_id, params, video_terms, audio_duration, script=None, video_source=""):
+    # video_source overrides params.video_source (library fallback) without changing the caller's params
+    video_source = video_source or params.video_source
+    if video_source == "local":
         logger.info("\n\n## preprocess local materials")
         if not params.video_materials:
             logger.warning("no local materials provided, will use solid background fallback")
@@ -186,25 +252,41 @@ def get_video_materials(task_id, params, video_terms, audio_duration, script=Non
             materials=params.video_materials, clip_duration=params.video_clip_duration
         )
         if not materials:
-            sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
+            progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED)
             logger.error(
                 "no valid materials found, please check the materials and try again."
             )
             return None
         return [material_info.url for material_info in materials]
+    elif video_source == "library":
+        logger.info("\n\n## selecting videos from the local library")
+        library_videos = lib.library.select_videos(
+            search_terms=video_terms,
+            video_aspect=params.video_aspect,
+            audio_duration=audio_duration * params.video_count,
+            max_clip_duration=params.video_clip_duration,
+        )
+        if library_videos:
+            return library_videos
+
+        fallback_source = config.app.get("video_source", "pexels")
+        if fallback_source not in ["pexels", "pixabay"]:
+            fallback_source = "pexels"
+        logger.warning(f"no matching videos in the library, downloading from {fallback_source}")
+        return get_video_materials(task_id, params, video_terms, audio_duration, script, fallback_source)
     else:
-        logger.info(f"\n\n## downloading videos from {params.video_source}")
+        logger.info(f"\n\n## downloading videos from {video_source}")
         downloaded_videos = material.download_videos(
             task_id=task_id,
             search_terms=video_terms,
-            source=params.video_source,
+            source=video_source,
             video_aspect=params.video_aspect,
             video_contact_mode=params.video_concat_mode,
             audio_duration=audio_duration * params.video_count,
             max_clip_duration=params.video_clip_duration,
         )
         if not downloaded_videos:
-            sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
+            progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED)
             logger.error(
                 "failed to download videos, maybe the network is not available. if you are in China, please use a VPN."
             )
@@ -226,7 +308,7 @@ def generate_final_videos(
     for i in range(params.video_count):
         index = i + 1
         
-        sm.state.update_task(task_id, progress=_progress, message=f"영상 클립 병합 중 ({index}/{params.video_count})...")
+        progress_reporter.update_task(task_id, progress=_progress, message=f"영상 클립 병합 중 ({index}/{params.video_count})...")
         
         combined_video_path = path.join(
             utils.task_dir(task_id), f"combined-{index}.mp4"
@@ -241,7 +323,7 @@ def generate_final_videos(
         def combine_progress_callback(percent):
             # percent is 0-100
             current_p = start_progress + (percent / 100) * step_progress_size
-            sm.state.update_task(task_id, progress=current_p, message=f"영상 클립 병합 중 ({index}/{params.video_count}) - {percent}%")
+            progress_reporter.update_task(task_id, progress=current_p, message=f"영상 클립 병합 중 ({index}/{params.video_count}) - {percent}%")
 
         video.combine_videos(
             combined_video_path=combined_video_path,
@@ -256,7 +338,7 @@ def generate_final_videos(
         )
 
         _progress += step_progress_size
-        sm.state.update_task(task_id, progress=_progress, message=f"최종 영상 렌더링 중 ({index}/{params.video_count}) - 몇 분 정도 걸릴 수 있습니다...")
+        progress_reporter.update_task(task_id, progress=_progress, message=f"최종 영상 렌더링 중 ({index}/{params.video_count}) - 몇 분 정도 걸릴 수 있습니다...")
 
         final_video_path = path.join(utils.task_dir(task_id), f"final-{index}.mp4")
 
@@ -270,7 +352,7 @@ def generate_final_videos(
         )
 
         _progress += 50 / params.video_count / 2
-        sm.state.update_task(task_id, progress=_progress, message=f"영상 {index} 준비 완료.")
+        progress_reporter.update_task(task_id, progress=_progress, message=f"영상 {index} 준비 완료.")
 
         final_video_paths.append(final_video_path)
         combined_video_paths.append(combined_video_path)
@@ -280,22 +362,32 @@ def generate_final_videos(
 
 def start(task_id, params: VideoParams, stop_at: str = "video"):
     logger.info(f"start task: {task_id}, stop_at: {stop_at}")
-    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=5, message="작업 시작 중...")
+    progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=5, message="작업 시작 중...")
 
     if type(params.video_concat_mode) is str:
         params.video_concat_mode = VideoConcatMode(params.video_concat_mode)
 
     # 1. Generate script
-    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=5, message="영상 대본 생성 중...")
-    video_script = generate_script(task_id, params)
+    progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=5, message="영상 대본 생성 중...")
+    streamed_audio = None
+    if can_stream_script_audio(params, stop_at):
+        try:
+            video_script, streamed_audio = generate_script_and_audio(task_id, params)
+        except Exception as e:
+            logger.error(f"failed to stream script into audio: {e}")
+            video_script = ""
+        if not video_script:
+            video_script = generate_script(task_id, params)
+    else:
+        video_script = generate_script(task_id, params)
     if not video_script or "Error: " in video_script:
-        sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, message="대본 생성 실패")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED, message="대본 생성 실패")
         return
 
-    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=10, message="대본 생성 완료")
+    progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=10, message="대본 생성 완료")
 
     if stop_at == "script":
-        sm.state.update_task(
+        progress_reporter.update_task(
             task_id, state=const.TASK_STATE_COMPLETE, progress=100, script=video_script, message="대본 생성 완료"
         )
         return {"script": video_script}
@@ -303,7 +395,7 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
     # 2. Generate terms
     video_terms = ""
     if params.video_source != "local":
-        sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=12, message="영상 키워드 생성 중...")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=12, message="영상 키워드 생성 중...")
         try:
             video_terms = generate_terms(task_id, params, video_script)
         except Exception as e:
@@ -312,34 +404,37 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
         if not video_terms:
             logger.warning("Keywords generation failed, using subject as fallback.")
             video_terms = [params.video_subject]
-        sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=15, message=f"키워드: {', '.join(video_terms[:3])}...")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=15, message=f"키워드: {', '.join(video_terms[:3])}...")
     else:
         video_terms = [] # Local source doesn't need search terms
 
     save_script_data(task_id, video_script, video_terms, params)
 
     if stop_at == "terms":
-        sm.state.update_task(
+        progress_reporter.update_task(
             task_id, state=const.TASK_STATE_COMPLETE, progress=100, terms=video_terms, message="키워드 생성 완료"
         )
         return {"script": video_script, "terms": video_terms}
 
-    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=20, message="오디오 생성 중...")
+    progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=20, message="오디오 생성 중...")
 
     # 3. Generate audio
-    logger.info("Calling generate_audio...")
-    audio_file, audio_duration, sub_maker = generate_audio(
-        task_id, params, video_script
-    )
+    if streamed_audio:
+        audio_file, audio_duration, sub_maker = streamed_audio
+    else:
+        logger.info("Calling generate_audio...")
+        audio_file, audio_duration, sub_maker = generate_audio(
+            task_id, params, video_script
+        )
     logger.info(f"generate_audio returned: {audio_file}, {audio_duration}")
     if not audio_file:
-        sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, message="오디오 생성 실패")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED, message="오디오 생성 실패")
         return
 
-    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=30, message="자막 생성 중...")
+    progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=30, message="자막 생성 중...")
 
     if stop_at == "audio":
-        sm.state.update_task(
+        progress_reporter.update_task(
             task_id,
             state=const.TASK_STATE_COMPLETE,
             progress=100,
@@ -354,7 +449,7 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
     )
 
     if stop_at == "subtitle":
-        sm.state.update_task(
+        progress_reporter.update_task(
             task_id,
             state=const.TASK_STATE_COMPLETE,
             progress=100,
@@ -363,18 +458,18 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
         )
         return {"subtitle_path": subtitle_path}
 
-    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=40, message="영상 자료 준비 중...")
+    progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=40, message="영상 자료 준비 중...")
 
     # 5. Get video materials
     downloaded_videos = get_video_materials(
         task_id, params, video_terms, audio_duration, video_script
     )
     if not downloaded_videos:
-        sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, message="자료 준비 실패")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED, message="자료 준비 실패")
         return
 
     if stop_at == "materials":
-        sm.state.update_task(
+        progress_reporter.update_task(
             task_id,
             state=const.TASK_STATE_COMPLETE,
             progress=100,
@@ -383,7 +478,7 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
         )
         return {"materials": downloaded_videos}
 
-    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=50, message="영상 합성 중 (시간이 다소 소요될 수 있습니다)...")
+    progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=50, message="영상 합성 중 (시간이 다소 소요될 수 있습니다)...")
 
     # 6. Generate final videos
     final_video_paths, combined_video_paths = generate_final_videos(
@@ -391,7 +486,7 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
     )
 
     if not final_video_paths:
-        sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, message="영상 생성 실패")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED, message="영상 생성 실패")
         return
 
     logger.success(
@@ -408,7 +503,7 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
         "subtitle_path": subtitle_path,
         "materials": downloaded_videos,
     }
-    sm.state.update_task(
+    progress_reporter.update_task(
         task_id, state=const.TASK_STATE_COMPLETE, progress=100, message="영상 생성 완료", **kwargs
     )
     return kwargs
@@ -429,7 +524,7 @@ def generate_longform_video(task_id, params):
     
     try:
         # 1. 롱폼 대본 생성
-        sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=10, message="롱폼 대본 생성 중...")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=10, message="롱폼 대본 생성 중...")
         
         longform_script = llm.generate_longform_script(
             video_subject=params.video_subject,
@@ -438,11 +533,11 @@ def generate_longform_video(task_id, params):
         )
         
         if not longform_script or "실패" in longform_script:
-            sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, message="롱폼 대본 생성 실패")
+            progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED, message="롱폼 대본 생성 실패")
             return None
         
         # 2. 대본을 세그먼트로 분할
-        sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=20, message="대본 세그먼트 분할 중...")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=20, message="대본 세그먼트 분할 중...")
         
         segments = llm.split_longform_script(longform_script, segment_duration=3)
         logger.info(f"Created {len(segments)} segments for long-form video")
@@ -453,7 +548,7 @@ def generate_longform_video(task_id, params):
         
         for i, segment in enumerate(segments):
             logger.info(f"\n## Processing segment {i+1}/{len(segments)}")
-            sm.state.update_task(
+            progress_reporter.update_task(
                 task_id, 
                 state=const.TASK_STATE_PROCESSING, 
                 progress=30 + (i * 50 // len(segments)), 
@@ -480,16 +575,16 @@ def generate_longform_video(task_id, params):
                 segment_audios.append(segment_result['audio'])
             else:
                 logger.error(f"Failed to generate segment {i+1}")
-                sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, message=f"세그먼트 {i+1} 생성 실패")
+                progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED, message=f"세그먼트 {i+1} 생성 실패")
                 return None
         
         # 4. 모든 세그먼트 병합
-        sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=85, message="세그먼트 병합 중...")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=85, message="세그먼트 병합 중...")
         
         final_video = merge_longform_segments(task_id, segment_videos, params)
         
         if final_video:
-            sm.state.update_task(
+            progress_reporter.update_task(
                 task_id, 
                 state=const.TASK_STATE_COMPLETE, 
                 progress=100, 
@@ -499,12 +594,12 @@ def generate_longform_video(task_id, params):
             logger.success(f"Long-form video generation completed: {final_video}")
             return final_video
         else:
-            sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, message="세그먼트 병합 실패")
+            progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED, message="세그먼트 병합 실패")
             return None
             
     except Exception as e:
         logger.error(f"Long-form video generation failed: {e}")
-        sm.state.update_task(task_id, state=const.TASK_STATE_FAILED, message=f"롱폼 영상 생성 오류: {e}")
+        progress_reporter.update_task(task_id, state=const.TASK_STATE_FAILED, message=f"롱폼 영상 생성 오류: {e}")
         return None
 
 
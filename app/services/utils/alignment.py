@@ -0,0 +1,108 @@
+"""
+Lightweight sentence alignment for TTS output
+A short-time energy envelope of the speech is used to find pauses, and the
+sentence boundaries estimated from character counts are snapped to the
+nearest pause. Far cheaper than running Whisper on the generated audio.
+"""
+
+import subprocess
+from typing import List, Tuple
+
+import numpy as np
+from imageio_ffmpeg import get_ffmpeg_exe
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+# Frames quieter than this (relative to the loud frames of the clip) are silence
+SILENCE_DB = 30
+# Shortest silence that counts as a pause between sentences
+MIN_PAUSE_SECONDS = 0.12
+
+
+def decode_audio(audio_file: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an audio file to mono float32 samples with ffmpeg.
+    """
+    result = subprocess.run(
+        [get_ffmpeg_exe(), "-v", "error", "-i", audio_file, "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def energy_envelope(samples: np.ndarray, sample_rate: int, frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """
+    Energy of every frame in dB.
+    """
+    frame = max(1, int(sample_rate * frame_seconds))
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[: count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(rms + 1e-10)
+
+
+def find_pauses(
+    samples: np.ndarray, sample_rate: int, min_pause: float = MIN_PAUSE_SECONDS
+) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    Returns (speech_start, speech_end, pauses) in seconds,
+    pauses are the silent (start, end) intervals between speech.
+    """
+    envelope = energy_envelope(samples, sample_rate)
+    if not len(envelope):
+        return 0.0, 0.0, []
+
+    # the floor of the loud frames, robust against a few clicks
+    threshold = np.percentile(envelope, 95) - SILENCE_DB
+    voiced = envelope > threshold
+    indices = np.flatnonzero(voiced)
+    if not len(indices):
+        return 0.0, len(samples) / sample_rate, []
+
+    first, last = indices[0], indices[-1]
+    # edges of the silent runs inside the speech
+    changes = np.flatnonzero(np.diff(voiced[first : last + 1].astype(np.int8))) + first + 1
+    pauses = []
+    for start, end in zip(changes[::2], changes[1::2]):
+        if (end - start) * FRAME_SECONDS >= min_pause:
+            pauses.append((float(start * FRAME_SECONDS), float(end * FRAME_SECONDS)))
+    return float(first * FRAME_SECONDS), float((last + 1) * FRAME_SECONDS), pauses
+
+
+def align_sentences(sentences: List[str], samples: np.ndarray, sample_rate: int) -> List[Tuple[float, float]]:
+    """
+    (start, end) in seconds of every sentence.
+    Each boundary is first estimated from the share of characters left between the
+    previous boundary and the end of the speech, then moved to the closest pause
+    within reach, so estimation errors do not accumulate over a long script.
+    """
+    if not sentences:
+        return []
+    speech_start, speech_end, pauses = find_pauses(samples, sample_rate)
+    if speech_end <= speech_start:
+        speech_start, speech_end = 0.0, len(samples) / sample_rate
+
+    weights = [max(1, len("".join(s.split()))) for s in sentences]
+    timings = []
+    start = speech_start
+    for i, weight in enumerate(weights):
+        if i == len(weights) - 1:
+            timings.append((start, speech_end))
+            break
+        remaining = sum(weights[i:])
+        expected = start + (speech_end - start) * weight / remaining
+        # a pause can be picked if it is not further than the estimated sentence length away
+        reach = max(0.3, expected - start)
+        candidates = [p for p in pauses if p[0] > start and abs((p[0] + p[1]) / 2 - expected) <= reach]
+        if candidates:
+            pause = min(candidates, key=lambda p: abs((p[0] + p[1]) / 2 - expected))
+            timings.append((start, pause[0]))
+            start = pause[1]
+        else:
+            timings.append((start, expected))
+            start = expected
+    return timings
@@ -0,0 +1,216 @@
+"""
+Audio metadata without decoding
+Durations are read from the container headers (MP3 Xing/Info/VBRI frames or
+CBR frame size, MP4/M4A mvhd box, WAV fmt/data chunks), falling back to ffprobe.
+Results are cached by path, mtime and size.
+"""
+
+import json
+import os
+import shutil
+import struct
+import subprocess
+import threading
+
+from loguru import logger
+
+# kbps, indexed by [mpeg1][layer][bitrate index]
+_MP3_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],  # MPEG 2.5
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _skip_id3(f) -> int:
+    header = f.read(10)
+    if len(header) == 10 and header[:3] == b"ID3":
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        # footer present
+        if header[5] & 0x10:
+            size += 10
+        return 10 + size
+    return 0
+
+
+def _mp3_duration(file_path: str) -> float:
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        start = _skip_id3(f)
+        f.seek(start)
+        data = f.read(16384)
+        f.seek(max(0, file_size - 128))
+        has_id3v1 = f.read(3) == b"TAG"
+
+    # first frame sync
+    pos = -1
+    for i in range(len(data) - 4):
+        if data[i] == 0xFF and (data[i + 1] & 0xE0) == 0xE0:
+            version = (data[i + 1] >> 3) & 0x03
+            layer = 4 - ((data[i + 1] >> 1) & 0x03)
+            bitrate_index = data[i + 2] >> 4
+            sample_rate_index = (data[i + 2] >> 2) & 0x03
+            if version != 1 and layer != 4 and 0 < bitrate_index < 15 and sample_rate_index != 3:
+                pos = i
+                break
+    if pos < 0:
+        return 0.0
+
+    mpeg1 = version == 3
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    mono = (data[pos + 3] >> 6) == 3
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 2 or mpeg1:
+        samples_per_frame = 1152
+    else:
+        samples_per_frame = 576
+
+    # VBR headers carry the total number of frames
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    if data[xing : xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4 : xing + 8])[0]
+        if flags & 0x01:
+            frames = struct.unpack(">I", data[xing + 8 : xing + 12])[0]
+            return frames * samples_per_frame / sample_rate
+    vbri = pos + 4 + 32
+    if data[vbri : vbri + 4] == b"VBRI":
+        frames = struct.unpack(">I", data[vbri + 14 : vbri + 18])[0]
+        return frames * samples_per_frame / sample_rate
+
+    # constant bitrate
+    audio_size = file_size - start - pos - (128 if has_id3v1 else 0)
+    return audio_size * 8 / bitrate
+
+
+def _mp4_duration(file_path: str) -> float:
+    # walk the top level boxes to moov, then its children to mvhd
+    with open(file_path, "rb") as f:
+        end = os.path.getsize(file_path)
+        offset = 0
+        while offset + 8 <= end:
+            f.seek(offset)
+            size, box = struct.unpack(">I4s", f.read(8))
+            header = 8
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0]
+                header = 16
+            elif size == 0:
+                size = end - offset
+            if size < header:
+                return 0.0
+            if box == b"moov":
+                end = offset + size
+                offset += header
+                continue
+            if box == b"mvhd":
+                version = f.read(1)[0]
+                f.read(3)
+                if version == 1:
+                    f.read(16)
+                    timescale, duration = struct.unpack(">IQ", f.read(12))
+                else:
+                    f.read(8)
+                    timescale, duration = struct.unpack(">II", f.read(8))
+                return duration / timescale if timescale else 0.0
+            offset += size
+    return 0.0
+
+
+def _wav_duration(file_path: str) -> float:
+    with open(file_path, "rb") as f:
+        riff = f.read(12)
+        if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return 0.0
+        byte_rate = 0
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return 0.0
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size + (chunk_size & 1))
+                byte_rate = struct.unpack("<I", fmt[8:12])[0]
+            elif chunk_id == b"data":
+                return chunk_size / byte_rate if byte_rate else 0.0
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _ffprobe_duration(file_path: str) -> float:
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        ffmpeg = os.environ.get("IMAGEIO_FFMPEG_EXE", "")
+        candidate = os.path.join(os.path.dirname(ffmpeg), "ffprobe") if ffmpeg else ""
+        for path in [candidate, f"{candidate}.exe"]:
+            if path and os.path.isfile(path):
+                ffprobe = path
+                break
+    if ffprobe:
+        result = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "json", file_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30,
+        )
+        return float(json.loads(result.stdout or b"{}").get("format", {}).get("duration", 0) or 0)
+
+    # ffprobe is not shipped with imageio-ffmpeg, let ffmpeg parse the header instead
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+    return float(ffmpeg_parse_infos(file_path, decode_file=False).get("duration", 0) or 0)
+
+
+_PARSERS = {
+    "mp3": _mp3_duration,
+    "mp4": _mp4_duration,
+    "m4a": _mp4_duration,
+    "mov": _mp4_duration,
+    "wav": _wav_duration,
+}
+
+
+def get_duration(file_path: str) -> float:
+    """
+    Duration of an audio (or video) file in seconds, 0.0 if it cannot be determined.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return 0.0
+
+    with _cache_lock:
+        cached = _cache.get(file_path)
+    if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+
+    duration = 0.0
+    parser = _PARSERS.get(os.path.splitext(file_path)[1].lower().lstrip("."))
+    if parser:
+        try:
+            duration = parser(file_path)
+        except Exception as e:
+            logger.warning(f"failed to read audio header: {file_path} => {str(e)}")
+    if duration <= 0:
+        try:
+            duration = _ffprobe_duration(file_path)
+        except Exception as e:
+            logger.error(f"failed to probe audio duration: {file_path} => {str(e)}")
+            return 0.0
+
+    with _cache_lock:
+        _cache[file_path] = (stat.st_mtime, stat.st_size, duration)
+    return duration
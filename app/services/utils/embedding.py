@@ -0,0 +1,80 @@
+import re
+import threading
+import zlib
+from typing import List
+
+import numpy as np
+from loguru import logger
+
+from app.config import config
+
+# Dimension of the built-in hashed n-gram embedding
+HASH_DIM = 512
+
+_model = None
+_model_name = None
+_lock = threading.Lock()
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.split(r"[^\w]+", text.lower()) if t]
+
+
+def _hash_embed(text: str) -> np.ndarray:
+    # words and character trigrams hashed into a fixed size vector, so that
+    # "wave" and "waves" or "meeting" and "meetings" share most of their features
+    vector = np.zeros(HASH_DIM, dtype=np.float32)
+    for word in _tokens(text):
+        vector[zlib.crc32(word.encode("utf-8")) % HASH_DIM] += 0.5
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            gram = padded[i : i + 3]
+            vector[zlib.crc32(f"3:{gram}".encode("utf-8")) % HASH_DIM] += 1.0
+    return vector
+
+
+def model_name() -> str:
+    """
+    The embedding model in use, "hash" when no model is configured or it cannot be loaded.
+    Vectors produced by different models are not comparable.
+    """
+    name = config.app.get("material_embedding_model", "").strip()
+    if not name:
+        return "hash"
+    return name if _load_model(name) is not None else "hash"
+
+
+def _load_model(name: str):
+    global _model, _model_name
+    with _lock:
+        if _model_name == name:
+            return _model
+        _model_name = name
+        _model = None
+        try:
+            # optional dependency, a small onnx model that runs on CPU
+            from fastembed import TextEmbedding
+
+            _model = TextEmbedding(model_name=name)
+            logger.info(f"embedding model loaded: {name}")
+        except Exception as e:
+            logger.warning(f"failed to load embedding model: {name}, using hashed n-grams => {str(e)}")
+        return _model
+
+
+def embed(texts: List[str]) -> np.ndarray:
+    """
+    Embed a list of texts into L2-normalized float32 vectors, one row per text.
+    """
+    if not texts:
+        return np.zeros((0, HASH_DIM), dtype=np.float32)
+
+    name = model_name()
+    if name != "hash":
+        vectors = np.asarray(list(_load_model(name).embed(texts)), dtype=np.float32)
+    else:
+        vectors = np.stack([_hash_embed(text) for text in texts])
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
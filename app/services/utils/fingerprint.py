@@ -0,0 +1,81 @@
+from typing import List
+
+import numpy as np
+from loguru import logger
+from moviepy import VideoFileClip
+from PIL import Image
+
+# Relative positions of the keyframes sampled from each clip
+KEYFRAME_POSITIONS = (0.1, 0.35, 0.6, 0.85)
+HASH_SIZE = 8
+# Average number of differing bits per keyframe (out of HASH_SIZE * HASH_SIZE)
+# below which two clips are considered the same footage
+NEAR_DUPLICATE_THRESHOLD = 10
+
+
+def _dhash(frame: np.ndarray, hash_size: int = HASH_SIZE) -> str:
+    # difference hash: compare neighbouring pixels of a tiny grayscale thumbnail
+    img = Image.fromarray(frame).convert("L").resize(
+        (hash_size + 1, hash_size), Image.Resampling.BILINEAR
+    )
+    pixels = np.asarray(img, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def compute_video_fingerprint(video_path: str) -> str:
+    """
+    Compute a perceptual fingerprint of a video file.
+    A few keyframes are sampled at fixed relative positions, downscaled and
+    hashed, so different renditions (resolution, bitrate) of the same footage
+    produce (nearly) the same fingerprint.
+    Returns an empty string if the file cannot be decoded.
+    """
+    clip = None
+    try:
+        clip = VideoFileClip(video_path, audio=False)
+        duration = clip.duration or 0
+        if duration <= 0:
+            return ""
+        hashes = []
+        for position in KEYFRAME_POSITIONS:
+            frame = clip.get_frame(duration * position)
+            hashes.append(_dhash(frame))
+        return "-".join(hashes)
+    except Exception as e:
+        logger.warning(f"failed to compute fingerprint: {video_path} => {str(e)}")
+        return ""
+    finally:
+        if clip is not None:
+            clip.close()
+
+
+def fingerprint_distance(fp_a: str, fp_b: str) -> float:
+    """
+    Average hamming distance per keyframe between two fingerprints.
+    """
+    frames_a = fp_a.split("-") if fp_a else []
+    frames_b = fp_b.split("-") if fp_b else []
+    if not frames_a or len(frames_a) != len(frames_b):
+        return float(HASH_SIZE * HASH_SIZE)
+
+    total = 0
+    for a, b in zip(frames_a, frames_b):
+        total += bin(int(a, 16) ^ int(b, 16)).count("1")
+    return total / len(frames_a)
+
+
+def is_near_duplicate(
+    fingerprint: str,
+    fingerprints: List[str],
+    threshold: float = NEAR_DUPLICATE_THRESHOLD,
+) -> bool:
+    if not fingerprint:
+        return False
+    for other in fingerprints:
+        if other and fingerprint_distance(fingerprint, other) <= threshold:
+            return True
+    return False
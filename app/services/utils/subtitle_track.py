@@ -0,0 +1,172 @@
+"""
+In-memory subtitle track shared by the subtitle stages
+Cues are kept as int millisecond arrays plus a list of texts, parsed once from
+SRT and serialized back to SRT, or to ASS for the ffmpeg subtitles filter.
+"""
+
+import os
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+_BLOCK_SEPARATOR = re.compile(r"\n[ \t]*\n")
+_TIMING = re.compile(
+    r"(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+)
+
+
+def _to_ms(hours: str, minutes: str, seconds: str, fraction: str) -> int:
+    return (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, "0"))
+
+
+def srt_timestamp(ms: int) -> str:
+    """
+    00:00:01,230
+    """
+    ms = max(0, int(ms))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def ass_timestamp(ms: int) -> str:
+    """
+    0:00:01.23
+    """
+    cs = max(0, int(ms)) // 10
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+
+def ass_color(color: str, alpha: int = 0) -> str:
+    """
+    "#RRGGBB" -> "&HAABBGGRR"
+    """
+    color = color.lstrip("#")
+    if len(color) != 6:
+        color = "FFFFFF"
+    return f"&H{alpha:02X}{color[4:6]}{color[2:4]}{color[0:2]}".upper()
+
+
+class SubtitleTrack:
+    def __init__(self, starts=None, ends=None, texts: List[str] = None):
+        self.starts = np.asarray(starts if starts is not None else [], dtype=np.int64)
+        self.ends = np.asarray(ends if ends is not None else [], dtype=np.int64)
+        self.texts = list(texts or [])
+
+    @classmethod
+    def from_cues(cls, cues: Iterable[Tuple[float, float, str]]) -> "SubtitleTrack":
+        """
+        Build a track from (start seconds, end seconds, text) tuples.
+        """
+        starts, ends, texts = [], [], []
+        for start, end, text in cues:
+            starts.append(round(start * 1000))
+            ends.append(round(end * 1000))
+            texts.append(text)
+        return cls(starts, ends, texts)
+
+    @classmethod
+    def parse(cls, content: str) -> "SubtitleTrack":
+        starts, ends, texts = [], [], []
+        content = content.lstrip("\ufeff").replace("\r\n", "\n").replace("\r", "\n")
+        for block in _BLOCK_SEPARATOR.split(content.strip()):
+            lines = block.split("\n")
+            for i, line in enumerate(lines[:2]):
+                timing = _TIMING.search(line)
+                if timing:
+                    values = timing.groups()
+                    starts.append(_to_ms(*values[:4]))
+                    ends.append(_to_ms(*values[4:]))
+                    texts.append("\n".join(text.strip() for text in lines[i + 1 :]).strip())
+                    break
+        return cls(starts, ends, texts)
+
+    @classmethod
+    def load(cls, file_path: str) -> "SubtitleTrack":
+        """
+        An empty track if the file does not exist.
+        """
+        if not file_path or not os.path.isfile(file_path):
+            return cls()
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls.parse(f.read())
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Tuple[float, float, str]]:
+        for start, end, text in zip(self.starts.tolist(), self.ends.tolist(), self.texts):
+            yield start / 1000, end / 1000, text
+
+    @property
+    def duration(self) -> float:
+        return float(self.ends.max()) / 1000 if len(self) else 0.0
+
+    def timing(self, index: int) -> str:
+        return f"{srt_timestamp(self.starts[index])} --> {srt_timestamp(self.ends[index])}"
+
+    def items(self) -> List[Tuple[int, str, str]]:
+        """
+        [(index, "00:00:00,000 --> 00:00:02,360", text), ...], index starts at 1
+        """
+        return [(i + 1, self.timing(i), text) for i, text in enumerate(self.texts)]
+
+    def to_srt(self) -> str:
+        return "".join(f"{i + 1}\n{self.timing(i)}\n{text}\n\n" for i, text in enumerate(self.texts))
+
+    def save(self, file_path: str):
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(self.to_srt())
+
+    def to_ass(
+        self,
+        width: int = 1080,
+        height: int = 1920,
+        font_name: str = "Arial",
+        font_size: int = 60,
+        primary_color: str = "&H00FFFFFF",
+        outline_color: str = "&H00000000",
+        outline: float = 1.5,
+        shadow: float = 0,
+        bold: bool = False,
+        alignment: int = 2,
+        margin_l: int = 20,
+        margin_r: int = 20,
+        margin_v: int = 40,
+        position: Tuple[int, int] = None,
+    ) -> str:
+        """
+        A complete ASS script with a single "Default" style, coordinates are in
+        output pixels (PlayResX/PlayResY), alignment follows the numpad layout.
+        With position, every cue is anchored (by its alignment point) at that pixel.
+        """
+        header = (
+            "[Script Info]\n"
+            "ScriptType: v4.00+\n"
+            f"PlayResX: {width}\n"
+            f"PlayResY: {height}\n"
+            "WrapStyle: 0\n"
+            "ScaledBorderAndShadow: yes\n"
+            "\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding\n"
+            f"Style: Default,{font_name},{font_size},{primary_color},&H000000FF,{outline_color},&H80000000,"
+            f"{-1 if bold else 0},0,0,0,100,100,0,0,1,{outline},{shadow},{alignment},{margin_l},{margin_r},{margin_v},1\n"
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        )
+        override = f"{{\\pos({position[0]},{position[1]})}}" if position else ""
+        events = []
+        for start, end, text in zip(self.starts.tolist(), self.ends.tolist(), self.texts):
+            # braces would start an override block
+            text = text.replace("{", "(").replace("}", ")").replace("\n", "\\N")
+            events.append(
+                f"Dialogue: 0,{ass_timestamp(start)},{ass_timestamp(end)},Default,,0,0,0,,{override}{text}\n"
+            )
+        return header + "".join(events)
+
+    def save_ass(self, file_path: str, **style):
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(self.to_ass(**style))
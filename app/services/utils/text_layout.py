@@ -0,0 +1,123 @@
+"""
+Text measurement for the PIL text overlays (title and subtitles)
+Fonts are loaded once per (font path, size) and the advance width of every
+word and character is measured once, so wrapping a line is a sum of cached
+widths instead of measuring every growing prefix of it.
+"""
+
+import functools
+import threading
+from typing import List, Tuple
+
+from PIL import ImageFont
+
+# spacing between wrapped lines, in pixels
+LINE_SPACING = 15
+# a measurer forgets its widths once it holds this many
+_MAX_CACHED_WIDTHS = 50000
+
+
+@functools.lru_cache(maxsize=64)
+def get_font(font_path: str, font_size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_path, int(font_size))
+
+
+class TextMeasurer:
+    def __init__(self, font_path: str, font_size: int):
+        self.font = get_font(font_path, font_size)
+        self._widths = {}
+        self._lock = threading.Lock()
+
+    def width(self, text: str) -> float:
+        """
+        Advance width of the text, cached.
+        """
+        width = self._widths.get(text)
+        if width is None:
+            width = self.font.getlength(text)
+            with self._lock:
+                if len(self._widths) >= _MAX_CACHED_WIDTHS:
+                    self._widths.clear()
+                self._widths[text] = width
+        return width
+
+    def size(self, text: str) -> Tuple[int, int]:
+        """
+        Width and height of the inked area of the text.
+        """
+        left, top, right, bottom = self.font.getbbox(text.strip())
+        return right - left, bottom - top
+
+    def _char_lines(self, text: str, max_width: float) -> List[str]:
+        lines = []
+        line, line_width = "", 0.0
+        for char in text:
+            char_width = self.width(char)
+            if line and line_width + char_width > max_width:
+                lines.append(line)
+                line, line_width = "", 0.0
+            line += char
+            line_width += char_width
+        if line:
+            lines.append(line)
+        return lines
+
+    def wrap(self, text: str, max_width: float) -> List[str]:
+        """
+        Break the text at spaces so that every line fits in max_width.
+        The first line gives up its last word when the rest would make a very
+        short second line. A single word wider than max_width switches the
+        whole text to character wrapping (CJK text without spaces).
+        """
+        words = text.split(" ")
+        widths = [self.width(word) for word in words]
+        space = self.width(" ")
+        if sum(widths) + space * (len(words) - 1) <= max_width:
+            return [text.strip()]
+
+        # suffix[i]: width of " ".join(words[i:])
+        suffix = [0.0] * (len(words) + 1)
+        for i in range(len(words) - 1, -1, -1):
+            suffix[i] = widths[i] + (space + suffix[i + 1] if i + 1 < len(words) else 0.0)
+
+        lines = []
+        line, line_width = [], 0.0
+        for i, word in enumerate(words):
+            added = widths[i] + (space if line else 0.0)
+            if line_width + added <= max_width:
+                line.append(word)
+                line_width += added
+                continue
+            if not line or not " ".join(line).strip():
+                # single word is too long
+                return self._char_lines(text, max_width)
+
+            if not lines and suffix[i] < max_width * 0.6 and len(line) > 2:
+                # move the last word to the next line for better balance
+                lines.append(" ".join(line[:-1]))
+                line = [line[-1], word]
+                line_width = widths[i - 1] + space + widths[i]
+                continue
+
+            lines.append(" ".join(line))
+            line, line_width = [word], widths[i]
+        if line:
+            lines.append(" ".join(line))
+        return [line.strip() for line in lines if line.strip()]
+
+
+@functools.lru_cache(maxsize=64)
+def get_measurer(font_path: str, font_size: int) -> TextMeasurer:
+    return TextMeasurer(font_path, int(font_size))
+
+
+def wrap_text(text: str, max_width: float, font_path: str, font_size: int) -> Tuple[str, int]:
+    """
+    (wrapped text, total height) with LINE_SPACING between the lines.
+    """
+    measurer = get_measurer(font_path, font_size)
+    lines = measurer.wrap(text, max_width)
+    _, height = measurer.size(text)
+    if len(lines) <= 1:
+        return "\n".join(lines), height
+    return "\n".join(lines), len(lines) * height + (len(lines) - 1) * LINE_SPACING
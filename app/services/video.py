@@ -1,10 +1,13 @@
 import glob
+import hashlib
 import itertools
+import json
 import os
 import random
 import gc
 import shutil
 import subprocess
+import time
 from typing import List
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
@@ -26,6 +29,7 @@ from moviepy.video.tools.subtitles import SubtitlesClip
 from PIL import ImageFont
 from proglog import ProgressBarLogger
 
+from app.config import config
 from app.models import const
 from app.models.schema import (
     MaterialInfo,
@@ -34,7 +38,9 @@ from app.models.schema import (
     VideoParams,
     VideoTransitionMode,
 )
-from app.services.utils import video_effects
+from app.services.fonts import font_registry
+from app.services.utils import audio_meta, subtitle_track, text_layout, video_effects
+from app.services.utils.subtitle_track import SubtitleTrack
 from app.utils import utils
 
 class TaskProgressLogger(ProgressBarLogger):
@@ -88,57 +94,10 @@ video_encoding_params = [
 ]
 
 def parse_srt(file_path):
-    subtitles = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        if not line:
-            i += 1
-            continue
-            
-        # Index (skip)
-        if line.isdigit():
-            i += 1
-            if i >= len(lines): break
-            line = lines[i].strip()
-            
-        # Time
-        if '-->' in line:
-            times = line.split('-->')
-            if len(times) == 2:
-                start_str = times[0].strip()
-                end_str = times[1].strip()
-                
-                def time_to_seconds(t_str):
-                    t_str = t_str.replace(',', '.')
-                    parts = t_str.split(':')
-                    return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
-                
-                start = time_to_seconds(start_str)
-                end = time_to_seconds(end_str)
-                
-                # Text
-                text_lines = []
-                i += 1
-                while i < len(lines):
-                    text_line = lines[i].strip()
-                    if not text_line:
-                        break
-                    text_lines.append(text_line)
-                    i += 1
-                
-                text = "\n".join(text_lines)
-                subtitles.append(((start, end), text))
-            else:
-                i += 1
-        else:
-            i += 1
-            
-    return subtitles
+    """
+    [((start seconds, end seconds), text), ...]
+    """
+    return [((start, end), text) for start, end, text in SubtitleTrack.load(file_path)]
 
 def close_clip(clip):
     if clip is None:
@@ -214,8 +173,7 @@ def combine_videos(
     threads: int = 2,
     progress_callback=None,
 ) -> str:
-    audio_clip = AudioFileClip(audio_file)
-    audio_duration = audio_clip.duration
+    audio_duration = audio_meta.get_duration(audio_file)
     logger.info(f"audio duration: {audio_duration} seconds")
     aspect = VideoAspect(video_aspect)
     video_width, video_height = aspect.to_resolution()
@@ -595,105 +553,273 @@ def combine_videos(
 
 
 def wrap_text(text, max_width, font="Arial", fontsize=60):
-    # Create ImageFont
-    font = ImageFont.truetype(font, fontsize)
-
-    def get_text_size(inner_text):
-        inner_text = inner_text.strip()
-        left, top, right, bottom = font.getbbox(inner_text)
-        return right - left, bottom - top
-
-    width, height = get_text_size(text)
-    if width <= max_width:
-        return text, height
-
-    # Enhanced text wrapping for better readability
-    processed = True
-    _wrapped_lines_ = []
-    words = text.split(" ")
-    _txt_ = ""
-    
-    # Try to keep lines balanced and avoid very short last lines
-    for word in words:
-        _before = _txt_
-        _txt_ += f"{word} "
-        _width, _height = get_text_size(_txt_)
-        
-        if _width <= max_width:
-            continue
+    """
+    (wrapped text, height), see text_layout.wrap_text
+    """
+    return text_layout.wrap_text(text, max_width, font, fontsize)
+
+
+def subtitle_ass_style(params: VideoParams, font_path: str = "") -> dict:
+    """
+    ASS style equivalent to the PIL subtitle rendering of create_text_clip:
+    same font file, pixel size, colors, outline and position presets
+    (portrait videos keep the title area and the Shorts UI free).
+    """
+    aspect = VideoAspect(params.video_aspect)
+    video_width, video_height = aspect.to_resolution()
+    portrait = aspect == VideoAspect.portrait
+    font_size = int(params.font_size)
+
+    font_name, bold = "Arial", False
+    # libass sizes fonts by ascent + descent, PIL by the em square
+    ass_font_size = font_size
+    if font_path and os.path.isfile(font_path):
+        font = text_layout.get_font(font_path, font_size)
+        font_name, font_style = font.getname()
+        bold = "bold" in font_style.lower()
+        ascent, descent = font.getmetrics()
+        ass_font_size = ascent + descent
+
+    style = {
+        "width": video_width,
+        "height": video_height,
+        "font_name": font_name,
+        "font_size": ass_font_size,
+        "bold": bold,
+        "primary_color": subtitle_track.ass_color(params.text_fore_color or "#FFFFFF"),
+        "outline_color": subtitle_track.ass_color(params.stroke_color or "#000000"),
+        "outline": max(3, int(params.stroke_width)),
+        "margin_l": int(video_width * 0.05),
+        "margin_r": int(video_width * 0.05),
+    }
+
+    line_height = ass_font_size + 2 * style["outline"]
+    if params.subtitle_position == "bottom":
+        if portrait:
+            # top of the text at 75%, above the YouTube Shorts UI
+            style.update(alignment=8, margin_v=int(video_height * 0.75))
         else:
-            if _txt_.strip() == word.strip():
-                # Single word is too long, need character-level wrapping
-                processed = False
-                break
-            
-            # Check if we should break here or try to balance lines
-            remaining_words = words[words.index(word):]
-            remaining_text = " ".join(remaining_words)
-            remaining_width, _ = get_text_size(remaining_text)
-            
-            # If remaining text is much shorter than current line, try to balance
-            if len(_wrapped_lines_) == 0 and remaining_width < max_width * 0.6:
-                # Try to move one word to next line for better balance
-                words_in_current = _before.strip().split()
-                if len(words_in_current) > 2:  # Only if we have enough words
-                    last_word = words_in_current[-1]
-                    balanced_line = " ".join(words_in_current[:-1])
-                    _wrapped_lines_.append(balanced_line)
-                    _txt_ = f"{last_word} {word} "
-                    continue
-            
-            _wrapped_lines_.append(_before.strip())
-            _txt_ = f"{word} "
-    
-    if _txt_.strip():
-        _wrapped_lines_.append(_txt_.strip())
-    
-    if processed:
-        _wrapped_lines_ = [line.strip() for line in _wrapped_lines_ if line.strip()]
-        result = "\n".join(_wrapped_lines_).strip()
-        
-        # Calculate total height with line spacing
-        line_height = height
-        total_height = len(_wrapped_lines_) * line_height + (len(_wrapped_lines_) - 1) * 15  # 15px spacing
-        return result, total_height
-
-    # Fallback to character-level wrapping for very long words
-    _wrapped_lines_ = []
-    chars = list(text)
-    _txt_ = ""
-    for char in chars:
-        _txt_ += char
-        _width, _height = get_text_size(_txt_)
-        if _width <= max_width:
-            continue
+            style.update(alignment=2, margin_v=int(video_height * 0.08))
+    elif params.subtitle_position == "top":
+        style.update(alignment=8, margin_v=int(video_height * (0.15 if portrait else 0.05)))
+    elif params.subtitle_position == "custom":
+        min_y = video_height * 0.15 if portrait else 10
+        top = (video_height - line_height) * (params.custom_position / 100)
+        top = max(min_y, min(top, video_height - line_height - 10))
+        if params.custom_position >= 50:
+            # anchored at the bottom so that wrapped lines grow upwards and stay on screen
+            style.update(alignment=2, margin_v=int(video_height - top - line_height))
         else:
-            _wrapped_lines_.append(_txt_[:-1])  # Don't include the character that made it too wide
-            _txt_ = char
-    
-    if _txt_:
-        _wrapped_lines_.append(_txt_)
-    
-    result = "\n".join(_wrapped_lines_).strip()
-    line_height = height
-    total_height = len(_wrapped_lines_) * line_height + (len(_wrapped_lines_) - 1) * 15
-    return result, total_height
-
-    _wrapped_lines_ = []
-    chars = list(text)
-    _txt_ = ""
-    for word in chars:
-        _txt_ += word
-        _width, _height = get_text_size(_txt_)
-        if _width <= max_width:
-            continue
+            style.update(alignment=8, margin_v=int(top))
+    else:
+        if portrait:
+            # middle of the area between the title and the bottom UI
+            style.update(alignment=5, margin_v=0, position=(video_width // 2, int(video_height * 0.45)))
         else:
-            _wrapped_lines_.append(_txt_)
-            _txt_ = ""
-    _wrapped_lines_.append(_txt_)
-    result = "\n".join(_wrapped_lines_).strip()
-    height = len(_wrapped_lines_) * height
-    return result, height
+            style.update(alignment=5, margin_v=0)
+    return style
+
+
+def render_subtitle_ass(subtitle_path: str, params: VideoParams, font_path: str = "") -> str:
+    """
+    Convert the SRT subtitle into a fully styled ASS file next to it.
+    The file name carries a hash of the cues and the style, so every variant
+    of a task (and every re-render with the same settings) reuses the same file.
+    """
+    track = SubtitleTrack.load(subtitle_path)
+    if not len(track):
+        return ""
+    style = subtitle_ass_style(params, font_path)
+    key = hashlib.md5(
+        (track.to_srt() + json.dumps(style, sort_keys=True)).encode("utf-8")
+    ).hexdigest()[:12]
+    ass_path = f"{os.path.splitext(subtitle_path)[0]}-{key}.ass"
+    if not os.path.exists(ass_path):
+        temp_path = f"{ass_path}.tmp"
+        track.save_ass(temp_path, **style)
+        os.replace(temp_path, ass_path)
+        logger.info(f"styled subtitle created: {ass_path}")
+    return ass_path
+
+
+def render_subtitle_image(text: str, params: VideoParams, font_path: str, video_width: int) -> Image.Image:
+    """
+    The subtitle as a transparent RGBA image, drawn exactly like the WebUI preview.
+    """
+    stroke_width = max(3, int(params.stroke_width))  # Ensure visible outline
+    stroke_color = params.stroke_color or "#000000"  # Default to black outline
+    font_size = int(params.font_size)
+    wrapped_txt, _ = wrap_text(text, max_width=video_width * 0.9, font=font_path, fontsize=font_size)
+
+    # Use PIL to create text image (avoiding ImageMagick dependency)
+    font = text_layout.get_font(font_path, font_size)
+    draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    bbox = draw.multiline_textbbox((0, 0), wrapped_txt, font=font, stroke_width=stroke_width, align="center", spacing=text_layout.LINE_SPACING)
+    w = bbox[2] - bbox[0] + 40  # Add padding
+    h = bbox[3] - bbox[1] + 40
+
+    img = Image.new("RGBA", (int(w), int(h)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.multiline_text((20, 20), wrapped_txt, font=font, fill=params.text_fore_color, stroke_width=stroke_width, stroke_fill=stroke_color, align="center", spacing=text_layout.LINE_SPACING)
+    return img
+
+
+def subtitle_position_y(subtitle_height: int, params: VideoParams, video_height: int, portrait: bool) -> float:
+    """
+    Top of the subtitle image for the position presets
+    (portrait videos keep the title area and the Shorts UI free).
+    """
+    if params.subtitle_position == "bottom":
+        if not portrait:
+            return video_height * 0.92 - subtitle_height
+        # For portrait videos, place at 75% to avoid YouTube UI overlay
+        default_y = video_height * 0.75
+        # If subtitle is too tall, adjust position but keep it reasonable
+        if subtitle_height > video_height * 0.15:
+            return max(video_height * 0.6, default_y - (subtitle_height - video_height * 0.1))
+        return default_y
+    if params.subtitle_position == "top":
+        # Start after title area (top 15% reserved for title)
+        return video_height * 0.15 if portrait else video_height * 0.05
+    if params.subtitle_position == "custom":
+        # Ensure the subtitle is fully within the screen bounds
+        margin = 10
+        max_y = video_height - subtitle_height - margin
+        min_y = max(margin, video_height * 0.15) if portrait else margin
+        custom_y = (video_height - subtitle_height) * (params.custom_position / 100)
+        return max(min_y, min(custom_y, max_y))
+    if portrait:
+        # Center in the middle area (between title and bottom UI), 15% top + 25% bottom reserved
+        available_height = video_height * 0.6
+        return video_height * 0.15 + (available_height - subtitle_height) / 2
+    return (video_height - subtitle_height) / 2
+
+
+def render_subtitle_sprites(subtitle_path: str, params: VideoParams, font_path: str, cache_dir: str = "") -> str:
+    """
+    Rasterize every cue once and describe them as an ffconcat image sequence,
+    overlaid on the video as a single input however many cues there are.
+
+    Each cue is a full frame PNG (transparent apart from the text) cached in
+    cache_dir (storage/subtitle_cache) by text and style, so variants and re-renders reuse
+    them, the cache is pruned afterwards. Gaps between cues show a blank frame.
+    Returns the ffconcat file, "" if there are no cues.
+    """
+    track = SubtitleTrack.load(subtitle_path)
+    if not len(track):
+        return ""
+    aspect = VideoAspect(params.video_aspect)
+    video_width, video_height = aspect.to_resolution()
+    portrait = aspect == VideoAspect.portrait
+    cache_dir = cache_dir or utils.storage_dir("subtitle_cache", create=True)
+    # the font file is part of the key, a replaced font renders new sprites
+    font_mtime = os.path.getmtime(font_path) if os.path.isfile(font_path) else 0
+    style = json.dumps(
+        [
+            os.path.abspath(font_path),
+            font_mtime,
+            int(params.font_size),
+            params.text_fore_color,
+            params.stroke_color,
+            max(3, int(params.stroke_width)),
+            params.subtitle_position,
+            params.custom_position,
+            video_width,
+            video_height,
+        ]
+    )
+
+    def sprite(text: str) -> str:
+        key = hashlib.md5(f"{style}\n{text}".encode("utf-8")).hexdigest()
+        file_path = os.path.join(cache_dir, f"{key}.png")
+        if os.path.exists(file_path):
+            # a cache hit counts as a use for prune_subtitle_cache
+            os.utime(file_path)
+        else:
+            frame = Image.new("RGBA", (video_width, video_height), (0, 0, 0, 0))
+            if text:
+                img = render_subtitle_image(text, params, font_path, video_width)
+                y = subtitle_position_y(img.height, params, video_height, portrait)
+                frame.alpha_composite(img, (max(0, (video_width - img.width) // 2), max(0, int(y))))
+            temp_path = f"{file_path}.{os.getpid()}.tmp"
+            frame.save(temp_path, format="PNG", compress_level=1)
+            os.replace(temp_path, file_path)
+        return file_path
+
+    def entry(file_path: str, duration_ms: int) -> str:
+        file_path = file_path.replace("\\", "/").replace("'", "'\\''")
+        return f"file '{file_path}'\nduration {duration_ms / 1000:.3f}\n"
+
+    blank = sprite("")
+    entries = ["ffconcat version 1.0\n"]
+    position = 0
+    for start, end, text in zip(track.starts.tolist(), track.ends.tolist(), track.texts):
+        start = max(start, position)
+        if end <= start:
+            continue
+        if start > position:
+            entries.append(entry(blank, start - position))
+        entries.append(entry(sprite(text), end - start))
+        position = end
+    # clear the last cue, the duration of the last entry is not applied by the concat demuxer
+    entries.append(entry(blank, 1000))
+    entries.append(entry(blank, 1000))
+
+    concat_path = f"{os.path.splitext(subtitle_path)[0]}-sprites.ffconcat"
+    with open(concat_path, "w", encoding="utf-8") as f:
+        f.write("".join(entries))
+    logger.info(f"subtitle sprites created: {len(track)} cues, {concat_path}")
+    prune_subtitle_cache(cache_dir)
+    return concat_path
+
+
+def prune_subtitle_cache(
+    cache_dir: str = "",
+    max_age_days: float = None,
+    max_size_mb: float = None,
+    keep_seconds: float = 3600,
+) -> int:
+    """
+    Delete the sprites of storage/subtitle_cache not used for max_age_days, then the
+    least recently used ones until the cache is below max_size_mb (0 disables a limit).
+    Sprites used in the last keep_seconds are kept, a running render may still read them.
+    Returns the number of deleted files.
+    """
+    cache_dir = cache_dir or utils.storage_dir("subtitle_cache")
+    if max_age_days is None:
+        max_age_days = float(config.app.get("subtitle_cache_max_age_days", 7))
+    if max_size_mb is None:
+        max_size_mb = float(config.app.get("subtitle_cache_max_size_mb", 500))
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    files = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(".png"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    # least recently used first
+    files.sort()
+
+    now = time.time()
+    total_size = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, file_path in files:
+        if now - mtime < keep_seconds:
+            break
+        expired = max_age_days > 0 and now - mtime > max_age_days * 86400
+        too_large = max_size_mb > 0 and total_size > max_size_mb * 1024 * 1024
+        if not expired and not too_large:
+            continue
+        try:
+            os.remove(file_path)
+            total_size -= size
+            removed += 1
+        except OSError as e:
+            logger.warning(f"failed to delete subtitle sprite: {file_path} => {str(e)}")
+    if removed:
+        logger.info(f"subtitle cache pruned: {removed} files deleted")
+    return removed
 
 
 def generate_video(
@@ -719,38 +845,12 @@ def generate_video(
 
     font_path = ""
     if params.subtitle_enabled or params.video_subject:
-        # Force Malgun Gothic for Korean support to avoid squares
-        # This overrides other settings to ensure Korean text works on Windows
-        system_font_path = "C:/Windows/Fonts/malgun.ttf"
-        
-        # Linux/Docker font paths (Noto Sans CJK)
-        linux_font_paths = [
-            "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
-            "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
-            "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
-            "/usr/share/fonts/truetype/noto/NotoSansCJKsc-Regular.otf"
-        ]
-        
-        if os.path.exists(system_font_path):
-            font_path = system_font_path
-            logger.info(f"Forced Korean font: {font_path}")
-        else:
-            found_linux_font = False
-            for path in linux_font_paths:
-                if os.path.exists(path):
-                    font_path = path
-                    found_linux_font = True
-                    logger.info(f"Forced Korean font (Linux): {font_path}")
-                    break
-            
-            if not found_linux_font:
-                if not params.font_name:
-                    params.font_name = "STHeitiMedium.ttc"
-                
-                font_path = os.path.join(utils.font_dir(), params.font_name)
-                if os.name == "nt":
-                    font_path = font_path.replace("\\", "/")
-        
+        # Force a system Korean font (Malgun Gothic / Noto Sans CJK) when available to avoid squares
+        if not font_registry.system_cjk_font() and not params.font_name:
+            params.font_name = "STHeitiMedium.ttc"
+        font_path = font_registry.subtitle_font(params.font_name)
+        if os.name == "nt":
+            font_path = font_path.replace("\\", "/")
         logger.info(f"  ⑤ font: {font_path}")
 
     def create_text_clip(subtitle_item):
@@ -762,79 +862,17 @@ def generate_video(
         params.stroke_width = max(3, int(params.stroke_width)) # Ensure visible outline
         params.stroke_color = params.stroke_color or "#000000" # Default to black outline
         phrase = subtitle_item[1]
-        max_width = video_width * 0.9
-        wrapped_txt, txt_height = wrap_text(
-            phrase, max_width=max_width, font=font_path, fontsize=params.font_size
-        )
+        img = render_subtitle_image(phrase, params, font_path, video_width)
 
-        # Use PIL to create text image (avoiding ImageMagick dependency)
-        font = ImageFont.truetype(font_path, params.font_size)
-        dummy_img = Image.new('RGBA', (1, 1))
-        draw = ImageDraw.Draw(dummy_img)
-        # Calculate bounding box
-        bbox = draw.multiline_textbbox((0, 0), wrapped_txt, font=font, stroke_width=params.stroke_width, align='center', spacing=15)
-        w = bbox[2] - bbox[0] + 40  # Add padding
-        h = bbox[3] - bbox[1] + 40
-        
-        img = Image.new('RGBA', (int(w), int(h)), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-        draw.multiline_text((20, 20), wrapped_txt, font=font, fill=params.text_fore_color, stroke_width=params.stroke_width, stroke_fill=params.stroke_color, align='center', spacing=15)
-        
         _clip = ImageClip(np.array(img))
         duration = subtitle_item[0][1] - subtitle_item[0][0]
         _clip = _clip.with_start(subtitle_item[0][0])
         _clip = _clip.with_end(subtitle_item[0][1])
         _clip = _clip.with_duration(duration)
-        
+
         # Dynamic subtitle positioning based on text height and language
-        subtitle_height = _clip.h
-        
-        if params.subtitle_position == "bottom":
-            # Adjust for Shorts style (higher up to avoid UI)
-            if aspect == VideoAspect.portrait:
-                # For portrait videos, place at 75% to avoid YouTube UI overlay
-                # This is optimal for YouTube Shorts
-                default_y = video_height * 0.75
-                
-                # If subtitle is too tall, adjust position but keep it reasonable
-                if subtitle_height > video_height * 0.15:  # If subtitle is more than 15% of screen height
-                    adjusted_y = max(video_height * 0.6, default_y - (subtitle_height - video_height * 0.1))
-                else:
-                    adjusted_y = default_y
-                    
-                _clip = _clip.with_position(("center", adjusted_y))
-            else:
-                _clip = _clip.with_position(("center", video_height * 0.92 - subtitle_height))
-        elif params.subtitle_position == "top":
-            # For top position, ensure it doesn't overlap with title
-            if aspect == VideoAspect.portrait:
-                # Start after title area (top 15% reserved for title)
-                min_top_y = video_height * 0.15
-                _clip = _clip.with_position(("center", min_top_y))
-            else:
-                _clip = _clip.with_position(("center", video_height * 0.05))
-        elif params.subtitle_position == "custom":
-            # Ensure the subtitle is fully within the screen bounds
-            margin = 10  # Additional margin, in pixels
-            max_y = video_height - subtitle_height - margin
-            min_y = margin
-            
-            # For portrait, respect title area
-            if aspect == VideoAspect.portrait:
-                min_y = max(min_y, video_height * 0.15)  # Don't overlap with title
-                
-            custom_y = (video_height - subtitle_height) * (params.custom_position / 100)
-            custom_y = max(min_y, min(custom_y, max_y))
-            _clip = _clip.with_position(("center", custom_y))
-        else:  # center
-            # For center position in portrait, avoid title area
-            if aspect == VideoAspect.portrait:
-                # Center in the middle area (between title and bottom UI)
-                available_height = video_height * 0.6  # 60% of screen (15% top + 25% bottom reserved)
-                center_y = video_height * 0.15 + (available_height - subtitle_height) / 2
-                _clip = _clip.with_position(("center", center_y))
-            else:
-                _clip = _clip.with_position(("center", "center"))
+        y = subtitle_position_y(_clip.h, params, video_height, aspect == VideoAspect.portrait)
+        _clip = _clip.with_position(("center", y))
         return _clip
 
     bgm_file = get_bgm_file(bgm_type=params.bgm_type, bgm_file=params.bgm_file)
@@ -852,11 +890,11 @@ def generate_video(
         if params.video_subject:
             try:
                 # Use project font
-                font_path_title = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "resource", "fonts", "NanumGothic-Bold.ttf")
+                font_path_title = font_registry.title_font()
                 
                 # Wrap text manually
                 font_size = 96
-                font = ImageFont.truetype(font_path_title, font_size)
+                font = text_layout.get_font(font_path_title, font_size)
                 max_width = video_width * 0.85 # 15% margin
                 
                 wrapped_text, text_h = wrap_text(params.video_subject, max_width, font=font_path_title, fontsize=font_size)
@@ -882,36 +920,42 @@ def generate_video(
                 logger.error(f"Failed to create title overlay image: {e}")
 
         # Audio setup
-        final_audio = AudioFileClip(audio_path)
+        final_audio = None
         bgm_clip = None
+        temp_audio_file = output_file.replace(".mp4", "_temp_audio.m4a")
         
         if bgm_file:
+            final_audio = AudioFileClip(audio_path)
+            audio_duration = audio_meta.get_duration(audio_path) or final_audio.duration
             bgm_clip = AudioFileClip(bgm_file)
-            if bgm_clip.duration < final_audio.duration:
+            if audio_meta.get_duration(bgm_file) < audio_duration:
                 # Use effects instead of afx.audio_loop for v2
-                bgm_clip = bgm_clip.with_effects([afx.AudioLoop(duration=final_audio.duration)])
+                bgm_clip = bgm_clip.with_effects([afx.AudioLoop(duration=audio_duration)])
             else:
-                bgm_clip = bgm_clip.subclipped(0, final_audio.duration)
+                bgm_clip = bgm_clip.subclipped(0, audio_duration)
                 
             bgm_clip = bgm_clip.with_volume_scaled(params.bgm_volume)
             final_audio = CompositeAudioClip([final_audio, bgm_clip])
         
-        # 1. Export Audio First (Fastest)
-        logger.info("writing final video (audio track)...")
-        temp_audio_file = output_file.replace(".mp4", "_temp_audio.m4a")
-        logger.info(f"Exporting audio to {temp_audio_file}")
-        try:
-            final_audio.write_audiofile(temp_audio_file, fps=44100, codec="aac", logger=None)
-            logger.info("Audio export successful")
-        except Exception as e:
-            logger.error(f"Audio export failed: {e}")
-            raise e
+            # 1. Export Audio First (Fastest)
+            logger.info("writing final video (audio track)...")
+            logger.info(f"Exporting audio to {temp_audio_file}")
+            try:
+                final_audio.write_audiofile(temp_audio_file, fps=44100, codec="aac", logger=None)
+                logger.info("Audio export successful")
+            except Exception as e:
+                logger.error(f"Audio export failed: {e}")
+                raise e
+            audio_input, audio_codec = temp_audio_file, "copy"
+        else:
+            # voice only: ffmpeg encodes it while muxing, no need to decode it in python first
+            audio_input, audio_codec = audio_path, "aac"
         
         logger.info("merging video, audio, and subtitles...")
         ffmpeg_exe = get_ffmpeg_exe()
         
         cmd = [ffmpeg_exe, "-y"]
-        inputs = ["-i", video_path, "-i", temp_audio_file]
+        inputs = ["-i", video_path, "-i", audio_input]
         
         filter_complex = []
         current_v = "0:v"
@@ -926,12 +970,29 @@ def generate_video(
             
         # Add Subtitles
         has_subtitles = params.subtitle_enabled and os.path.exists(subtitle_path)
-        if has_subtitles:
-            sub_path_escaped = subtitle_path.replace("\\", "/").replace(":", "\\:")
-            margin_v = 40 if aspect != VideoAspect.portrait else 120
-            style = f"Fontname=Malgun Gothic,FontSize=16,PrimaryColour=&HFFFFFF,OutlineColour=&H000000,BorderStyle=1,Outline=1,Shadow=0,MarginV={margin_v},Alignment=2"
+        subtitle_renderer = config.app.get("subtitle_renderer", "ass")
+        sprites_path = ""
+        if has_subtitles and subtitle_renderer == "sprite" and font_path and os.path.isfile(font_path):
+            sprites_path = render_subtitle_sprites(subtitle_path, params, font_path)
+        ass_path = ""
+        if has_subtitles and not sprites_path:
+            ass_path = render_subtitle_ass(subtitle_path, params, font_path)
+        if sprites_path:
+            sprites_input = inputs.count("-i")
+            inputs.extend(["-f", "concat", "-safe", "0", "-i", sprites_path])
+            # one overlay for all cues, each sprite stays until the next one starts
+            filter_complex.append(f"[{current_v}][{sprites_input}:v]overlay=0:0:format=auto[v_out]")
+            current_v = "v_out"
+        elif ass_path:
+            def escape_filter_path(file_path):
+                return file_path.replace("\\", "/").replace(":", "\\:")
+
+            subtitles_filter = f"subtitles='{escape_filter_path(ass_path)}'"
+            if font_path and os.path.isfile(font_path):
+                # let libass load the font directly instead of scanning the system fonts for a fallback
+                subtitles_filter += f":fontsdir='{escape_filter_path(os.path.dirname(font_path))}'"
             # Use current_v as input for subtitles
-            filter_complex.append(f"[{current_v}]subtitles='{sub_path_escaped}':force_style='{style}'[v_out]")
+            filter_complex.append(f"[{current_v}]{subtitles_filter}[v_out]")
             current_v = "v_out"
             
         cmd.extend(inputs)
@@ -946,7 +1007,7 @@ def generate_video(
             
         cmd.extend([
             "-map", "1:a",
-            "-c:a", "copy",
+            "-c:a", audio_codec,
             "-shortest", 
             output_file
         ])
@@ -963,7 +1024,8 @@ def generate_video(
         # Close resources
         try:
             video_clip.close()
-            final_audio.close()
+            if final_audio:
+                final_audio.close()
             if bgm_clip:
                 bgm_clip.close()
             # final_clip is alias to video_clip now, so no need to close separately
@@ -1108,25 +1170,16 @@ def generate_timer_video(duration_seconds: int, output_file: str, font_path: str
 
         # Font setup with fallback
         if not font_path or not os.path.exists(font_path):
-            # Try multiple font paths
-            possible_fonts = [
-                os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "resource", "fonts", "NanumGothic-Bold.ttf"),
-                "C:/Windows/Fonts/malgun.ttf",  # Windows Korean font
-                "C:/Windows/Fonts/arial.ttf",   # Windows fallback
-                "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",  # Linux
-            ]
-            
-            font_path = None
-            for path in possible_fonts:
-                if os.path.exists(path):
-                    font_path = path
-                    break
-            
+            # bundled title font, then a system Korean font, then Arial on Windows
+            font_path = font_registry.title_font()
+            if not font_path and os.path.exists("C:/Windows/Fonts/arial.ttf"):
+                font_path = "C:/Windows/Fonts/arial.ttf"
+
             if not font_path:
                 raise Exception("No suitable font found for timer video")
         
         try:
-            font = ImageFont.truetype(font_path, fontsize)
+            font = font_registry.get_font(font_path, fontsize)
         except Exception as e:
             logger.error(f"Failed to load font {font_path}: {e}")
             # Use default font as last resort
@@ -1,19 +1,23 @@
 import asyncio
+import concurrent.futures
+import hashlib
+import json
 import os
 import re
+import threading
 from datetime import datetime
-from typing import Union
+from typing import Iterable, Union
 from xml.sax.saxutils import unescape
 
 import edge_tts
+import numpy as np
 import requests
 from edge_tts import SubMaker, submaker
-from edge_tts.submaker import mktimestamp
 from loguru import logger
-from moviepy.video.tools import subtitles
-from moviepy.audio.io.AudioFileClip import AudioFileClip
 
 from app.config import config
+from app.services.utils import alignment, audio_meta
+from app.services.utils.subtitle_track import SubtitleTrack
 from app.utils import utils
 
 
@@ -1116,6 +1120,26 @@ def is_gemini_voice(voice_name: str):
     return voice_name.startswith("gemini:")
 
 
+def _preprocess_tts_text(text: str) -> str:
+    """TTS를 위한 텍스트 전처리 - 발음 개선"""
+    # 단어 사이의 하이픈을 "다시"로 변경
+    # 예: "재시작 - 새로운 시작" -> "재시작 다시 새로운 시작"
+    text = re.sub(r'\s*-\s*', ' 다시 ', text)
+
+    # 기타 TTS 발음 개선
+    text = re.sub(r'&', ' 그리고 ', text)  # &를 "그리고"로
+    text = re.sub(r'@', ' 골뱅이 ', text)  # @를 "골뱅이"로
+    text = re.sub(r'#', ' 샵 ', text)      # #을 "샵"으로
+    text = re.sub(r'\+', ' 플러스 ', text) # +를 "플러스"로
+    text = re.sub(r'=', ' 같다 ', text)    # =를 "같다"로
+    text = re.sub(r'%', ' 퍼센트 ', text)  # %를 "퍼센트"로
+
+    # 연속된 공백 정리
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    return text
+
+
 def tts(
     text: str,
     voice_name: str,
@@ -1123,33 +1147,97 @@ def tts(
     voice_file: str,
     voice_volume: float = 1.0,
 ) -> Union[SubMaker, None]:
-    # TTS 텍스트 전처리 - 발음 개선
-    def preprocess_tts_text(text: str) -> str:
-        """TTS를 위한 텍스트 전처리"""
-        # "-"를 "다시"로 변경 (문맥에 따라)
-        import re
-        
-        # 단어 사이의 하이픈을 "다시"로 변경
-        # 예: "재시작 - 새로운 시작" -> "재시작 다시 새로운 시작"
-        text = re.sub(r'\s*-\s*', ' 다시 ', text)
-        
-        # 기타 TTS 발음 개선
-        text = re.sub(r'&', ' 그리고 ', text)  # &를 "그리고"로
-        text = re.sub(r'@', ' 골뱅이 ', text)  # @를 "골뱅이"로
-        text = re.sub(r'#', ' 샵 ', text)      # #을 "샵"으로
-        text = re.sub(r'\+', ' 플러스 ', text) # +를 "플러스"로
-        text = re.sub(r'=', ' 같다 ', text)    # =를 "같다"로
-        text = re.sub(r'%', ' 퍼센트 ', text)  # %를 "퍼센트"로
-        
-        # 연속된 공백 정리
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
-    
     # 텍스트 전처리 적용
-    processed_text = preprocess_tts_text(text)
+    processed_text = _preprocess_tts_text(text)
     logger.info(f"TTS 텍스트 전처리: '{text[:50]}...' -> '{processed_text[:50]}...'")
-    
+
+    # 같은 대본/목소리로 다시 생성하는 경우 캐시된 음성 사용
+    cache_key = ""
+    if config.app.get("tts_cache_enabled", True):
+        cache_key = tts_cache_key(
+            _tts_provider(voice_name), voice_name, voice_rate, voice_volume, processed_text
+        )
+        cached = load_tts_cache(cache_key)
+        if cached:
+            audio, sub_maker = cached
+            with open(voice_file, "wb") as f:
+                f.write(audio)
+            logger.info(f"tts cache hit: {cache_key}, output file: {voice_file}")
+            return sub_maker
+
+    sub_maker = _synthesize(processed_text, voice_name, voice_rate, voice_file, voice_volume)
+    if cache_key and sub_maker is not None and os.path.isfile(voice_file):
+        with open(voice_file, "rb") as f:
+            save_tts_cache(cache_key, f.read(), sub_maker)
+    return sub_maker
+
+
+def _tts_provider(voice_name: str) -> str:
+    if is_azure_v2_voice(voice_name):
+        return "azure"
+    if is_siliconflow_voice(voice_name):
+        return "siliconflow"
+    if is_gemini_voice(voice_name):
+        return "gemini"
+    return "edge"
+
+
+def tts_cache_key(provider: str, voice_name: str, voice_rate, voice_volume, text: str) -> str:
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return utils.md5(f"{provider}|{voice_name}|{voice_rate}|{voice_volume}|{text_hash}")
+
+
+def _tts_cache_files(cache_key: str):
+    cache_dir = utils.storage_dir("tts_cache", create=True)
+    return (
+        os.path.join(cache_dir, f"{cache_key}.mp3"),
+        os.path.join(cache_dir, f"{cache_key}.json"),
+    )
+
+
+def load_tts_cache(cache_key: str):
+    """
+    Returns (audio bytes, SubMaker) of a cached synthesis or None.
+    """
+    audio_file, meta_file = _tts_cache_files(cache_key)
+    if not os.path.isfile(audio_file) or not os.path.isfile(meta_file):
+        return None
+    try:
+        with open(meta_file, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(audio_file, "rb") as f:
+            audio = f.read()
+        sub_maker = SubMaker()
+        sub_maker.subs = meta["subs"]
+        sub_maker.offset = [tuple(offset) for offset in meta["offset"]]
+        return audio, sub_maker
+    except Exception as e:
+        logger.warning(f"invalid tts cache: {cache_key} => {str(e)}")
+        return None
+
+
+def save_tts_cache(cache_key: str, audio: bytes, sub_maker: SubMaker):
+    audio_file, meta_file = _tts_cache_files(cache_key)
+    suffix = utils.get_uuid(True)
+    try:
+        # the audio goes first, load_tts_cache only trusts entries with a metadata file
+        with open(f"{audio_file}.{suffix}.tmp", "wb") as f:
+            f.write(audio)
+        os.replace(f"{audio_file}.{suffix}.tmp", audio_file)
+        with open(f"{meta_file}.{suffix}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"subs": sub_maker.subs, "offset": sub_maker.offset}, f, ensure_ascii=False)
+        os.replace(f"{meta_file}.{suffix}.tmp", meta_file)
+    except Exception as e:
+        logger.warning(f"failed to save tts cache: {cache_key} => {str(e)}")
+
+
+def _synthesize(
+    processed_text: str,
+    voice_name: str,
+    voice_rate: float,
+    voice_file: str,
+    voice_volume: float = 1.0,
+) -> Union[SubMaker, None]:
     if is_azure_v2_voice(voice_name):
         return azure_tts_v2(processed_text, voice_name, voice_file)
     elif is_siliconflow_voice(voice_name):
@@ -1197,48 +1285,218 @@ def convert_rate_to_percent(rate: float) -> str:
 def azure_tts_v1(
     text: str, voice_name: str, voice_rate: float, voice_file: str
 ) -> Union[SubMaker, None]:
+    """
+    Synthesize text with edge-tts.
+    The text is split into chunks at sentence boundaries, the chunks are
+    synthesized concurrently (at most tts_concurrency at a time), only failed
+    chunks are retried, and the audio and word boundaries are stitched together.
+    """
     voice_name = parse_voice_name(voice_name)
     text = text.strip()
     rate_str = convert_rate_to_percent(voice_rate)
-    for i in range(3):
-        try:
-            logger.info(f"start, voice name: {voice_name}, try: {i + 1}")
+    chunks = split_tts_chunks(text)
+    if not chunks:
+        return None
 
-            async def _do() -> SubMaker:
-                logger.debug(f"Creating Communicate object for {voice_name}")
-                communicate = edge_tts.Communicate(text, voice_name, rate=rate_str)
-                sub_maker = edge_tts.SubMaker()
-                logger.debug(f"Opening file {voice_file} for writing")
-                with open(voice_file, "wb") as file:
-                    logger.debug("Starting communicate.stream()")
-                    async for chunk in communicate.stream():
-                        if chunk["type"] == "audio":
-                            file.write(chunk["data"])
-                        elif chunk["type"] == "WordBoundary":
-                            sub_maker.create_sub(
-                                (chunk["offset"], chunk["duration"]), chunk["text"]
-                            )
-                    logger.debug("communicate.stream() finished")
-                return sub_maker
+    concurrency = config.app.get("tts_concurrency", 4)
+    logger.info(
+        f"start, voice name: {voice_name}, chunks: {len(chunks)}, concurrency: {concurrency}"
+    )
+    try:
+        segments = tts_loop.run(
+            _synthesize_segments(chunks, voice_name, rate_str, concurrency)
+        )
+    except Exception as e:
+        logger.error(f"failed, error: {str(e)}")
+        return None
 
-            logger.info("Running asyncio.run(_do()) with 60s timeout")
-            async def _do_with_timeout():
-                 return await asyncio.wait_for(_do(), timeout=60)
-            
-            sub_maker = asyncio.run(_do_with_timeout())
-            logger.info("asyncio.run(_do()) finished")
-            
-            if not sub_maker or not sub_maker.subs:
-                logger.warning("failed, sub_maker is None or sub_maker.subs is None")
-                continue
+    if any(segment is None for segment in segments):
+        logger.error("failed, some chunks could not be synthesized")
+        return None
 
-            logger.info(f"completed, output file: {voice_file}")
-            return sub_maker
+    sub_maker = _merge_segments(segments, voice_file)
+    logger.info(f"completed, output file: {voice_file}")
+    return sub_maker
+
+
+def is_edge_voice(voice_name: str) -> bool:
+    return not (
+        is_azure_v2_voice(voice_name)
+        or is_siliconflow_voice(voice_name)
+        or is_gemini_voice(voice_name)
+    )
+
+
+# edge-tts streams "audio-24khz-48kbitrate-mono-mp3", a constant 6000 bytes per second
+_EDGE_MP3_BYTES_PER_SECOND = 6000
+
+
+# Sentence-final punctuation (kept with the sentence) or line breaks
+_sentence_end = re.compile(r"(?<=[.!?。！？…])\s+|\n+")
+
+
+def split_tts_chunks(text: str, max_chars: int = 200) -> list:
+    """
+    Split text into chunks at sentence boundaries, consecutive short sentences
+    are grouped up to max_chars so that every request carries enough text.
+    """
+    chunks = []
+    chunk = ""
+    for sentence in _sentence_end.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if chunk and len(chunk) + len(sentence) + 1 > max_chars:
+            chunks.append(chunk)
+            chunk = sentence
+        else:
+            chunk = f"{chunk} {sentence}" if chunk else sentence
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+async def _edge_tts_segment_async(text: str, voice_name: str, rate_str: str, timeout: int = 60):
+    """
+    Synthesize one chunk of text with edge-tts in memory.
+    Returns (audio bytes, SubMaker) or None after 3 failed attempts.
+    """
+    async def _do():
+        communicate = edge_tts.Communicate(text, voice_name, rate=rate_str)
+        sub_maker = edge_tts.SubMaker()
+        audio = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio.extend(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                sub_maker.create_sub((chunk["offset"], chunk["duration"]), chunk["text"])
+        return bytes(audio), sub_maker
+
+    # sentence level cache, unchanged sentences of an edited script are not synthesized again.
+    # The file I/O runs in a thread, the event loop is shared by all the syntheses in flight
+    cache_key = ""
+    if config.app.get("tts_cache_enabled", True):
+        cache_key = tts_cache_key("edge", voice_name, rate_str, "", text)
+        cached = await asyncio.to_thread(load_tts_cache, cache_key)
+        if cached:
+            return cached
+
+    for i in range(3):
+        try:
+            async with tts_loop.semaphore:
+                audio, sub_maker = await asyncio.wait_for(_do(), timeout=timeout)
+            if audio and sub_maker.subs:
+                if cache_key:
+                    await asyncio.to_thread(save_tts_cache, cache_key, audio, sub_maker)
+                return audio, sub_maker
+            logger.warning(f"empty tts segment, try: {i + 1}, text: {text[:30]}")
         except Exception as e:
-            logger.error(f"failed, error: {str(e)}")
+            logger.error(f"failed to synthesize segment, try: {i + 1}, error: {str(e)}")
     return None
 
 
+async def _edge_tts_limited(semaphore: asyncio.Semaphore, text: str, voice_name: str, rate_str: str):
+    async with semaphore:
+        return await _edge_tts_segment_async(text, voice_name, rate_str)
+
+
+async def _synthesize_segments(texts: list, voice_name: str, rate_str: str, concurrency: int = 4) -> list:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    return await asyncio.gather(
+        *[_edge_tts_limited(semaphore, text, voice_name, rate_str) for text in texts]
+    )
+
+
+class TTSEventLoop:
+    """
+    A long-lived asyncio loop running in a background thread that owns all edge-tts
+    requests of the process. Task threads submit coroutines and wait on the returned
+    futures, instead of creating and tearing down a loop with asyncio.run per call.
+    The number of edge-tts requests in flight across all tasks is capped by
+    tts_max_concurrency.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+        self.semaphore = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="tts-loop", daemon=True)
+                thread.start()
+                self._loop = loop
+                self.semaphore = asyncio.Semaphore(max(1, config.app.get("tts_max_concurrency", 8)))
+            return self._loop
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    def run(self, coro):
+        return self.submit(coro).result()
+
+
+tts_loop = TTSEventLoop()
+
+
+def _merge_segments(segments: list, voice_file: str) -> SubMaker:
+    """
+    Concatenate mp3 segments into voice_file and shift the word boundaries
+    of every segment by the duration of the audio before it.
+    """
+    sub_maker = SubMaker()
+    offset = 0
+    with open(voice_file, "wb") as file:
+        for audio, segment_sub_maker in segments:
+            file.write(audio)
+            for (start, end), sub in zip(segment_sub_maker.offset, segment_sub_maker.subs):
+                sub_maker.offset.append((start + offset, end + offset))
+                sub_maker.subs.append(sub)
+            # in 100ns units, like the edge-tts offsets
+            offset += len(audio) * 10000000 // _EDGE_MP3_BYTES_PER_SECOND
+    return sub_maker
+
+
+def tts_stream(
+    sentences: Iterable[str],
+    voice_name: str,
+    voice_rate: float,
+    voice_file: str,
+    voice_volume: float = 1.0,
+) -> Union[SubMaker, None]:
+    """
+    Synthesize sentences as they arrive (e.g. from llm.generate_script_stream),
+    every sentence is sent to edge-tts as soon as it is complete and the
+    segments are stitched into one audio file afterwards.
+    Voices of other providers synthesize the joined text in one go.
+    """
+    if not is_edge_voice(voice_name):
+        return tts(" ".join(sentences), voice_name, voice_rate, voice_file, voice_volume)
+
+    voice_name = parse_voice_name(voice_name)
+    rate_str = convert_rate_to_percent(voice_rate)
+    semaphore = asyncio.Semaphore(max(1, config.app.get("tts_concurrency", 4)))
+    futures = []
+    for sentence in sentences:
+        text = _preprocess_tts_text(sentence)
+        if text:
+            logger.info(f"tts segment {len(futures) + 1}: {text[:30]}")
+            futures.append(
+                tts_loop.submit(_edge_tts_limited(semaphore, text, voice_name, rate_str))
+            )
+    segments = [future.result() for future in futures]
+
+    if not segments or any(segment is None for segment in segments):
+        logger.error("failed to synthesize all segments")
+        return None
+
+    sub_maker = _merge_segments(segments, voice_file)
+    logger.info(f"completed, {len(segments)} segments, output file: {voice_file}")
+    return sub_maker
+
+
 def siliconflow_tts(
     text: str,
     model: str,
@@ -1307,45 +1565,15 @@ def siliconflow_tts(
 
                 # 获取音频文件的实际长度
                 try:
-                    # 尝试使用moviepy获取音频长度
-                    from moviepy import AudioFileClip
-
-                    audio_clip = AudioFileClip(voice_file)
-                    audio_duration = audio_clip.duration
-                    audio_clip.close()
+                    # 从文件头读取音频长度
+                    audio_duration = audio_meta.get_duration(voice_file)
 
                     # 将音频长度转换为100纳秒单位（与edge_tts兼容）
                     audio_duration_100ns = int(audio_duration * 10000000)
 
-                    # 使用文本分割来创建更准确的字幕
-                    # 将文本按标点符号分割成句子
-                    sentences = utils.split_string_by_punctuations(text)
-
-                    if sentences:
-                        # 计算每个句子的大致时长（按字符数比例分配）
-                        total_chars = sum(len(s) for s in sentences)
-                        char_duration = (
-                            audio_duration_100ns / total_chars if total_chars > 0 else 0
-                        )
-
-                        current_offset = 0
-                        for sentence in sentences:
-                            if not sentence.strip():
-                                continue
-
-                            # 计算当前句子的时长
-                            sentence_chars = len(sentence)
-                            sentence_duration = int(sentence_chars * char_duration)
-
-                            # 添加到SubMaker
-                            sub_maker.subs.append(sentence)
-                            sub_maker.offset.append(
-                                (current_offset, current_offset + sentence_duration)
-                            )
-
-                            # 更新偏移量
-                            current_offset += sentence_duration
-                    else:
+                    # 按音频中的停顿对齐每个句子的时间
+                    sub_maker = align_subtitles(text, voice_file)
+                    if not sub_maker.subs:
                         # 如果无法分割，则使用整个文本作为一个字幕
                         sub_maker.subs = [text]
                         sub_maker.offset = [(0, audio_duration_100ns)]
@@ -1496,21 +1724,20 @@ def gemini_tts(
     import json
     import io
     from pydub import AudioSegment
-    import google.generativeai as genai
-    
+
+    from app.services import llm
+
     try:
         # 配置Gemini API
         api_key = config.app.get("gemini_api_key", "")
         if not api_key:
             logger.error("Gemini API key is not set")
             return None
-            
-        genai.configure(api_key=api_key)
-        
+
         logger.info(f"start, voice name: {voice_name}, try: 1")
-        
-        # 使用Gemini TTS API
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-tts")
+
+        # 使用Gemini TTS API, 模型绑定到该密钥的客户端 (genai.configure 是进程级的)
+        model = llm._get_gemini_model(api_key, "gemini-2.5-flash-preview-tts")
         
         generation_config = {
             "response_modalities": ["AUDIO"],
@@ -1573,18 +1800,20 @@ def gemini_tts(
         
         logger.info(f"completed, output file: {voice_file}")
         
-        # 创建SubMaker对象用于字幕
-        sub_maker = SubMaker()
-        audio_duration = len(audio_segment) / 1000.0  # 转换为秒
-        
-        # 将音频长度转换为100纳秒单位（与edge_tts兼容）
-        audio_duration_100ns = int(audio_duration * 10000000)
-        
-        # 使用create_sub方法正确创建字幕项
-        sub_maker.create_sub(
-            (0, audio_duration_100ns), 
-            text
-        )
+        # 按音频中的停顿创建逐句字幕
+        samples = np.frombuffer(audio_segment.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+        sub_maker = align_subtitles(text, voice_file, samples, audio_segment.frame_rate)
+        if not sub_maker.subs:
+            audio_duration = len(audio_segment) / 1000.0  # 转换为秒
+            
+            # 将音频长度转换为100纳秒单位（与edge_tts兼容）
+            audio_duration_100ns = int(audio_duration * 10000000)
+            
+            # 使用create_sub方法正确创建字幕项
+            sub_maker.create_sub(
+                (0, audio_duration_100ns), 
+                text
+            )
         
         return sub_maker
         
@@ -1596,6 +1825,25 @@ def gemini_tts(
         return None
 
 
+def align_subtitles(
+    text: str, voice_file: str, samples=None, sample_rate: int = alignment.SAMPLE_RATE
+) -> SubMaker:
+    """
+    为没有字级时间戳的语音（siliconflow、gemini）生成逐句字幕
+    句子边界按字数估计，再对齐到音频能量包络中最近的停顿
+    """
+    sub_maker = SubMaker()
+    sentences = [s for s in utils.split_string_by_punctuations(text) if s.strip()]
+    if not sentences:
+        return sub_maker
+    if samples is None:
+        samples = alignment.decode_audio(voice_file, sample_rate)
+    for sentence, (start, end) in zip(sentences, alignment.align_sentences(sentences, samples, sample_rate)):
+        sub_maker.subs.append(sentence)
+        sub_maker.offset.append((int(start * 10000000), int(end * 10000000)))
+    return sub_maker
+
+
 def _format_text(text: str) -> str:
     # text = text.replace("\n", " ")
     text = text.replace("[", " ")
@@ -1618,16 +1866,6 @@ def create_subtitle(sub_maker: submaker.SubMaker, text: str, subtitle_file: str)
 
     text = _format_text(text)
 
-    def formatter(idx: int, start_time: float, end_time: float, sub_text: str) -> str:
-        """
-        1
-        00:00:00,000 --> 00:00:02,360
-        跑步是一项简单易行的运动
-        """
-        start_t = mktimestamp(start_time).replace(".", ",")
-        end_t = mktimestamp(end_time).replace(".", ",")
-        return f"{idx}\n{start_t} --> {end_t}\n{sub_text}\n"
-
     start_time = -1.0
     sub_items = []
     sub_index = 0
@@ -1667,28 +1905,18 @@ def create_subtitle(sub_maker: submaker.SubMaker, text: str, subtitle_file: str)
             sub_text = match_line(sub_line, sub_index)
             if sub_text:
                 sub_index += 1
-                line = formatter(
-                    idx=sub_index,
-                    start_time=start_time,
-                    end_time=end_time,
-                    sub_text=sub_text,
-                )
-                sub_items.append(line)
+                # 100ns -> ms
+                sub_items.append((start_time // 10000, end_time // 10000, sub_text))
                 start_time = -1.0
                 sub_line = ""
 
         if len(sub_items) == len(script_lines):
-            with open(subtitle_file, "w", encoding="utf-8") as file:
-                file.write("\n".join(sub_items) + "\n")
-            try:
-                sbs = subtitles.file_to_subtitles(subtitle_file, encoding="utf-8")
-                duration = max([tb for ((ta, tb), txt) in sbs])
-                logger.info(
-                    f"completed, subtitle file created: {subtitle_file}, duration: {duration}"
-                )
-            except Exception as e:
-                logger.error(f"failed, error: {str(e)}")
-                os.remove(subtitle_file)
+            starts, ends, texts = zip(*sub_items) if sub_items else ((), (), ())
+            track = SubtitleTrack(starts, ends, texts)
+            track.save(subtitle_file)
+            logger.info(
+                f"completed, subtitle file created: {subtitle_file}, duration: {track.duration}"
+            )
         else:
             logger.warning(
                 f"failed, sub_items len: {len(sub_items)}, script_lines len: {len(script_lines)}"
@@ -1714,13 +1942,8 @@ def _get_audio_duration_from_mp3(mp3_file: str) -> float:
         logger.error(f"MP3 file does not exist: {mp3_file}")
         return 0.0
 
-    try:
-        # Use moviepy to get the duration of the MP3 file
-        with AudioFileClip(mp3_file) as audio:
-            return audio.duration  # Duration in seconds
-    except Exception as e:
-        logger.error(f"Failed to get audio duration from MP3: {str(e)}")
-        return 0.0
+    # read from the mp3 headers, no decoder is started
+    return audio_meta.get_duration(mp3_file)
 
 def get_audio_duration( target: Union[str, submaker.SubMaker]) -> float:
     """
@@ -0,0 +1,167 @@
+"""
+Resident Whisper workers
+Each worker is a separate process that loads the model once and then serves
+transcription jobs from its queue, so a slow or crashing transcription never
+takes the API process down and the model load time is paid once per worker.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+
+from app.config import config
+
+
+def _settings() -> dict:
+    return {
+        "model_size": config.whisper.get("model_size", "large-v3"),
+        "device": config.whisper.get("device", "cpu"),
+        "compute_type": config.whisper.get("compute_type", "int8"),
+        "cpu_threads": int(config.whisper.get("cpu_threads", 4)),
+    }
+
+
+def _worker_main(jobs, results, settings: dict):
+    # limit the math libraries before they are imported by faster_whisper
+    if settings["cpu_threads"] > 0:
+        for name in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]:
+            os.environ[name] = str(settings["cpu_threads"])
+
+    from app.services import subtitle
+
+    whisper_model = subtitle.load_model(
+        settings["model_size"], settings["device"], settings["compute_type"], settings["cpu_threads"]
+    )
+    results.put(("ready", whisper_model is not None))
+
+    while True:
+        audio_file = jobs.get()
+        if audio_file is None:
+            break
+        if whisper_model is None:
+            results.put(("error", "whisper model is not available"))
+            continue
+        try:
+            results.put(("ok", subtitle.transcribe(whisper_model, audio_file)))
+        except Exception as e:
+            results.put(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, settings: dict):
+        context = multiprocessing.get_context("spawn")
+        self.jobs = context.Queue()
+        self.results = context.Queue()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(self.jobs, self.results, settings),
+            name="whisper-worker",
+            daemon=True,
+        )
+        self.process.start()
+        self.ready = None
+
+    def wait(self, deadline: float):
+        """
+        Next message from the worker, None if the deadline passed or the worker died.
+        """
+        while time.time() < deadline:
+            try:
+                return self.results.get(timeout=min(1.0, max(0.01, deadline - time.time())))
+            except queue.Empty:
+                if not self.process.is_alive():
+                    return None
+        return None
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+
+class WhisperWorkerPool:
+    """
+    N worker processes (whisper.workers), jobs wait for an idle worker.
+    A worker that exceeds whisper.job_timeout is killed and replaced.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._size = 0
+
+    @property
+    def started(self) -> bool:
+        return self._size > 0
+
+    def start(self):
+        with self._lock:
+            size = max(1, int(config.whisper.get("workers", 1)))
+            settings = _settings()
+            while self._size < size:
+                self._idle.put(_Worker(settings))
+                self._size += 1
+            logger.info(f"whisper workers started: {self._size}, settings: {settings}")
+
+    def transcribe(self, audio_file: str, timeout: float = 0) -> Optional[list]:
+        """
+        Returns the recognized sentences (see subtitle.transcribe), None on failure.
+        """
+        if not self.started:
+            self.start()
+        timeout = timeout or float(config.whisper.get("job_timeout", 600))
+        load_timeout = float(config.whisper.get("load_timeout", 600))
+
+        worker = self._idle.get()
+        try:
+            if not worker.process.is_alive():
+                logger.warning("whisper worker exited, restarting")
+                worker = _Worker(_settings())
+
+            # the first job of a worker waits for the model to be loaded
+            if worker.ready is None:
+                message = worker.wait(time.time() + load_timeout)
+                worker.ready = bool(message and message[1])
+                if message is None:
+                    logger.error("whisper worker did not load the model in time, restarting")
+                    worker.kill()
+                    worker = _Worker(_settings())
+                    return None
+            if not worker.ready:
+                logger.warning("whisper model is not available, skipping whisper subtitle generation")
+                return None
+
+            start = time.time()
+            worker.jobs.put(audio_file)
+            message = worker.wait(start + timeout)
+            if message is None:
+                logger.error(f"whisper job timed out after {timeout}s or worker crashed: {audio_file}")
+                worker.kill()
+                worker = _Worker(_settings())
+                return None
+
+            status, result = message
+            if status != "ok":
+                logger.error(f"whisper job failed: {audio_file} => {result}")
+                return None
+            logger.info(f"whisper job completed in {time.time() - start:.2f}s: {audio_file}")
+            return result
+        finally:
+            self._idle.put(worker)
+
+    def stop(self):
+        with self._lock:
+            while self._size > 0:
+                worker = self._idle.get()
+                worker.jobs.put(None)
+                worker.process.join(timeout=5)
+                worker.kill()
+                self._size -= 1
+
+
+whisper_pool = WhisperWorkerPool()
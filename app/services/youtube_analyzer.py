@@ -247,7 +247,7 @@ def analyze_and_reinterpret_content(original_transcript: str, video_info: Dict)
     """
     
     try:
-        response = llm._generate_response(prompt)
+        response = llm._generate_response(prompt, use_cache=False)
         if response:
             # 대본 정리
             script = response.strip()
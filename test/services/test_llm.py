@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.config import config
+from app.services import llm
+
+
+class TestLlmCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        def storage_dir(sub_dir: str = "", create: bool = False):
+            d = os.path.join(self.temp_dir.name, sub_dir)
+            if create and not os.path.exists(d):
+                os.makedirs(d)
+            return d
+
+        patcher = mock.patch.object(llm.utils, "storage_dir", side_effect=storage_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app_config = mock.patch.dict(
+            config.app, {"llm_provider": "gemini", "llm_cache_enabled": True, "llm_cache_ttl": 3600}
+        )
+        app_config.start()
+        self.addCleanup(app_config.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def cached_files(self):
+        cache_dir = os.path.join(self.temp_dir.name, "llm_cache")
+        return os.listdir(cache_dir) if os.path.isdir(cache_dir) else []
+
+    def test_hedged_answer_not_cached(self):
+        with mock.patch.object(llm, "_answer", return_value=("hedged", "deepseek")):
+            self.assertEqual(llm._generate_response("prompt"), "hedged")
+        self.assertEqual(self.cached_files(), [])
+
+        with mock.patch.object(llm, "_answer", return_value=("answer", "gemini")):
+            self.assertEqual(llm._generate_response("prompt"), "answer")
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_hedged_request(self):
+        def slow():
+            time.sleep(0.5)
+            return "primary"
+
+        self.assertEqual(llm._hedged_request(slow, lambda: "secondary", 0.05), ("secondary", True))
+        self.assertEqual(llm._hedged_request(lambda: "primary", lambda: "secondary", 1), ("primary", False))
+
+    def test_prune(self):
+        for i in range(3):
+            llm._save_cached_response(f"key{i}", "x" * 1000)
+        old = time.time() - 7200
+        os.utime(llm._cache_file("key0"), (old, old))
+
+        # expired
+        self.assertEqual(llm.prune_llm_cache(max_size_mb=0), 1)
+        self.assertEqual(sorted(self.cached_files()), ["key1.json", "key2.json"])
+        # over the size limit, the oldest first
+        os.utime(llm._cache_file("key1"), (old + 3600, old + 3600))
+        self.assertEqual(llm.prune_llm_cache(max_size_mb=1500 / 1024 / 1024), 1)
+        self.assertEqual(self.cached_files(), ["key2.json"])
+
+
+class TestScriptPrompts(unittest.TestCase):
+    def test_batch_uses_script_requirements(self):
+        prompts = []
+
+        def generate_response(prompt, use_cache=True):
+            prompts.append(prompt)
+            return "[]"
+
+        for language in ["ko-KR", "en-US"]:
+            prompts.clear()
+            with mock.patch.object(llm, "_generate_response", side_effect=generate_response), mock.patch.object(
+                llm, "generate_script", return_value="script"
+            ), mock.patch.object(llm, "generate_terms", return_value=["ocean"]):
+                llm.generate_scripts_batch(["subject"], language, paragraph_number=2)
+            requirements = llm._script_requirements(language, 2)["requirements"]
+            # the batch and the single prompt ask for the same script
+            self.assertIn(requirements, prompts[0])
+            self.assertIn(requirements, llm._build_script_prompt("subject", language, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
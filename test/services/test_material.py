@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from moviepy import VideoClip
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.models.schema import MaterialInfo
+from app.services import material as mt
+from app.services.library import MaterialLibrary
+from app.services.utils import fingerprint as fp
+
+
+def make_video(file_path, width, height, pattern):
+    def make_frame(t):
+        y, x = np.mgrid[0:height, 0:width]
+        if pattern == "gradient":
+            v = (x / width * 255 + t * 40) % 255
+        else:
+            v = ((x // (width // 8) + y // (height // 8)) % 2) * 255
+        return np.dstack([v, v, v]).astype("uint8")
+
+    VideoClip(make_frame, duration=2).write_videofile(
+        file_path, fps=10, codec="libx264", logger=None, ffmpeg_params=["-pix_fmt", "yuv420p"]
+    )
+
+
+class TestMaterialService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # the library indexes every clip of its directory, a private one holds only these
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.video_a = os.path.join(cls.temp_dir.name, "material-gradient-small.mp4")
+        cls.video_b = os.path.join(cls.temp_dir.name, "material-gradient-large.mp4")
+        cls.video_c = os.path.join(cls.temp_dir.name, "material-checker.mp4")
+        make_video(cls.video_a, 160, 96, "gradient")
+        make_video(cls.video_b, 320, 192, "gradient")
+        make_video(cls.video_c, 160, 96, "checker")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def test_fingerprint_near_duplicate(self):
+        fp_a = fp.compute_video_fingerprint(self.video_a)
+        fp_b = fp.compute_video_fingerprint(self.video_b)
+        fp_c = fp.compute_video_fingerprint(self.video_c)
+        self.assertTrue(fp_a)
+        self.assertEqual(len(fp_a.split("-")), len(fp.KEYFRAME_POSITIONS))
+
+        # different renditions of the same footage
+        self.assertTrue(fp.is_near_duplicate(fp_b, [fp_a]))
+        # different footage
+        self.assertFalse(fp.is_near_duplicate(fp_c, [fp_a, fp_b]))
+        self.assertFalse(fp.is_near_duplicate("", [fp_a]))
+
+    def test_index_material(self):
+        item = MaterialInfo(provider="pexels", url="https://example.com/a.mp4", duration=2)
+        meta = mt.index_material(self.video_a, item, "gradient")
+        self.assertTrue(meta["fingerprint"])
+        self.assertEqual(meta["search_terms"], ["gradient"])
+
+        meta = mt.index_material(self.video_a, search_term="colors")
+        self.assertEqual(meta["search_terms"], ["gradient", "colors"])
+        self.assertEqual(mt.load_material_meta(self.video_a)["url"], item.url)
+
+    def test_library_search(self):
+        mt.index_material(self.video_a, search_term="ocean waves")
+        mt.index_material(self.video_b, search_term="ocean sunset")
+        mt.index_material(self.video_c, search_term="chess board")
+        index_file = os.path.join(self.temp_dir.name, "material-library.json")
+        try:
+            lib = MaterialLibrary(index_file=index_file, dirs=[self.temp_dir.name])
+            self.assertGreaterEqual(lib.refresh(), 3)
+
+            items = lib.search("ocean waves")
+            self.assertEqual(items[0].url, self.video_a)
+            self.assertIn(self.video_b, [item.url for item in items])
+            self.assertNotIn(self.video_c, [item.url for item in items])
+
+            # "wave" is not a tag word, matched by embedding similarity
+            items = lib.search("ocean wave")
+            self.assertEqual(items[0].url, self.video_a)
+            self.assertTrue(os.path.isfile(lib.vectors_file))
+
+            # words sharing only a few letters with the tags are not matched
+            for term in ["motion", "promotion", "emotion", "sunrise", "keyboard"]:
+                self.assertEqual(lib.search(term), [], term)
+            items = lib.search("chessboard")
+            self.assertEqual([item.url for item in items], [self.video_c])
+
+            # the two ocean clips are the same footage, only one is selected
+            videos = lib.select_videos(["ocean"], audio_duration=10, max_clip_duration=1)
+            self.assertEqual(len(videos), 1)
+
+            # the index is reloaded from disk
+            lib = MaterialLibrary(index_file=index_file, dirs=[self.temp_dir.name])
+            lib.refresh()
+            self.assertEqual(lib.search("chess")[0].url, self.video_c)
+        finally:
+            for path in [index_file, f"{os.path.splitext(index_file)[0]}.npz"]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
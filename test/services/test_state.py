@@ -0,0 +1,118 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.models import const
+from app.services import state as sm
+from app.services.progress import ProgressReporter
+from app.services.state import LocalSubscription, SQLiteState, task_events
+
+
+class TestSQLiteState(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.temp_dir.name, "state.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_update_task(self):
+        state = SQLiteState(self.db_file, flush_interval=60)
+        state.update_task("task-1", progress=5, message="started")
+        state.update_task("task-1", progress=50, videos=["final-1.mp4"])
+        state.update_task("task-1", progress=150)
+        task = state.get_task("task-1")
+        self.assertEqual(task["progress"], 100)
+        # fields of earlier updates are kept
+        self.assertEqual(task["message"], "started")
+        self.assertEqual(task["videos"], ["final-1.mp4"])
+
+        state.update_task("task-1", state=const.TASK_STATE_COMPLETE, progress=100)
+        state.close()
+
+        # durable across restarts
+        state = SQLiteState(self.db_file)
+        self.assertEqual(state.get_task("task-1")["state"], const.TASK_STATE_COMPLETE)
+        self.assertIsNone(state.get_task("task-2"))
+        state.close()
+
+    def test_get_all_tasks(self):
+        state = SQLiteState(self.db_file)
+        for i in range(5):
+            state.update_task(f"task-{i}")
+        tasks, total = state.get_all_tasks(2, 2)
+        self.assertEqual(total, 5)
+        self.assertEqual([task["task_id"] for task in tasks], ["task-2", "task-3"])
+
+        state.delete_task("task-0")
+        self.assertEqual(state.get_all_tasks(1, 10)[1], 4)
+        state.close()
+
+    def test_prune(self):
+        state = SQLiteState(self.db_file, retention_days=1)
+        state.update_task("done", state=const.TASK_STATE_COMPLETE, progress=100)
+        state.update_task("running")
+        state._db.execute("UPDATE tasks SET updated_at = ?", (time.time() - 2 * 86400,))
+        state.prune()
+        self.assertIsNone(state.get_task("done"))
+        self.assertIsNotNone(state.get_task("running"))
+        state.close()
+
+
+class TestProgressReporter(unittest.TestCase):
+    def test_coalesce(self):
+        reporter = ProgressReporter(max_rate=0.5)
+        task_id = "test-progress-reporter"
+        reporter.update_task(task_id, progress=10, script="script")
+        reporter.update_task(task_id, progress=20, message="20%")
+        reporter.update_task(task_id, progress=30)
+        # only the first update is written, the others wait for the next slot
+        self.assertEqual(sm.state.get_task(task_id)["progress"], 10)
+
+        reporter.flush(task_id)
+        task = sm.state.get_task(task_id)
+        self.assertEqual(task["progress"], 30)
+        self.assertEqual(task["message"], "20%")
+        self.assertEqual(task["script"], "script")
+
+        # a change of state is written at once
+        reporter.update_task(task_id, state=const.TASK_STATE_COMPLETE, progress=100)
+        self.assertEqual(sm.state.get_task(task_id)["state"], const.TASK_STATE_COMPLETE)
+        sm.state.delete_task(task_id)
+
+
+class TestRedisState(unittest.TestCase):
+    def test_lazy_connection(self):
+        # created when the state module is imported, must not need a running server
+        state = sm.RedisState(host="127.0.0.1", port=1)
+        self.assertFalse(state._indexed)
+        with self.assertRaises(Exception):
+            state.get_all_tasks(1, 10)
+        # retried on the next call
+        self.assertFalse(state._indexed)
+
+
+class TestTaskEvents(unittest.TestCase):
+    def test_subscribe(self):
+        async def run():
+            subscription = LocalSubscription("task-events")
+            self.assertIsNone(await subscription.get(0.01))
+            # published from another thread, like the task threads do
+            await asyncio.to_thread(task_events.publish, "task-events", {"progress": 50})
+            fields = await subscription.get(1)
+            await subscription.close()
+            return fields
+
+        self.assertEqual(asyncio.run(run()), {"progress": 50})
+        self.assertFalse(task_events.wait("task-events", timeout=0.01))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import subtitle
+from app.services.utils.subtitle_track import SubtitleTrack
+from app.utils import utils
+
+
+class TestSubtitleService(unittest.TestCase):
+    def test_levenshtein_distance(self):
+        self.assertEqual(subtitle.levenshtein_distance("kitten", "sitting"), 3)
+        self.assertEqual(subtitle.levenshtein_distance("", "abc"), 3)
+        self.assertEqual(subtitle.levenshtein_distance("flaw", "lawn"), 2)
+        self.assertEqual(subtitle.levenshtein_distance("a" * 80, "b" * 80), 80)
+        # stops once the distance is known to exceed the limit
+        self.assertEqual(subtitle.levenshtein_distance("kitten", "sitting", 1), 2)
+
+    def test_align_many_segments_per_line(self):
+        words = "running is a simple sport that keeps you healthy and happy every day".split()
+        # one unpunctuated line recognized word by word
+        self.assertEqual(subtitle.align([" ".join(words)], words), [(0, len(words))])
+        lines = [" ".join(words[:6]), " ".join(words[6:])]
+        self.assertEqual(subtitle.align(lines, words), [(0, 6), (6, 7)])
+
+        # 5 lines of 8 words each, more than MAX_MERGED_SEGMENTS segments per line
+        words = [f"word{i}" for i in range(40)]
+        lines = [" ".join(words[i * 8 : i * 8 + 8]) for i in range(5)]
+        self.assertEqual(subtitle.align(lines, words), [(i * 8, 8) for i in range(5)])
+
+        # nothing matches: no path, every line is left unmatched
+        self.assertEqual(subtitle.align(["hello world"] * 3, ["zzz"] * 40), [None] * 3)
+
+    def test_subtitle_track(self):
+        content = "\ufeff1\r\n00:00:00,000 --> 00:00:01,500\r\nHello\r\n\r\n2\r\n00:00:01,500 --> 00:01:02,25\r\nline one\r\nline two"
+        track = SubtitleTrack.parse(content)
+        self.assertEqual(track.starts.tolist(), [0, 1500])
+        self.assertEqual(track.ends.tolist(), [1500, 62250])
+        self.assertEqual(track.texts, ["Hello", "line one\nline two"])
+        self.assertEqual(track.duration, 62.25)
+
+        srt = track.to_srt()
+        self.assertEqual(srt.split("\n")[:3], ["1", "00:00:00,000 --> 00:00:01,500", "Hello"])
+        self.assertEqual(SubtitleTrack.parse(srt).items(), track.items())
+
+        ass = track.to_ass(width=1080, height=1920, font_name="Noto Sans", font_size=72)
+        self.assertIn("PlayResY: 1920", ass)
+        self.assertIn("Style: Default,Noto Sans,72,", ass)
+        self.assertIn("Dialogue: 0,0:00:01.50,0:01:02.25,Default,,0,0,0,,line one\\Nline two", ass)
+
+    def test_correct(self):
+        script = "Running is a simple sport, it keeps you healthy, start slowly, and enjoy every step."
+        recognized = [
+            ("Running is a", 0.0, 1.0),
+            ("simple sport", 1.0, 2.0),
+            ("uh", 2.0, 2.4),
+            ("it keeps you healty", 2.5, 4.0),
+            ("and enjoy every step", 5.5, 7.0),
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            subtitle_file = os.path.join(temp_dir, "test-correct.srt")
+            with open(subtitle_file, "w", encoding="utf-8") as f:
+                for i, (text, start, end) in enumerate(recognized):
+                    f.write(utils.text_to_srt(i + 1, text, start, end) + "\n")
+
+            subtitle.correct(subtitle_file, script)
+            items = subtitle.file_to_subtitles(subtitle_file)
+
+        self.assertEqual(
+            [item[2] for item in items],
+            ["Running is a simple sport", "it keeps you healthy", "start slowly", "and enjoy every step"],
+        )
+        self.assertEqual(items[0][1], "00:00:00,000 --> 00:00:02,000")
+        self.assertEqual(items[1][1], "00:00:02,500 --> 00:00:04,000")
+        # not recognized: placed in the gap between its neighbours
+        self.assertEqual(items[2][1], "00:00:04,000 --> 00:00:05,500")
+        self.assertEqual(items[3][1], "00:00:05,500 --> 00:00:07,000")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
 import os
 import sys
+import tempfile
 from pathlib import Path
+from unittest import mock
 
 # add project root to python path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -60,7 +62,49 @@ class TestTaskService(unittest.TestCase):
         )
         result = tm.start(task_id=task_id, params=params)
         print(result)
-    
+
+    def test_library_fallback_keeps_params(self):
+        params = VideoParams(video_subject="test", video_source="library")
+        with mock.patch.object(tm.lib.library, "select_videos", return_value=[]), mock.patch.object(
+            tm.material, "download_videos", return_value=["video.mp4"]
+        ) as download_videos:
+            videos = tm.get_video_materials("test-library-fallback", params, ["ocean"], 10)
+        self.assertEqual(videos, ["video.mp4"])
+        self.assertIn(download_videos.call_args.kwargs["source"], ["pexels", "pixabay"])
+        # a later variant or retry of the same params still looks in the library first
+        self.assertEqual(params.video_source, "library")
+
+    def test_streamed_script_keeps_paragraphs(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        task_dir = mock.patch.object(tm.utils, "task_dir", return_value=temp_dir.name)
+        task_dir.start()
+        self.addCleanup(task_dir.stop)
+        params = VideoParams(video_subject="test", paragraph_number=2)
+        chunks = ["첫 문장입니다. 둘째 문", "장입니다.\n\n셋째 문단입니다."]
+        spoken = []
+
+        def tts_stream(sentences, **kwargs):
+            spoken.extend(sentences)
+            return None
+
+        with mock.patch.object(tm.llm, "_stream_response", return_value=iter(chunks)), mock.patch.object(
+            tm.voice, "tts_stream", side_effect=tts_stream
+        ):
+            video_script, audio = tm.generate_script_and_audio("test-streamed-script", params)
+        self.assertEqual(video_script, "첫 문장입니다. 둘째 문장입니다.\n\n셋째 문단입니다.")
+        self.assertEqual(len(spoken), 3)
+        self.assertIsNone(audio)
+
+        # an error answer is not spoken, the caller falls back to generate_script
+        spoken.clear()
+        with mock.patch.object(tm.llm, "_stream_response", return_value=iter(["Error: quota exceeded"])), mock.patch.object(
+            tm.voice, "tts_stream", side_effect=tts_stream
+        ):
+            with self.assertRaises(ValueError):
+                tm.generate_script_and_audio("test-streamed-script", params)
+        self.assertEqual(spoken, [])
+
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,99 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.controllers.manager.process_pool import TaskProcessPool
+from app.models import const
+from app.services import state as sm
+from app.services import whisper_worker
+
+
+def _hang(task_id):
+    sm.state.update_task(task_id, progress=5)
+    time.sleep(60)
+
+
+def _transcribe(task_id):
+    # what subtitle.create does with whisper.workers > 0
+    from app.services.whisper_worker import whisper_pool
+
+    subtitles = whisper_pool.transcribe("audio.mp3")
+    sm.state.update_task(task_id, progress=50, message=subtitles[0]["msg"])
+
+
+def _coalesced_progress(task_id):
+    from app.services.progress import progress_reporter
+
+    progress_reporter.update_task(task_id, progress=10)
+    # within progress_max_rate, left to the reporter thread
+    progress_reporter.update_task(task_id, progress=20)
+
+
+class TestTaskProcessPool(unittest.TestCase):
+    def test_kill_deleted_task(self):
+        pool = TaskProcessPool(1)
+        task_id = "test-kill-deleted-task"
+        sm.state.update_task(task_id)
+        try:
+            thread = threading.Thread(target=pool.run, args=(_hang,), kwargs={"task_id": task_id})
+            thread.start()
+            deadline = time.time() + 30
+            while time.time() < deadline and (sm.state.get_task(task_id) or {}).get("progress") != 5:
+                time.sleep(0.1)
+
+            # what the delete endpoint does
+            self.assertTrue(pool.kill(task_id))
+            sm.state.delete_task(task_id)
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive())
+            # not recreated as a failed task
+            self.assertIsNone(sm.state.get_task(task_id))
+        finally:
+            pool.stop()
+
+    def test_timeout(self):
+        pool = TaskProcessPool(1, task_timeout=1)
+        task_id = "test-task-timeout"
+        sm.state.update_task(task_id)
+        try:
+            self.assertFalse(pool.run(_hang, task_id=task_id))
+            task = sm.state.get_task(task_id)
+            self.assertEqual(task["state"], const.TASK_STATE_FAILED)
+            self.assertIn("timed out", task["message"])
+        finally:
+            pool.stop()
+            sm.state.delete_task(task_id)
+
+    def test_progress_flushed_before_done(self):
+        pool = TaskProcessPool(1)
+        task_id = "test-progress-flushed"
+        try:
+            self.assertTrue(pool.run(_coalesced_progress, task_id=task_id))
+            self.assertEqual(sm.state.get_task(task_id)["progress"], 20)
+        finally:
+            pool.stop()
+            sm.state.delete_task(task_id)
+
+    def test_whisper_in_worker(self):
+        pool = TaskProcessPool(1)
+        task_id = "test-whisper-in-worker"
+        subtitles = [{"msg": "hello", "start_time": 0.0, "end_time": 1.0}]
+        try:
+            # a task worker cannot start whisper workers, its jobs run in this process
+            with mock.patch.object(whisper_worker.whisper_pool, "transcribe", return_value=subtitles) as transcribe:
+                self.assertTrue(pool.run(_transcribe, task_id=task_id))
+            transcribe.assert_called_once_with("audio.mp3", 0)
+            self.assertEqual(sm.state.get_task(task_id)["message"], "hello")
+        finally:
+            pool.stop()
+            sm.state.delete_task(task_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
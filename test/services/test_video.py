@@ -2,13 +2,15 @@
 import unittest
 import os
 import sys
+import tempfile
+import time
 from pathlib import Path
 from moviepy import (
     VideoFileClip,
 )
 # add project root to python path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from app.models.schema import MaterialInfo
+from app.models.schema import MaterialInfo, VideoParams
 from app.services import video as vd
 from app.utils import utils
 
@@ -81,5 +83,54 @@ class TestVideoService(unittest.TestCase):
         except Exception as e:
             self.fail(f"test wrap_text failed: {str(e)}")
 
+    def test_render_subtitle_sprites(self):
+        font_path = os.path.join(utils.font_dir(), "NanumGothic-Bold.ttf")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            subtitle_path = os.path.join(temp_dir, "subtitle.srt")
+            with open(subtitle_path, "w", encoding="utf-8") as f:
+                f.write(
+                    "1\n00:00:00,500 --> 00:00:01,500\nhello world\n\n"
+                    "2\n00:00:01,500 --> 00:00:02,000\n안녕하세요\n\n"
+                    "3\n00:00:03,000 --> 00:00:04,250\nhello world\n"
+                )
+            cache_dir = os.path.join(temp_dir, "cache")
+            os.makedirs(cache_dir)
+            params = VideoParams(video_subject="test")
+
+            concat_path = vd.render_subtitle_sprites(subtitle_path, params, font_path, cache_dir=cache_dir)
+            with open(concat_path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines[0], "ffconcat version 1.0")
+            files = [line[len("file '"):-1] for line in lines if line.startswith("file ")]
+            durations = [line.split(" ")[1] for line in lines if line.startswith("duration ")]
+            # blank, cue 1, cue 2, blank gap, cue 3 (same text as cue 1), blank x2
+            self.assertEqual(durations, ["0.500", "1.000", "0.500", "1.000", "1.250", "1.000", "1.000"])
+            blank = files[0]
+            self.assertEqual(files[3], blank)
+            self.assertEqual(files[-2:], [blank, blank])
+            self.assertEqual(files[1], files[4])
+            self.assertNotEqual(files[1], files[2])
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+            # a second render reuses the cached sprites
+            mtimes = {file: os.path.getmtime(file) for file in set(files)}
+            past = time.time() - 60
+            for file in mtimes:
+                os.utime(file, (past, past))
+            self.assertEqual(vd.render_subtitle_sprites(subtitle_path, params, font_path, cache_dir=cache_dir), concat_path)
+            with open(concat_path, encoding="utf-8") as f:
+                self.assertEqual([line[len("file '"):-1] for line in f.read().splitlines() if line.startswith("file ")], files)
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
+            # reused sprites are marked as used again
+            for file in mtimes:
+                self.assertGreater(os.path.getmtime(file), past)
+
+            # sprites unused for longer than the age limit are deleted
+            old = time.time() - 10 * 86400
+            os.utime(files[2], (old, old))
+            self.assertEqual(vd.prune_subtitle_cache(cache_dir, max_age_days=7, max_size_mb=0), 1)
+            self.assertFalse(os.path.exists(files[2]))
+            self.assertTrue(os.path.exists(blank))
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -1,8 +1,14 @@
 import asyncio
 import unittest
 import os
+import subprocess
 import sys
+import tempfile
+import threading
 from pathlib import Path
+from unittest import mock
+
+from imageio_ffmpeg import get_ffmpeg_exe
 
 # add project root to python path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -101,6 +107,88 @@ class TestVoiceService(unittest.TestCase):
 
         self.loop.run_until_complete(_do())
 
+    def test_split_tts_chunks(self):
+        chunks = vs.split_tts_chunks(text_en, max_chars=200)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 200 for chunk in chunks))
+        self.assertEqual(" ".join(chunks), " ".join(text_en.split()))
+
+    def test_tts_cache(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+
+        def storage_dir(sub_dir: str = "", create: bool = False):
+            d = os.path.join(cache_dir.name, sub_dir)
+            os.makedirs(d, exist_ok=True)
+            return d
+
+        sub_maker = vs.SubMaker()
+        sub_maker.create_sub((0, 5000000), "What")
+        sub_maker.create_sub((5000000, 3000000), "is")
+        key = vs.tts_cache_key("edge", "en-US-JennyNeural", 1.0, 1.0, "What is")
+        with mock.patch.object(vs.utils, "storage_dir", side_effect=storage_dir):
+            vs.save_tts_cache(key, b"audio", sub_maker)
+            self.assertTrue(all(f.startswith(cache_dir.name) for f in vs._tts_cache_files(key)))
+
+            audio, cached = vs.load_tts_cache(key)
+            self.assertEqual(audio, b"audio")
+            self.assertEqual(cached.subs, sub_maker.subs)
+            self.assertEqual(cached.offset, sub_maker.offset)
+            self.assertIsNone(vs.load_tts_cache(vs.tts_cache_key("edge", "en-US-JennyNeural", 1.2, 1.0, "What is")))
+
+    def test_tts_cache_off_loop(self):
+        # the cache files are read in a worker thread, not on the shared tts event loop
+        threads = []
+        cached = (b"audio", vs.SubMaker())
+
+        def load_tts_cache(cache_key):
+            threads.append(threading.current_thread())
+            return cached
+
+        with mock.patch.object(vs, "load_tts_cache", side_effect=load_tts_cache):
+            result = asyncio.run(vs._edge_tts_segment_async("What is", "en-US-JennyNeural", "+0%"))
+        self.assertIs(result, cached)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_get_audio_duration(self):
+        from moviepy import AudioFileClip
+        from app.services.utils import audio_meta
+
+        for ext, args in [("mp3", ["-b:a", "48k"]), ("m4a", []), ("wav", [])]:
+            audio_file = os.path.join(temp_dir, f"test-duration.{ext}")
+            subprocess.run(
+                [get_ffmpeg_exe(), "-y", "-v", "error", "-f", "lavfi", "-i", "sine=f=440:d=2.5", *args, audio_file],
+                check=True,
+            )
+            with AudioFileClip(audio_file) as clip:
+                self.assertAlmostEqual(audio_meta.get_duration(audio_file), clip.duration, delta=0.05)
+            os.remove(audio_file)
+        self.assertEqual(vs.get_audio_duration(os.path.join(temp_dir, "missing.mp3")), 0.0)
+
+    def test_align_subtitles(self):
+        import numpy as np
+
+        sample_rate = 16000
+
+        def speech(seconds):
+            t = np.arange(int(seconds * sample_rate)) / sample_rate
+            return 0.3 * np.sin(2 * np.pi * 220 * t)
+
+        def pause(seconds):
+            return np.zeros(int(seconds * sample_rate))
+
+        # the second sentence is spoken much slower than its length suggests
+        samples = np.concatenate(
+            [pause(0.2), speech(1.0), pause(0.4), speech(3.0), pause(0.4), speech(1.0), pause(0.2)]
+        ).astype(np.float32)
+        sub_maker = vs.align_subtitles("Hello there, a slow one, goodbye now", "", samples, sample_rate)
+        self.assertEqual(sub_maker.subs, ["Hello there", "a slow one", "goodbye now"])
+        expected = [(0.2, 1.2), (1.6, 4.6), (5.0, 6.0)]
+        for (start, end), (expected_start, expected_end) in zip(sub_maker.offset, expected):
+            self.assertAlmostEqual(start / 10000000, expected_start, delta=0.05)
+            self.assertAlmostEqual(end / 10000000, expected_end, delta=0.05)
+
 if __name__ == "__main__":
     # python -m unittest test.services.test_voice.TestVoiceService.test_azure_tts_v1
     # python -m unittest test.services.test_voice.TestVoiceService.test_azure_tts_v2
@@ -1136,6 +1136,7 @@ from app.models.schema import (
     VideoTransitionMode,
 )
 from app.services import llm, voice
+from app.services.fonts import font_registry
 from app.services import task as tm
 from app.services import state as sm
 from app.utils import utils
@@ -1192,13 +1193,8 @@ support_locales = [
 
 
 def get_all_fonts():
-    fonts = []
-    for root, dirs, files in os.walk(font_dir):
-        for file in files:
-            if file.endswith(".ttf") or file.endswith(".ttc"):
-                fonts.append(file)
-    fonts.sort()
-    return fonts
+    # 프로세스당 한 번만 폰트 폴더를 스캔합니다
+    return font_registry.file_names()
 
 
 def get_all_songs():
@@ -2734,8 +2730,22 @@ with tab_main:
             completed_videos = []
             failed_videos = []
             
+            # 모든 제목의 한국어 대본과 키워드를 몇 번의 배치 요청으로 미리 생성
+            prepared_scripts = {}
+            with current_status:
+                with st.spinner("🤖 AI가 전체 대본과 키워드를 한 번에 생성 중입니다..."):
+                    try:
+                        prepared_scripts = llm.generate_scripts_batch(
+                            parsed_titles,
+                            language="ko-KR",
+                            paragraph_number=4 if batch_video_type == 'longform' else 1,
+                        )
+                    except Exception as e:
+                        logger.warning(f"batch script generation failed, generating one by one: {e}")
+            
             for i, title in enumerate(parsed_titles):
                 current_video_num = i + 1
+                prepared = prepared_scripts.get(title, {})
                 
                 # Task header (일반 영상 생성과 동일)
                 st.markdown(f"""
@@ -2766,24 +2776,25 @@ with tab_main:
                         video_language="ko-KR"
                     )
                     
-                    script = ""
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(
-                            llm.generate_script,
-                            video_subject=temp_params.video_subject,  # 일반 영상과 동일
-                            language="ko-KR",
-                            paragraph_number=4 if batch_video_type == 'longform' else 1
-                        )
+                    script = prepared.get("script", "")
+                    if not script:
+                        with concurrent.futures.ThreadPoolExecutor() as executor:
+                            future = executor.submit(
+                                llm.generate_script,
+                                video_subject=temp_params.video_subject,  # 일반 영상과 동일
+                                language="ko-KR",
+                                paragraph_number=4 if batch_video_type == 'longform' else 1
+                            )
                         
-                        # Animated progress (일반 영상과 동일)
-                        for i in range(50):
-                            if future.done():
-                                break
-                            time.sleep(0.1)
-                            current_p = min(10 + int(i * 0.8), 50)
-                            progress_bar.progress(current_p)
+                            # Animated progress (일반 영상과 동일)
+                            for i in range(50):
+                                if future.done():
+                                    break
+                                time.sleep(0.1)
+                                current_p = min(10 + int(i * 0.8), 50)
+                                progress_bar.progress(current_p)
                             
-                        script = future.result()
+                            script = future.result()
                     
                     if not script or "실패했습니다" in script or "Error:" in script:
                         st.warning(f"⚠️ 대본 생성 실패 (API 할당량 초과): 기본 대본 사용")
@@ -2799,28 +2810,29 @@ with tab_main:
                     status_text.text("🔍 대본 분석 및 키워드 추출 중...")
                     progress_bar.progress(60)
                     
-                    terms = []
-                    try:
-                        with concurrent.futures.ThreadPoolExecutor() as executor:
-                            future = executor.submit(
-                                llm.generate_terms,
-                                video_subject=temp_params.video_subject,  # 일반 영상과 동일
-                                video_script=script, 
-                                amount=5
-                            )
+                    terms = prepared.get("terms", []) if script == prepared.get("script") else []
+                    if not terms:
+                        try:
+                            with concurrent.futures.ThreadPoolExecutor() as executor:
+                                future = executor.submit(
+                                    llm.generate_terms,
+                                    video_subject=temp_params.video_subject,  # 일반 영상과 동일
+                                    video_script=script, 
+                                    amount=5
+                                )
                             
-                            # Animated progress (일반 영상과 동일)
-                            for i_term in range(40):
-                                if future.done():
-                                    break
-                                time.sleep(0.1)
-                                current_p = min(60 + int(i_term * 1), 90)
-                                progress_bar.progress(current_p)
+                                # Animated progress (일반 영상과 동일)
+                                for i_term in range(40):
+                                    if future.done():
+                                        break
+                                    time.sleep(0.1)
+                                    current_p = min(60 + int(i_term * 1), 90)
+                                    progress_bar.progress(current_p)
                                 
-                            terms = future.result()
-                    except Exception as e:
-                        st.warning(f"⚠️ 키워드 생성 실패 (API 할당량 초과): 기본 키워드 사용")
-                        terms = []
+                                terms = future.result()
+                        except Exception as e:
+                            st.warning(f"⚠️ 키워드 생성 실패 (API 할당량 초과): 기본 키워드 사용")
+                            terms = []
                     
                     if not terms:
                         terms = [title]  # 제목을 기본 키워드로 사용
@@ -2879,7 +2891,7 @@ with tab_main:
                                 elif state == const.TASK_STATE_COMPLETE:
                                     status_text.success("✅ 완료!")
                                     break
-                            time.sleep(1)
+                            sm.task_events.wait(task_id, timeout=1)  # 진행 상황이 갱신되면 즉시 깨어납니다
                         
                         if future.done():
                             try:
@@ -3161,7 +3173,7 @@ with tab_main:
                                         elif eng_state == const.TASK_STATE_COMPLETE:
                                             eng_status_text.success("✅ 영어 버전 완료!")
                                             break
-                                    time.sleep(1)
+                                    sm.task_events.wait(eng_task_id, timeout=1)
                                 
                                 if eng_future.done():
                                     eng_result = eng_future.result()
@@ -4164,6 +4176,7 @@ with tab_settings:
                 ("🌟 Pexels (추천)", "pexels"),
                 ("🎨 Pixabay", "pixabay"),
                 ("📁 로컬 파일", "local"),
+                ("📚 내 영상 라이브러리", "library"),
                 ("🎵 TikTok", "douyin"),
                 ("📺 Bilibili", "bilibili"),
                 ("📱 Xiaohongshu", "xiaohongshu"),
@@ -5319,7 +5332,7 @@ if start_button:
                             elif state == const.TASK_STATE_COMPLETE:
                                 status_text.success("✅ 완료!")
                                 break
-                        time.sleep(1)
+                        sm.task_events.wait(task_id, timeout=1)  # 진행 상황이 갱신되면 즉시 깨어납니다
                     
                     if future.done():
                         result = future.result()